@@ -0,0 +1,172 @@
+# agregacao_paralela.py
+# ----------------------------------------------------------
+# Agregação particionada: o DataFrame tratado é dividido em partes
+# (faixas de linhas ou valores de uma coluna, ex.: JoiningYear), cada
+# parte ganha a sua fonte (FilterIndex) e as consultas rodam em
+# paralelo, uma parte por núcleo.
+#
+# Cada parte devolve só contagens e somas inteiras (count/leave_sum);
+# a junção soma essas parciais e as taxas/percentuais são calculados
+# depois, em insights.py. Como soma de inteiros não depende da ordem,
+# o resultado é idêntico bit a bit ao da fonte serial.
+#
+# Executor:
+#   "process" -> pool de processos criado por fork (as partes são herdadas,
+#                nada é copiado/serializado; só filtros e resultados trafegam)
+#   "thread"  -> pool de threads (onde não há fork, ex.: Windows/macOS)
+#   None      -> serial (1 núcleo ou bases pequenas)
+#
+# O pool é criado junto com a fonte e todos os processos são bifurcados
+# ali, uma vez, antes de qualquer consulta: nunca no meio de uma requisição
+# do servidor. Os filhos só rodam numpy/pandas sobre as partes herdadas.
+#
+# close() libera o pool e as partes registradas para os filhos (a fonte
+# segue respondendo, em série, para quem ainda a tiver). Quem troca de
+# versão (dataset_compartilhado) fecha a fonte antiga; uma fonte
+# esquecida sem close() é liberada quando o coletor de lixo a recolhe.
+#
+# Mesma interface do AggregateCube/FilterIndex (aggregate/values).
+# ----------------------------------------------------------
+
+import itertools
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from filtros import FilterIndex
+
+# ======= AJUSTES =======
+PARALLEL_MIN_ROWS = 2_000_000   # abaixo disso a fonte serial é mais rápida
+PARTS_PER_WORKER = 2            # partes por núcleo (equilibra partes desiguais)
+# =======================
+
+# Partes de cada fonte, visíveis nos processos filhos (herdadas no fork)
+_PARTS: dict[int, list] = {}
+_next_key = itertools.count()
+
+
+def _run_part(key: int, i: int, method: str, args: tuple):
+    return getattr(_PARTS[key][i], method)(*args)
+
+
+def _release(key: int, pool) -> None:
+    # Espera as consultas já enviadas e só então tira as partes dos filhos
+    if pool is not None:
+        pool.shutdown(wait=True)
+    _PARTS.pop(key, None)
+
+
+def default_executor() -> str | None:
+    if (os.cpu_count() or 1) < 2:
+        return None
+    return "process" if "fork" in multiprocessing.get_all_start_methods() else "thread"
+
+
+def _may_match(keys: set | None, cond) -> bool:
+    # A parte pode ter linhas que atendem `cond`? (poda de partes inteiras)
+    if keys is None or cond is None:
+        return True
+    if isinstance(cond, tuple):
+        lo, hi = cond
+        return any(lo <= k <= hi for k in keys)
+    if isinstance(cond, (list, set, frozenset)):
+        return not keys.isdisjoint(cond)
+    return cond in keys
+
+
+class PartitionedSource:
+
+    def __init__(self, parts: list, keys: list[set | None] | None = None,
+                 partition_by: str | None = None, executor: str | None = "auto",
+                 workers: int | None = None, version: str | None = None):
+        self.parts = parts
+        self.keys = keys or [None] * len(parts)
+        self.partition_by = partition_by
+        self.version = version   # versão do dataset de origem (chave dos caches)
+        self.executor = default_executor() if executor == "auto" else executor
+        self.workers = workers or os.cpu_count() or 1
+        self._key = next(_next_key)
+        _PARTS[self._key] = parts   # antes do fork: os filhos herdam
+        self._lock = threading.Lock()
+        self._pool = None
+        if self.executor == "process":
+            self._pool = ProcessPoolExecutor(self.workers,
+                                             mp_context=multiprocessing.get_context("fork"))
+            self._pool.submit(int).result()   # bifurca os processos agora
+        elif self.executor == "thread":
+            self._pool = ThreadPoolExecutor(self.workers)
+        self._finalizer = weakref.finalize(self, _release, self._key, self._pool)
+
+    @classmethod
+    def from_frame(cls, employee_df: pd.DataFrame, n_parts: int | None = None,
+                   partition_by: str | None = None, executor: str | None = "auto",
+                   workers: int | None = None, factory=FilterIndex) -> "PartitionedSource":
+        # partition_by=None -> faixas contíguas de linhas (fatias, sem cópia)
+        # partition_by=col  -> uma parte por valor da coluna (permite podar partes)
+        workers = workers or os.cpu_count() or 1
+        if partition_by is None:
+            n_parts = n_parts or workers * PARTS_PER_WORKER
+            bounds = np.linspace(0, len(employee_df), min(n_parts, max(len(employee_df), 1)) + 1)
+            frames = [employee_df.iloc[int(a):int(b)] for a, b in zip(bounds[:-1], bounds[1:])]
+            keys = None
+        else:
+            codes, uniques = pd.factorize(employee_df[partition_by], sort=True)
+            frames = [employee_df.take(np.flatnonzero(codes == i)) for i in range(len(uniques))]
+            keys = [{value} for value in uniques.tolist()]
+        for frame in frames:
+            frame.attrs = dict(employee_df.attrs)
+        return cls([factory(frame) for frame in frames], keys, partition_by, executor, workers,
+                   employee_df.attrs.get("dataset_version"))
+
+    def __len__(self) -> int:
+        return sum(len(p) if hasattr(p, "__len__") else p.n_rows for p in self.parts)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(p.nbytes for p in self.parts)
+
+    def _map(self, method: str, filters: dict | None, call_args: tuple) -> list:
+        # Roda `method` nas partes que podem ter linhas selecionadas
+        cond = (filters or {}).get(self.partition_by) if self.partition_by else None
+        wanted = [i for i, keys in enumerate(self.keys) if _may_match(keys, cond)] or [0]
+        with self._lock:
+            if self._pool is not None and len(wanted) > 1:
+                futures = [self._pool.submit(_run_part, self._key, i, method, call_args)
+                           for i in wanted]
+            else:
+                futures = None
+        if futures is None:
+            # serial (sem executor, uma parte só ou fonte já fechada)
+            return [getattr(self.parts[i], method)(*call_args) for i in wanted]
+        return [f.result() for f in futures]
+
+    def aggregate(self, filters: dict | None = None, by: list[str] | tuple = ()) -> pd.DataFrame:
+        # Soma das contagens parciais (inteiros: mesma resposta da fonte serial)
+        partials = self._map("aggregate", filters, (filters, list(by)))
+        by = list(by)
+        if not by:
+            return pd.DataFrame({
+                "count": [int(sum(int(p["count"].sum()) for p in partials))],
+                "leave_sum": [int(sum(int(p["leave_sum"].sum()) for p in partials))],
+            })
+        merged = pd.concat(partials, ignore_index=True)
+        result = (
+            merged.groupby(by, observed=True, sort=True)[["count", "leave_sum"]]
+            .sum()
+            .reset_index()
+        )
+        return result[result["count"] > 0].reset_index(drop=True)
+
+    def values(self, dim: str, filters: dict | None = None) -> list:
+        return sorted(set().union(*self._map("values", filters, (dim, filters))))
+
+    def close(self) -> None:
+        with self._lock:
+            self._pool = None
+            self.executor = None
+        self._finalizer()
@@ -0,0 +1,233 @@
+# amostragem.py
+# ----------------------------------------------------------
+# Modo aproximado: amostra estratificada da base tratada, com pesos,
+# para responder aos insights em tempo limitado (independe do tamanho
+# da base) e com intervalos de confiança.
+#
+# Estratos = combinações de JoiningYear × PaymentTier × Gender ×
+# EverBenched (os filtros principais do dashboard). Cada estrato h com
+# N_h linhas entra com n_h linhas sorteadas (proporcional, com um mínimo
+# por estrato para os pequenos) e cada linha da amostra vale N_h / n_h.
+# Os tamanhos são absolutos (SAMPLE_SIZES): ~20 mil e ~200 mil linhas,
+# seja a base de 1 ou de 100 milhões.
+#
+# SampledSource tem a mesma interface do cubo/FilterIndex
+# (aggregate/values), com contagens estimadas (arredondadas); as
+# funções *_intervals dão a meia-largura do IC de 95% de cada célula
+# dos insights (estimadores de razão e de total da amostragem
+# estratificada, com correção de população finita).
+#
+# As amostras são gravadas no cache por load_data() e estendidas por
+# append_extract() (ver dados_tratados.load_sample).
+# ----------------------------------------------------------
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from cubo import MEASURE, selection_mask
+
+# ======= AJUSTES =======
+SAMPLE_STRATA = ["JoiningYear", "PaymentTier", "Gender", "EverBenched"]
+SAMPLE_SIZES = (20_000, 200_000)   # linhas por nível de precisão (rápida, refinada)
+SAMPLE_MIN_PER_STRATUM = 30        # estratos pequenos: pelo menos isso (ou o estrato inteiro)
+SAMPLE_SEED = 42
+APPROX_MIN_ROWS = 1_000_000        # abaixo disso a consulta exata já é interativa
+# Oferece o modo aproximado mesmo em bases pequenas (demonstração/testes)
+APPROX_ALWAYS = os.environ.get("DASHBOARD_APPROX", "") not in ("", "0")
+CONFIDENCE_Z = 1.96                # IC de 95%
+# =======================
+
+
+def approx_available(n_rows: int) -> bool:
+    return APPROX_ALWAYS or n_rows >= APPROX_MIN_ROWS
+
+
+def _take_per_stratum(codes: np.ndarray, take: np.ndarray, seed: int) -> np.ndarray:
+    # Máscara com take[h] linhas sorteadas (sem reposição) de cada estrato h
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(len(codes)), codes))   # por estrato, aleatório dentro
+    sizes = np.bincount(codes, minlength=len(take))
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    rank = np.empty(len(codes), dtype=np.int64)
+    rank[order] = np.arange(len(codes)) - np.repeat(starts, sizes)
+    return rank < take[codes]
+
+
+def _allocation(sizes: np.ndarray, rate: float) -> np.ndarray:
+    take = np.maximum(np.ceil(sizes * rate).astype(np.int64), SAMPLE_MIN_PER_STRATUM)
+    return np.minimum(take, sizes)
+
+
+def stratified_sample(employee_df: pd.DataFrame, size: int,
+                      seed: int = SAMPLE_SEED) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # (linhas sorteadas, tabela de estratos com N = linhas na base e n = na amostra)
+    strata_cols = [c for c in SAMPLE_STRATA if c in employee_df.columns]
+    groups = employee_df.groupby(strata_cols, observed=True, sort=True)
+    codes = groups.ngroup().to_numpy()
+    strata = groups.size().reset_index(name="N")
+    sizes = strata["N"].to_numpy(np.int64)
+    take = _allocation(sizes, min(1.0, size / max(len(employee_df), 1)))
+    strata["n"] = take
+    return employee_df[_take_per_stratum(codes, take, seed)], strata
+
+
+def extend_sample(strata: pd.DataFrame, new_rows: pd.DataFrame, size: int,
+                  seed: int = SAMPLE_SEED) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # Linhas novas (append_extract): estratos já existentes mantêm a taxa n/N
+    # (mesma probabilidade para linhas antigas e novas); estratos novos usam
+    # a taxa do tamanho-alvo
+    strata_cols = [c for c in SAMPLE_STRATA if c in strata.columns]
+    new_strata = new_rows.groupby(strata_cols, observed=True, sort=True).size().reset_index(name="dN")
+    merged = strata.merge(new_strata, on=strata_cols, how="outer", sort=True)
+    merged[["N", "n", "dN"]] = merged[["N", "n", "dN"]].fillna(0).astype(np.int64)
+    total = int(merged["N"].sum() + merged["dN"].sum())
+
+    rate = np.where(merged["N"] > 0, merged["n"] / merged["N"].clip(lower=1), min(1.0, size / max(total, 1)))
+    delta = merged["dN"].to_numpy(np.int64)
+    take = np.where(merged["N"] > 0,
+                    np.minimum(np.ceil(delta * rate).astype(np.int64), delta),
+                    _allocation(delta, min(1.0, size / max(total, 1))))
+
+    codes = (new_rows[strata_cols].merge(merged[strata_cols].reset_index(), on=strata_cols, how="left")
+             ["index"].to_numpy())
+    mask = _take_per_stratum(codes, take, seed + total)
+    merged["N"] += merged["dN"]
+    merged["n"] += take
+    return new_rows[mask].copy(), merged[strata_cols + ["N", "n"]]
+
+
+class SampledSource:
+    # Amostra estratificada com pesos N_h / n_h; mesma interface do AggregateCube
+    approximate = True
+
+    def __init__(self, sample: pd.DataFrame, strata: pd.DataFrame, version: str | None = None,
+                 target_rows: int | None = None):
+        self.frame = sample
+        self.strata = strata.reset_index(drop=True)
+        self.strata_cols = [c for c in SAMPLE_STRATA if c in strata.columns]
+        self.version = version   # versão do dataset + nível da amostra (chave dos caches)
+        self.target_rows = target_rows
+        self.total_rows = int(self.strata["N"].sum())
+        codes = sample[self.strata_cols].merge(
+            self.strata[self.strata_cols].reset_index(), on=self.strata_cols, how="left")["index"]
+        self._stratum = codes.to_numpy(np.int64)
+        self._N = self.strata["N"].to_numpy(np.float64)
+        self._n = self.strata["n"].to_numpy(np.float64)
+        self._weight = (self._N / self._n)[self._stratum]
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.frame.memory_usage(deep=True).sum()) + self._weight.nbytes
+
+    @property
+    def fraction(self) -> float:
+        return len(self.frame) / max(self.total_rows, 1)
+
+    def aggregate(self, filters: dict | None = None, by: list[str] | tuple = ()) -> pd.DataFrame:
+        # Estimativas de count/leave_sum (soma dos pesos), arredondadas para inteiros
+        mask = selection_mask(self.frame, filters)
+        weight = self._weight[mask]
+        leave = weight * self.frame[MEASURE].to_numpy(np.float64)[mask]
+        by = list(by)
+        if not by:
+            return pd.DataFrame({"count": [int(round(weight.sum()))],
+                                 "leave_sum": [int(round(leave.sum()))]})
+        table = self.frame.loc[mask, by].assign(count=weight, leave_sum=leave)
+        agg = table.groupby(by, observed=True)[["count", "leave_sum"]].sum().reset_index()
+        agg["count"] = agg["count"].round().astype("int64")
+        agg["leave_sum"] = agg["leave_sum"].round().astype("int64")
+        return agg[agg["count"] > 0].reset_index(drop=True)
+
+    def values(self, dim: str, filters: dict | None = None) -> list:
+        mask = selection_mask(self.frame, filters)
+        return sorted(self.frame.loc[mask, dim].unique().tolist())
+
+    def strata_counts(self, filters: dict | None, by: list[str], measure: str | None = None) -> pd.DataFrame:
+        # Linhas da amostra por (by, estrato): n (no domínio) e y (soma de `measure`)
+        mask = selection_mask(self.frame, filters)
+        table = self.frame.loc[mask, by].assign(
+            _stratum=self._stratum[mask], n=1,
+            y=self.frame[measure].to_numpy(np.int64)[mask] if measure else 0)
+        return table.groupby(by + ["_stratum"], observed=True)[["n", "y"]].sum().reset_index()
+
+    def _design(self, cells: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        h = cells["_stratum"].to_numpy(np.int64)
+        N, n = self._N[h], self._n[h]
+        return N, n, 1 - n / N
+
+    def ratio_intervals(self, cells: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+        # Razão y/n por `keys` (ex.: taxa de saída) e meia-largura do IC
+        # (linearização: z = y - R·n no domínio, variância entre estratos)
+        N, n_h, fpc = self._design(cells)
+        y, n_d = cells["y"].to_numpy(np.float64), cells["n"].to_numpy(np.float64)
+        w = N / n_h
+        key = cells.groupby(keys, observed=True, sort=True).ngroup().to_numpy()
+        Y = np.bincount(key, weights=w * y)
+        D = np.bincount(key, weights=w * n_d)
+        R = np.divide(Y, D, out=np.zeros_like(Y), where=D > 0)
+        r = R[key]
+        sz = y - r * n_d
+        szz = y * (1 - r) ** 2 + (n_d - y) * r ** 2
+        s2 = np.divide(szz - sz ** 2 / n_h, n_h - 1, out=np.zeros_like(sz), where=n_h > 1)
+        var = np.bincount(key, weights=N ** 2 * fpc * s2 / n_h)
+        var = np.divide(var, D ** 2, out=np.zeros_like(var), where=D > 0)
+        out = cells[keys].drop_duplicates().sort_values(keys).reset_index(drop=True)
+        out["estimate"] = R
+        out["half_width"] = CONFIDENCE_Z * np.sqrt(np.maximum(var, 0))
+        return out
+
+    def total_intervals(self, cells: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+        # Total de linhas por `keys` (ex.: contagens) e meia-largura do IC
+        N, n_h, fpc = self._design(cells)
+        p = cells["n"].to_numpy(np.float64) / n_h
+        key = cells.groupby(keys, observed=True, sort=True).ngroup().to_numpy()
+        var_h = np.divide(N ** 2 * fpc * p * (1 - p), n_h - 1, out=np.zeros_like(p), where=n_h > 1)
+        out = cells[keys].drop_duplicates().sort_values(keys).reset_index(drop=True)
+        out["estimate"] = np.bincount(key, weights=N * p)
+        out["half_width"] = CONFIDENCE_Z * np.sqrt(np.maximum(np.bincount(key, weights=var_h), 0))
+        return out
+
+
+# Meia-largura dos ICs, no mesmo formato das tabelas de insights.py
+def insight1_intervals(source: SampledSource, filters: dict | None = None) -> pd.DataFrame:
+    # pontos percentuais por PaymentTier × Gender
+    den = source.strata_counts(filters, ["PaymentTier"])
+    num = source.strata_counts(filters, ["PaymentTier", "Gender"])
+    errors = {}
+    for gender in ["Female", "Male"]:
+        part = num.loc[num["Gender"] == gender, ["PaymentTier", "_stratum", "n"]].rename(columns={"n": "y"})
+        cells = den.drop(columns="y").merge(part, on=["PaymentTier", "_stratum"], how="left")
+        cells["y"] = cells["y"].fillna(0)
+        ci = source.ratio_intervals(cells, ["PaymentTier"])
+        errors[gender] = (ci.set_index("PaymentTier")["half_width"] * 100).round(1)
+    result = pd.DataFrame(errors)
+    result.columns.name = "Gender"
+    return result
+
+
+def insight2_intervals(source: SampledSource, filters: dict | None = None,
+                       exp_col: str = "ExperienceInCurrentDomain") -> pd.DataFrame:
+    # taxa de saída por experiência × EverBenched
+    filters = {**(filters or {}), "EverBenched": ["No", "Yes"]}
+    cells = source.strata_counts(filters, [exp_col, "EverBenched"], MEASURE)
+    ci = source.ratio_intervals(cells, [exp_col, "EverBenched"])
+    ci["EverBenched"] = ci["EverBenched"].astype(str)
+    result = ci.pivot_table(index=exp_col, columns="EverBenched", values="half_width",
+                            aggfunc="sum", observed=True).fillna(0).sort_index()
+    for c in ["No", "Yes"]:
+        if c not in result.columns:
+            result[c] = 0.0
+    return result[["No", "Yes"]]
+
+
+def insight3_intervals(source: SampledSource, filters: dict | None,
+                       lowest_education: int) -> pd.DataFrame:
+    # contagem por PaymentTier na menor escolaridade
+    cells = source.strata_counts({**(filters or {}), "Education": lowest_education}, ["PaymentTier"])
+    ci = source.total_intervals(cells, ["PaymentTier"])
+    return ci[["PaymentTier", "half_width"]].rename(columns={"half_width": "Erro"})
@@ -0,0 +1,247 @@
+# api_insights.py
+# ----------------------------------------------------------
+# API HTTP/JSON (assíncrona, Tornado) com as mesmas tabelas do
+# dashboard, para outras ferramentas internas:
+#
+#   GET /api/insight1?year=2017                  percentuais PaymentTier × Gender
+#   GET /api/insight2?tier=1&year=2017           taxa de saída por experiência × EverBenched
+#   GET /api/insight3?gender=Female&benched=No&year_from=2013&year_to=2016
+#                                                PaymentTier na menor escolaridade
+#   GET /api/values/JoiningYear                  valores de uma dimensão (opções de filtro)
+#   GET /api/status                              versão do dataset e contadores
+#
+# Mesmo motor do dashboard: SharedDataset (atualizado em segundo plano)
+# + fonte dos insights (cubo/bitmap) + funções de insights.py. Todas
+# as consultas já partem do recorte padrão (Gender = Female/Male).
+#
+# O loop assíncrono só cuida de E/S; os cálculos rodam num pool de
+# threads. Respostas prontas (JSON) ficam num LRU com chave
+# (insight, versão do dataset, filtros), e consultas idênticas que
+# chegam ao mesmo tempo esperam um único cálculo (coalescência).
+# O Tornado ainda responde 304 para If-None-Match (ETag do corpo).
+#
+# Uso:
+#   python api_insights.py                 # http://localhost:8600/api/insight1
+#   python api_insights.py --porta 9000 --fonte data/Employee.csv
+#   python api_insights.py --sem-cache     # sem cache e sem coalescência (comparação)
+# ----------------------------------------------------------
+
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.web
+
+from cache_insights import InsightCache, freeze_filters
+from dataset_compartilhado import SharedDataset
+from insights import (
+    BASE_FILTERS, EDU_LABELS, experience_column, insights_source,
+    insight1_percent, insight2_rates, insight3_counts, update_source,
+)
+
+# ======= AJUSTES =======
+API_PORT = 8600
+API_THREADS = 4                               # threads para os cálculos
+RESPONSE_CACHE_MAX_BYTES = 16 * 1024 * 1024   # respostas JSON guardadas
+# =======================
+
+INSIGHTS = ("insight1", "insight2", "insight3")
+PARAMS = {
+    "insight1": {"year"},
+    "insight2": {"year", "tier"},
+    "insight3": {"year", "year_from", "year_to", "gender", "benched"},
+}
+
+
+def _int_param(params: dict, name: str) -> int:
+    try:
+        return int(params[name])
+    except ValueError:
+        raise ValueError(f"Parâmetro '{name}' deve ser inteiro: {params[name]!r}") from None
+
+
+def _choice_param(params: dict, name: str, options: tuple) -> str:
+    if params[name] not in options:
+        raise ValueError(f"Parâmetro '{name}' deve ser um de {list(options)}: {params[name]!r}")
+    return params[name]
+
+
+def parse_query(insight: str, params: dict) -> dict:
+    # Parâmetros da URL -> filtros no formato de insights.py
+    unknown = set(params) - PARAMS[insight]
+    if unknown:
+        raise ValueError(f"Parâmetros desconhecidos para {insight}: {sorted(unknown)}")
+    filters = dict(BASE_FILTERS)
+    if "year" in params:
+        filters["JoiningYear"] = _int_param(params, "year")
+    if "year_from" in params or "year_to" in params:
+        lo = _int_param(params, "year_from") if "year_from" in params else 0
+        hi = _int_param(params, "year_to") if "year_to" in params else 9999
+        filters["JoiningYear"] = (lo, hi)
+    if "gender" in params:
+        filters["Gender"] = _choice_param(params, "gender", ("Female", "Male"))
+    if "benched" in params:
+        filters["EverBenched"] = _choice_param(params, "benched", ("No", "Yes"))
+    if insight == "insight2":
+        # mesmo padrão do seletor do dashboard
+        filters["PaymentTier"] = _int_param(params, "tier") if "tier" in params else 1
+    return filters
+
+
+def _records(frame) -> list[dict]:
+    return frame.reset_index().to_dict(orient="records")
+
+
+def render(insight: str, snapshot, filters: dict) -> bytes:
+    # Calcula o insight e devolve o corpo JSON da resposta
+    source = snapshot.derived("fonte")
+    body = {"insight": insight, "version": snapshot.version, "filters": filters}
+    if insight == "insight1":
+        body["rows"] = _records(insight1_percent(source, filters))
+    elif insight == "insight2":
+        exp_col = experience_column(snapshot.frame.columns)
+        body["experience_column"] = exp_col
+        body["rows"] = _records(insight2_rates(source, filters, exp_col))
+    else:
+        counts, lowest_education = insight3_counts(source, filters)
+        body["lowest_education"] = lowest_education
+        body["education_label"] = EDU_LABELS.get(lowest_education) if lowest_education else None
+        body["rows"] = counts.to_dict(orient="records")
+    return json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def dim_values(source, dim: str) -> list:
+    # Opções de filtro de uma dimensão (o cubo só conhece as suas dimensões)
+    try:
+        values = source.values(dim, BASE_FILTERS)
+    except KeyError:
+        raise ValueError(f"Dimensão indisponível: {dim!r}") from None
+    return [v.item() if hasattr(v, "item") else v for v in values]
+
+
+class InsightService:
+    # Cache de respostas + coalescência de consultas idênticas em andamento
+
+    def __init__(self, dataset: SharedDataset, cache_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+                 threads: int = API_THREADS):
+        self.dataset = dataset
+        self.cache = InsightCache(cache_bytes) if cache_bytes else None
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="api-insights")
+        self.computed = 0
+        self.coalesced = 0
+        self._inflight = {}   # chave -> Future do cálculo (só no loop, sem lock)
+
+    def _compute(self, insight: str, snapshot, filters: dict) -> "asyncio.Future":
+        self.computed += 1
+        return asyncio.get_running_loop().run_in_executor(
+            self.executor, render, insight, snapshot, filters)
+
+    async def respond(self, insight: str, params: dict) -> bytes:
+        filters = parse_query(insight, params)
+        snapshot = self.dataset.snapshot()
+        if self.cache is None:
+            return await self._compute(insight, snapshot, filters)
+
+        key = (insight, snapshot.version or id(snapshot), freeze_filters(filters))
+        found, body = self.cache.get(key)
+        if found:
+            return body
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        future = self._inflight[key] = self._compute(insight, snapshot, filters)
+        try:
+            body = await future
+            self.cache.put(key, body)
+            return body
+        finally:
+            self._inflight.pop(key, None)
+
+    async def values(self, dim: str) -> list:
+        snapshot = self.dataset.snapshot()
+        if dim not in snapshot.frame.columns:
+            raise ValueError(f"Coluna desconhecida: {dim!r}")
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, dim_values, snapshot.derived("fonte"), dim)
+
+    def stats(self) -> dict:
+        return {
+            "dataset": self.dataset.stats(),
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "computed": self.computed,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+
+class InsightHandler(tornado.web.RequestHandler):
+
+    def initialize(self, service: InsightService):
+        self.service = service
+
+    async def get(self, insight: str):
+        params = {name: self.get_argument(name) for name in self.request.arguments}
+        try:
+            body = await self.service.respond(insight, params)
+        except ValueError as exc:
+            self.set_status(400)
+            self.finish({"error": str(exc)})
+            return
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(body)
+
+
+class ValuesHandler(InsightHandler):
+
+    async def get(self, dim: str):
+        try:
+            values = await self.service.values(dim)
+        except ValueError as exc:
+            self.set_status(404)
+            self.finish({"error": str(exc)})
+            return
+        self.finish({"dim": dim, "values": values})
+
+
+class StatusHandler(InsightHandler):
+
+    def get(self):
+        self.finish(self.service.stats())
+
+
+def make_app(service: InsightService) -> tornado.web.Application:
+    args = {"service": service}
+    return tornado.web.Application([
+        (rf"/api/({'|'.join(INSIGHTS)})", InsightHandler, args),
+        (r"/api/values/(\w+)", ValuesHandler, args),
+        (r"/api/status", StatusHandler, args),
+    ])
+
+
+async def serve(port: int, source=None, cache: bool = True, threads: int = API_THREADS) -> None:
+    dataset = SharedDataset(source)
+    dataset.register("fonte", insights_source, update_source)
+    dataset.start_refresher()   # também carrega a primeira versão
+    service = InsightService(dataset, RESPONSE_CACHE_MAX_BYTES if cache else 0, threads)
+    make_app(service).listen(port)
+    print(f"API de insights em http://localhost:{port}/api/insight1 "
+          f"({dataset.stats()['rows']} linhas, cache {'ligado' if cache else 'desligado'})", flush=True)
+    await asyncio.Event().wait()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="API HTTP/JSON dos insights do dashboard")
+    parser.add_argument("--porta", type=int, default=API_PORT)
+    parser.add_argument("--fonte", default=None, help="CSV de origem (padrão: data/Employee.csv)")
+    parser.add_argument("--threads", type=int, default=API_THREADS)
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="sem cache de respostas e sem coalescência (comparação)")
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.porta, args.fonte, not args.sem_cache, args.threads))
+
+
+if __name__ == "__main__":
+    main()
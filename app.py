@@ -1,62 +1,70 @@
-
-
+# app.py
+# ----------------------------------------------------------
+# Processamento em lote: limpa uma ou várias extrações de RH (CSV no
+# formato do Employee.csv) com o mesmo pipeline do dashboard
+# (dados_tratados.load_data) e grava os resultados tratados.
+#
+# Os arquivos são processados em paralelo, um por processo.
+#
+# Uso:
+#   python app.py                                  # data/Employee.csv
+#   python app.py extracoes/*.csv --saida tratados/ --workers 4
+#   python app.py Employee.csv --ano-referencia 2023 --formato csv
+# ----------------------------------------------------------
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
 
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-# Caminho local para o arquivo Employee.csv
-employee_df = pd.read_csv(r"C:\Users\Consultor\OneDrive\Desktop\CESAR\4.Análise e Visualização de Dados\Employee.csv")
-
-print(employee_df.head())
-
-
-#Deixando strings vazias com valores nulos, para facilitar a remoção
-employee_df.replace('', np.nan, inplace=True)
-
-print("Valores nulos antes da limpeza:")
-print(employee_df.isnull().sum())
-
-employee_df.dropna(inplace=True)
-
-print("\nValores nulos depois da limpeza:")
-print(employee_df.isnull().sum())
-
-
-#Removendo duplicidades
-print("\nQuantidade de linhas duplicadas antes da remoção", employee_df.duplicated().sum())
-
-employee_df.drop_duplicates(inplace=True)
-
-print("Quantidade de linhas duplicada depois da remoção ", employee_df.duplicated().sum())
-
-# Redefinindo a coluna Education
-education_map = {
-    'Bachelors': 1,
-    'Masters': 2,
-    'PHD': 3
-}
-
-employee_df['Education'] = employee_df['Education'].map(education_map)
-
-print("Coluna 'Education' atualizada:")
-print(employee_df['Education'].head())  
-print(employee_df.head())                
-
-
-
-#Redefinindo a gender
-employee_df['Female'] = employee_df['Gender'].apply(lambda x: 1 if x == 'Female' else 0)
-print(employee_df[['Gender', 'Female']].head())
-
-#employee_df = employee_df.drop('Gender', axis=1)
-print(employee_df.head())
-
-
-def get_years_service(joining_year):
-    return 2023 - joining_year
-
-employee_df['years_of_service'] = employee_df['JoiningYear'].apply(get_years_service)
 
-print(employee_df.head())
\ No newline at end of file
+from dados_tratados import DEFAULT_SOURCE, clean_file
+
+# ======= AJUSTES =======
+OUTPUT_DIR = Path(__file__).parent / "data" / "tratados"
+# =======================
+
+
+def _clean_one(source: Path, output_dir: Path, reference_year: int | None,
+               output_format: str) -> dict:
+    # Um arquivo com problema não derruba o lote inteiro
+    try:
+        return clean_file(source, output_dir, reference_year, output_format)
+    except Exception as e:
+        return {"source": str(source), "error": str(e)}
+
+
+def clean_files(sources: list[Path], output_dir: Path, reference_year: int | None = None,
+                output_format: str = "parquet", workers: int | None = None) -> pd.DataFrame:
+    workers = max(1, min(workers or os.cpu_count() or 1, len(sources)))
+    args = [(source, output_dir, reference_year, output_format) for source in sources]
+    if workers == 1:
+        results = [_clean_one(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_clean_one, *a) for a in args]
+            results = [future.result() for future in as_completed(futures)]
+    return pd.DataFrame(results)
+
+
+def main(argv=None) -> pd.DataFrame:
+    parser = argparse.ArgumentParser(description="Limpeza em lote das extrações de RH")
+    parser.add_argument("arquivos", nargs="*", type=Path, default=[DEFAULT_SOURCE],
+                        help="CSVs de entrada (padrão: data/Employee.csv)")
+    parser.add_argument("--saida", type=Path, default=OUTPUT_DIR, help="pasta de saída")
+    parser.add_argument("--ano-referencia", type=int, default=None,
+                        help="ano usado no tempo de casa (padrão: ano atual)")
+    parser.add_argument("--formato", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processos em paralelo (padrão: nº de CPUs)")
+    args = parser.parse_args(argv)
+
+    summary = clean_files(args.arquivos, args.saida, args.ano_referencia,
+                          args.formato, args.workers)
+    print(summary.to_string(index=False))
+    return summary
+
+
+if __name__ == "__main__":
+    main()
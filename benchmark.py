@@ -0,0 +1,225 @@
+# benchmark.py
+# ----------------------------------------------------------
+# Benchmark do pipeline carregar -> limpar -> deduplicar -> agregar,
+# sem Streamlit (roda direto no terminal / CI).
+#
+# Para cada tamanho gera uma base sintética (dados_sinteticos.py),
+# mede tempo e pico de memória de cada etapa e grava tudo em JSON,
+# para comparar regressões entre commits.
+#
+# A base leva um EmployeeID sequencial: todas as linhas são distintas e
+# chegam inteiras à agregação. Além das etapas isoladas, mede o caminho
+# real do dashboard, dados_tratados.load_data: montagem do cache Arrow
+# (CSV -> limpeza -> cache) e leitura do cache já pronto.
+#
+# Com --no-ids a base só repete as linhas reais; depois da deduplicação
+# sobram no máximo as ~2.8 mil linhas distintas do CSV original (use
+# --keep-duplicates para agregar sobre todas as linhas nesse caso).
+#
+# Uso:
+#   python benchmark.py                                   # 10k, 1M e 10M linhas
+#   python benchmark.py --sizes 10000 1000000 --output bench.json
+#   python benchmark.py --compare bench_antigo.json       # compara com execução anterior
+#   python benchmark.py --workers 1 4 16                  # agregação particionada por nº de núcleos
+# ----------------------------------------------------------
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import dados_tratados
+from cubo import AggregateCube, CUBE_DIMS
+from dados_sinteticos import write_synthetic_csv
+from agregacao_paralela import PartitionedSource, default_executor
+from filtros import FilterIndex
+from insights import BASE_FILTERS, insight1_percent, insight2_rates, insight3_counts
+from motor_sql import HAS_DUCKDB, SqlSource
+
+# ======= AJUSTES =======
+SIZES = [10_000, 1_000_000, 10_000_000]
+BENCH_DATA_DIR = dados_tratados.CACHE_DIR / "bench"   # CSVs sintéticos (reaproveitados)
+DEFAULT_OUTPUT = Path("bench_results.json")
+# =======================
+
+
+class StageTimer:
+    # Mede tempo (perf_counter) e pico de memória (tracemalloc) por etapa
+
+    def __init__(self, rows: int, track_memory: bool = True):
+        self.rows = rows
+        self.track_memory = track_memory
+        self.results = []
+
+    def run(self, stage: str, func, *args, rows_in: int | None = None, calls: int = 1):
+        if self.track_memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - start
+        record = {
+            "rows": self.rows,
+            "stage": stage,
+            "seconds": round(seconds, 6),
+            "calls": calls,
+            "rows_in": rows_in,
+            "rows_out": len(result) if isinstance(result, pd.DataFrame) else None,
+        }
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            record["peak_bytes"] = peak - before
+            record["delta_bytes"] = current - before
+        self.results.append(record)
+        print(f"  {stage:<28} {seconds:>9.3f}s"
+              + (f"  pico {record['peak_bytes'] / 1e6:>9.1f} MB" if self.track_memory else ""))
+        return result
+
+
+def insight_selections(source) -> dict:
+    # Seleções representativas do dashboard (todas as opções dos widgets)
+    years = source.values("JoiningYear", BASE_FILTERS)
+    tiers = source.values("PaymentTier", BASE_FILTERS)
+    year_filters = [dict(BASE_FILTERS)] + [{**BASE_FILTERS, "JoiningYear": y} for y in years]
+    return {
+        "insight1": year_filters,
+        "insight2": [{**f, "PaymentTier": t} for f in year_filters for t in tiers],
+        "insight3": [
+            {**BASE_FILTERS, **({"Gender": g} if g else {}), **({"EverBenched": e} if e else {}),
+             "JoiningYear": (years[0], years[-1])}
+            for g in (None, "Female", "Male") for e in (None, "No", "Yes")
+        ],
+    }
+
+
+def _compute_all(func, source, selections: list[dict]) -> None:
+    for filters in selections:
+        func(source, filters)
+
+
+def run_insights(timer: StageTimer, source, label: str) -> None:
+    selections = insight_selections(source)
+    funcs = {"insight1": insight1_percent, "insight2": insight2_rates, "insight3": insight3_counts}
+    for name, func in funcs.items():
+        timer.run(f"{name}[{label}]", _compute_all, func, source, selections[name],
+                  calls=len(selections[name]))
+
+
+def bench_size(n_rows: int, track_memory: bool = True, keep_duplicates: bool = False,
+               workers: list[int] = (), with_ids: bool = True) -> list[dict]:
+    csv_path = BENCH_DATA_DIR / f"Employee_{'ids_' if with_ids else ''}{n_rows}.csv"
+    if not csv_path.exists():
+        print(f"Gerando base sintética: {csv_path}")
+        write_synthetic_csv(csv_path, n_rows, with_ids=with_ids)
+
+    print(f"\n== {n_rows:,} linhas ==")
+    timer = StageTimer(n_rows, track_memory)
+    current_year = datetime.now().year
+
+    employee_df = timer.run("load (read_csv)", dados_tratados.read_csv, csv_path)
+    employee_df = timer.run("clean (nulos)", dados_tratados.drop_invalid_rows, employee_df,
+                            rows_in=len(employee_df))
+    if not keep_duplicates:
+        employee_df = timer.run("dedup (drop_duplicates)", lambda df: df.drop_duplicates(),
+                                employee_df, rows_in=len(employee_df))
+    employee_df = timer.run("derive (colunas)", dados_tratados.derive_columns, employee_df,
+                            current_year, rows_in=len(employee_df))
+
+    # Caminho real: load_data monta o cache (streaming nos CSVs grandes) e depois o lê
+    timer.run("load_data (monta cache)", lambda: dados_tratados.load_data(
+        csv_path, current_year, force_refresh=True))
+    cached = timer.run("load_data (cache)", dados_tratados.load_data, csv_path, current_year)
+    timer.run("load_data (cache mapeado)", lambda: dados_tratados.load_data(
+        csv_path, current_year, read_only=True))
+    if not keep_duplicates:
+        employee_df = cached   # mesma base que o dashboard agrega
+    del cached
+
+    cube = timer.run("build cube", AggregateCube.from_frame, employee_df, CUBE_DIMS)
+    index = timer.run("build bitmap index", FilterIndex, employee_df)
+    run_insights(timer, cube, "cube")
+    run_insights(timer, index, "bitmap")
+    for n in workers:
+        # Mesmas consultas, particionadas em n núcleos (resultado idêntico ao serial)
+        parallel = timer.run(f"build partitioned x{n}", PartitionedSource.from_frame, employee_df,
+                             None, None, default_executor() if n > 1 else None, n)
+        run_insights(timer, parallel, f"partitioned x{n}")
+        parallel.close()
+    if HAS_DUCKDB:
+        # Motor SQL: CSV -> Parquet tratado (em blocos) e consultas sobre o arquivo
+        sql = timer.run("build sql (parquet)", SqlSource.from_csv, csv_path, current_year)
+        run_insights(timer, sql, "sql")
+    return timer.results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, previous: dict) -> pd.DataFrame:
+    # Razão de tempo atual/anterior por (linhas, etapa); > 1 = ficou mais lento
+    cur = pd.DataFrame(current["results"]).set_index(["rows", "stage"])["seconds"]
+    old = pd.DataFrame(previous["results"]).set_index(["rows", "stage"])["seconds"]
+    table = pd.DataFrame({"anterior (s)": old, "atual (s)": cur}).dropna()
+    table["razão"] = (table["atual (s)"] / table["anterior (s)"]).round(2)
+    return table
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de dados do dashboard")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--compare", type=Path, help="JSON de uma execução anterior")
+    parser.add_argument("--no-memory", action="store_true", help="não mede memória (mais rápido)")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="pula a deduplicação (agrega sobre todas as linhas geradas)")
+    parser.add_argument("--no-ids", action="store_true",
+                        help="base sem EmployeeID (linhas repetidas das reais; ~2.8 mil distintas)")
+    parser.add_argument("--workers", type=int, nargs="*", default=[],
+                        help="nº de núcleos da agregação particionada (ex.: 1 4 16)")
+    args = parser.parse_args(argv)
+
+    results = []
+    for n_rows in args.sizes:
+        results += bench_size(n_rows, not args.no_memory, args.keep_duplicates, args.workers,
+                              not args.no_ids)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "keep_duplicates": args.keep_duplicates,
+            "distinct_rows": not args.no_ids,
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\n✅ Resultados em {args.output}")
+
+    if args.compare:
+        previous = json.loads(args.compare.read_text(encoding="utf-8"))
+        print(compare(report, previous).to_string())
+    return report
+
+
+if __name__ == "__main__":
+    main()
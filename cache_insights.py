@@ -0,0 +1,145 @@
+# cache_insights.py
+# ----------------------------------------------------------
+# Cache LRU das tabelas dos insights, com chave
+# (insight, versão do dataset, seleção de filtros, parâmetros).
+#
+# Voltar para um ano/tier já visto devolve a tabela pronta em vez de
+# recalcular. O limite é por memória (bytes estimados de cada
+# resultado): ao passar do limite, os menos usados recentemente saem.
+# Contadores de acertos/faltas/despejos ficam em stats().
+# ----------------------------------------------------------
+
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from rastreio import span
+
+# ======= AJUSTES =======
+INSIGHT_CACHE_MAX_BYTES = 64 * 1024 * 1024   # limite de memória do cache
+# =======================
+
+
+def freeze_filters(filters: dict | None) -> tuple:
+    # Seleção -> chave imutável e estável (mesma ordem, listas ordenadas)
+    frozen = []
+    for col, cond in sorted((filters or {}).items()):
+        if cond is None:
+            continue
+        if isinstance(cond, tuple):
+            frozen.append((col, "between", *cond))
+        elif isinstance(cond, (list, set, frozenset)):
+            frozen.append((col, "in", *sorted(cond, key=str)))
+        else:
+            frozen.append((col, "eq", cond))
+    return tuple(frozen)
+
+
+def estimate_nbytes(value) -> int:
+    # Tamanho aproximado do resultado em memória
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if hasattr(value, "to_plotly_json"):
+        # Figura Plotly: tamanho do JSON serializado
+        return len(value.to_json())
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def source_version(source) -> str:
+    # Versão do dataset por trás da fonte (fallback: identidade do objeto)
+    return getattr(source, "version", None) or f"id-{id(source)}"
+
+
+def insight_key(func, version: str, frozen_filters: tuple, args: tuple = (), kwargs: dict | None = None) -> tuple:
+    # Chave de um resultado: (função, versão do dataset, seleção, parâmetros)
+    return (func.__module__, func.__qualname__, version, frozen_filters, tuple(args),
+            tuple(sorted((kwargs or {}).items())))
+
+
+class InsightCache:
+
+    def __init__(self, max_bytes: int = INSIGHT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()   # chave -> (resultado, bytes)
+        self._pinned = {}               # resultados pré-calculados: nunca saem
+        self._lock = threading.Lock()   # sessões do Streamlit rodam em threads
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._pinned)
+
+    def pin(self, key, value) -> None:
+        # Resultado fixo (ex.: exportação estática), fora do limite de memória do LRU
+        with self._lock:
+            self._pinned[key] = value
+
+    def unpin_stale(self, version: str) -> None:
+        # Solta os resultados fixados de outras versões do dataset
+        with self._lock:
+            self._pinned = {k: v for k, v in self._pinned.items() if k[2] == version}
+
+    def get(self, key):
+        with self._lock:
+            if key in self._pinned:
+                self.hits += 1
+                return True, self._pinned[key]
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key][0]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value) -> None:
+        size = estimate_nbytes(value)
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return  # maior que o cache inteiro: não guarda
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self.nbytes -= old_size
+                self.evictions += 1
+
+    def compute(self, func, source, filters: dict | None = None, *args, **kwargs):
+        # Resultado de func(source, filters, ...) vindo do cache quando possível.
+        # Os resultados são compartilhados: não alterar o DataFrame devolvido.
+        key = insight_key(func, source_version(source), freeze_filters(filters), args, kwargs)
+        with span(f"insight.{func.__name__}") as s:
+            found, value = self.get(key)
+            s.attrs["cache"] = "hit" if found else "miss"
+            if not found:
+                value = func(source, filters, *args, **kwargs)
+                self.put(key, value)
+            if isinstance(value, pd.DataFrame):
+                s.rows_out = len(value)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "pinned": len(self._pinned),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,179 @@
+# carga_api.py
+# ----------------------------------------------------------
+# Teste de carga local da API de insights (api_insights.py).
+#
+# Sobe a API num subprocesso (uma vez com cache + coalescência e uma
+# vez sem, para comparar), dispara N requisições com C conexões
+# simultâneas (cliente assíncrono do Tornado) misturando os três
+# insights e filtros variados (anos, tiers, gênero, ociosidade), e
+# mostra requisições por segundo e latência p50/p99.
+#
+# Uso:
+#   python carga_api.py                                   # 2000 requisições, 50 simultâneas
+#   python carga_api.py --requisicoes 5000 --concorrencia 100 --modos cache
+#   python carga_api.py --linhas 1000000                  # base sintética (1 linha = 1 ID)
+# ----------------------------------------------------------
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+from tornado.httpclient import AsyncHTTPClient
+
+from carga_sessoes import LOAD_DATA_DIR
+from dados_sinteticos import write_synthetic_csv
+
+# ======= AJUSTES =======
+REQUESTS = 2000
+CONCURRENCY = 50
+STARTUP_TIMEOUT = 120   # segundos para a API ficar pronta (base grande: limpeza + cache)
+# =======================
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def build_urls(n: int, years: list, tiers: list, seed: int = 0) -> list[str]:
+    # Mistura típica de consultas (mesmas opções dos widgets do dashboard)
+    rng = random.Random(seed)
+    urls = []
+    for _ in range(n):
+        insight = rng.choice(["insight1", "insight2", "insight3"])
+        params = {}
+        if insight in ("insight1", "insight2"):
+            year = rng.choice([None] + years)
+            if year is not None:
+                params["year"] = year
+        if insight == "insight2":
+            params["tier"] = rng.choice(tiers)
+        if insight == "insight3":
+            gender = rng.choice([None, "Female", "Male"])
+            benched = rng.choice([None, "No", "Yes"])
+            if gender:
+                params["gender"] = gender
+            if benched:
+                params["benched"] = benched
+            lo = rng.choice(years)
+            params["year_from"], params["year_to"] = lo, rng.choice([y for y in years if y >= lo])
+        urls.append(f"/api/{insight}" + (f"?{urlencode(params)}" if params else ""))
+    return urls
+
+
+async def _fetch_json(client, url: str) -> dict:
+    return json.loads((await client.fetch(url)).body)
+
+
+async def _wait_ready(client, base: str, proc: subprocess.Popen) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("A API terminou antes de ficar pronta.")
+        try:
+            await client.fetch(base + "/api/status")
+            return
+        except Exception:   # ainda subindo (conexão recusada)
+            await asyncio.sleep(0.2)
+    raise TimeoutError("A API não respondeu a tempo.")
+
+
+async def run_load(base: str, n_requests: int, concurrency: int) -> dict:
+    client = AsyncHTTPClient(max_clients=concurrency)
+    years = (await _fetch_json(client, base + "/api/values/JoiningYear"))["values"]
+    tiers = (await _fetch_json(client, base + "/api/values/PaymentTier"))["values"]
+    pending = iter(build_urls(n_requests, years, tiers))
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for url in pending:   # iterador compartilhado: cada URL sai uma vez
+            start = time.perf_counter()
+            response = await client.fetch(base + url, raise_error=False)
+            latencies.append(time.perf_counter() - start)
+            errors += response.code != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+    status = await _fetch_json(client, base + "/api/status")
+
+    lat_ms = np.array(latencies) * 1000
+    cache = status.get("cache") or {}
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "rps": round(len(latencies) / seconds, 1),
+        "p50_ms": round(float(np.percentile(lat_ms, 50)), 2),
+        "p99_ms": round(float(np.percentile(lat_ms, 99)), 2),
+        "computed": status["computed"],
+        "coalesced": status["coalesced"],
+        "cache_hit_rate": cache.get("hit_rate"),
+        "seconds": round(seconds, 2),
+    }
+
+
+def run_mode(mode: str, n_requests: int, concurrency: int, csv_path: Path | None) -> dict:
+    port = _free_port()
+    cmd = [sys.executable, str(Path(__file__).parent / "api_insights.py"), "--porta", str(port)]
+    if csv_path is not None:
+        cmd += ["--fonte", str(csv_path)]
+    if mode == "sem-cache":
+        cmd.append("--sem-cache")
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f"http://127.0.0.1:{port}"
+
+        async def scenario():
+            await _wait_ready(AsyncHTTPClient(), base, proc)
+            return await run_load(base, n_requests, concurrency)
+
+        return {"mode": mode, **asyncio.run(scenario())}
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main(argv=None) -> pd.DataFrame:
+    parser = argparse.ArgumentParser(description="Teste de carga da API de insights")
+    parser.add_argument("--requisicoes", type=int, default=REQUESTS)
+    parser.add_argument("--concorrencia", type=int, default=CONCURRENCY)
+    parser.add_argument("--modos", nargs="+", choices=["cache", "sem-cache"],
+                        default=["cache", "sem-cache"])
+    parser.add_argument("--linhas", type=int, default=0,
+                        help="base sintética com N linhas distintas (padrão: Employee.csv)")
+    args = parser.parse_args(argv)
+
+    csv_path = None
+    if args.linhas:
+        csv_path = LOAD_DATA_DIR / f"Employee_ids_{args.linhas}.csv"
+        if not csv_path.exists():
+            print(f"Gerando base sintética: {csv_path}")
+            write_synthetic_csv(csv_path, args.linhas, with_ids=True)
+
+    results = []
+    for mode in args.modos:
+        results.append(run_mode(mode, args.requisicoes, args.concorrencia, csv_path))
+        r = results[-1]
+        print(f"  {mode:<10} {r['rps']:>8.1f} req/s  p50 {r['p50_ms']:>7.2f} ms  "
+              f"p99 {r['p99_ms']:>7.2f} ms  erros {r['errors']}")
+
+    table = pd.DataFrame(results)
+    print(table.to_string(index=False))
+    return table
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# carga_sessoes.py
+# ----------------------------------------------------------
+# Teste de carga local: simula N sessões simultâneas do dashboard
+# (uma thread por sessão, como no servidor do Streamlit) e mede a
+# memória residente do processo e a latência de cada interação.
+#
+# Modos:
+#   compartilhado -> todas as sessões usam o mesmo DataFrame somente-leitura
+#                    (SharedDataset, como o dashboard atual)
+#   copia         -> cada sessão recebe a sua cópia (como o antigo
+#                    st.cache_data, que devolvia uma cópia por rerun)
+#
+# Cada combinação (modo, N) roda em um subprocesso; a memória é
+# amostrada (RSS) só durante a fase das sessões.
+#
+# Uso:
+#   python carga_sessoes.py                                 # 1, 10 e 50 sessões, Employee.csv
+#   python carga_sessoes.py --sessoes 1 50 --linhas 1000000 # base sintética (1 linha = 1 ID)
+# ----------------------------------------------------------
+
+import argparse
+import json
+import pickle
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import dados_tratados
+from cubo import CUBE_DIMS
+from dados_sinteticos import write_synthetic_csv
+from dataset_compartilhado import SharedDataset
+from insights import BASE_FILTERS, build_source, insight1_percent, insight2_rates, insight3_counts
+from rastreio import rss_bytes
+
+# ======= AJUSTES =======
+SESSIONS = [1, 10, 50]
+INTERACTIONS = 20                                           # interações por sessão
+LOAD_DATA_DIR = dados_tratados.CACHE_DIR / "carga"          # CSVs sintéticos (reaproveitados)
+# =======================
+
+
+class RssSampler:
+    # Pico de memória residente enquanto ativo (amostra a cada `interval` s)
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes())
+
+
+def _interaction(source, rng: random.Random, years: list, tiers: list) -> None:
+    # Uma interação típica: troca de ano/tier/gênero e recálculo dos 3 insights
+    year = rng.choice([None] + years)
+    filters = {**BASE_FILTERS, **({"JoiningYear": year} if year else {})}
+    insight1_percent(source, filters)
+    insight2_rates(source, {**filters, "PaymentTier": rng.choice(tiers)})
+    gender = rng.choice([None, "Female", "Male"])
+    insight3_counts(source, {**BASE_FILTERS, **({"Gender": gender} if gender else {}),
+                             "JoiningYear": (years[0], years[-1])})
+
+
+def run_sessions(csv_path: Path, n_sessions: int, mode: str,
+                 interactions: int = INTERACTIONS) -> dict:
+    dataset = SharedDataset(csv_path)
+    shared = dataset.get()
+    exp_col = "ExperienceInCurrentDomain"
+    source = build_source(shared, CUBE_DIMS[:-1] + [exp_col])
+    years = source.values("JoiningYear", BASE_FILTERS)
+    tiers = source.values("PaymentTier", BASE_FILTERS)
+    baseline = rss_bytes()
+
+    # Sessões ficam vivas até todas terminarem (como usuários conectados)
+    session_frames = []
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(n_sessions)
+
+    def session(i: int) -> None:
+        rng = random.Random(i)
+        if mode == "copia":
+            employee_df = pickle.loads(pickle.dumps(dataset.get()))
+        else:
+            employee_df = dataset.get()
+        with lock:
+            session_frames.append(employee_df)
+        barrier.wait()
+        for _ in range(interactions):
+            start = time.perf_counter()
+            _interaction(source, rng, years, tiers)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with RssSampler() as sampler, ThreadPoolExecutor(max_workers=n_sessions) as pool:
+        list(pool.map(session, range(n_sessions)))
+    seconds = time.perf_counter() - start
+
+    distinct = len({id(frame) for frame in session_frames})
+    lat_ms = np.array(latencies) * 1000
+    return {
+        "mode": mode,
+        "sessions": n_sessions,
+        "rows": len(shared),
+        "dataset_mb": round(shared.memory_usage(deep=True).sum() / 1e6, 2),
+        "distinct_frames": distinct,
+        "rss_baseline_mb": round(baseline / 1e6, 1),
+        "rss_peak_mb": round(sampler.peak / 1e6, 1),
+        "rss_growth_mb": round((sampler.peak - baseline) / 1e6, 1),
+        "p50_ms": round(float(np.percentile(lat_ms, 50)), 2),
+        "p99_ms": round(float(np.percentile(lat_ms, 99)), 2),
+        "seconds": round(seconds, 2),
+    }
+
+
+def main(argv=None) -> pd.DataFrame:
+    parser = argparse.ArgumentParser(description="Teste de carga com N sessões simultâneas")
+    parser.add_argument("--sessoes", type=int, nargs="+", default=SESSIONS)
+    parser.add_argument("--modos", nargs="+", choices=["compartilhado", "copia"],
+                        default=["compartilhado", "copia"])
+    parser.add_argument("--linhas", type=int, default=0,
+                        help="base sintética com N linhas distintas (padrão: Employee.csv)")
+    parser.add_argument("--interacoes", type=int, default=INTERACTIONS)
+    parser.add_argument("--json", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.linhas:
+        csv_path = LOAD_DATA_DIR / f"Employee_ids_{args.linhas}.csv"
+        if not csv_path.exists():
+            print(f"Gerando base sintética: {csv_path}")
+            write_synthetic_csv(csv_path, args.linhas, with_ids=True)
+    else:
+        csv_path = dados_tratados.DEFAULT_SOURCE
+
+    if args.json:
+        # Execução filha: uma única combinação (modo, N)
+        print(json.dumps(run_sessions(csv_path, args.sessoes[0], args.modos[0], args.interacoes)))
+        return pd.DataFrame()
+
+    dados_tratados.load_data(csv_path)   # aquece o cache Arrow antes das medições
+    results = []
+    for mode in args.modos:
+        for n_sessions in args.sessoes:
+            cmd = [sys.executable, __file__, "--json", "--sessoes", str(n_sessions),
+                   "--modos", mode, "--interacoes", str(args.interacoes)]
+            if args.linhas:
+                cmd += ["--linhas", str(args.linhas)]
+            out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(out.strip().splitlines()[-1]))
+            print(f"  {mode:<14} {n_sessions:>4} sessões  +{results[-1]['rss_growth_mb']:>8.1f} MB"
+                  f"  p50 {results[-1]['p50_ms']:>7.2f} ms  p99 {results[-1]['p99_ms']:>7.2f} ms")
+
+    table = pd.DataFrame(results)
+    print(table.to_string(index=False))
+    return table
+
+
+if __name__ == "__main__":
+    main()
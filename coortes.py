@@ -0,0 +1,158 @@
+# coortes.py
+# ----------------------------------------------------------
+# Curvas de retenção por coorte (JoiningYear / years_of_service) para
+# todas as combinações de segmentos de uma vez:
+#   PaymentTier × City × Gender × EverBenched, cada um também como
+#   "Todos" -> (3+1)·(3+1)·(2+1)·(2+1) = 144 segmentos na base padrão.
+#
+# Uma única passada vetorizada sobre as linhas: códigos das dimensões +
+# anos de casa viram uma chave plana (ravel_multi_index) e dois
+# np.bincount dão contagem e saídas de cada célula. Os "Todos" saem de
+# somas sobre os eixos do array (sem voltar às linhas) e as curvas de
+# cumsum/cumprod ao longo dos anos de casa, para todos os segmentos juntos.
+#
+# Cada funcionário é observado por years_of_service anos: LeaveOrNot = 1
+# conta como saída nesse tempo de casa, LeaveOrNot = 0 como ainda na
+# empresa (censurado). Por tempo de casa t:
+#   em_risco(t)  funcionários com pelo menos t anos de casa (cumsum reverso)
+#   sobrevivência S(t) = Π (1 - saídas / em_risco)        (Kaplan–Meier)
+#   retenção da coorte = 1 - saídas / funcionários da coorte
+#
+# A tabela (poucas centenas de segmentos × coortes) é gravada junto com o
+# cache da base tratada (dados_tratados.load_cohorts) e refeita quando a
+# versão do dataset muda.
+#
+# Uso:
+#   python coortes.py                       # data/Employee.csv
+#   python coortes.py --fonte data/.cache/carga/Employee_ids_2000000.csv
+# ----------------------------------------------------------
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from cubo import MEASURE, selection_mask
+from insights import BASE_FILTERS
+
+# ======= AJUSTES =======
+COHORT_SEGMENTS = ["PaymentTier", "City", "Gender", "EverBenched"]
+ALL_LABEL = "Todos"   # segmento sem filtro naquela dimensão
+# =======================
+
+TENURE = "years_of_service"
+COHORT = "JoiningYear"
+CURVE_COLUMNS = ["Funcionarios", "Saidas", "EmRisco", "Retencao", "Sobrevivencia"]
+
+
+def _with_totals(array: np.ndarray, n_axes: int) -> np.ndarray:
+    # Acrescenta, em cada eixo de segmento, uma posição final com a soma ("Todos")
+    for axis in range(n_axes):
+        array = np.concatenate([array, array.sum(axis=axis, keepdims=True)], axis=axis)
+    return array
+
+
+def _encode(values: pd.Series, mask: np.ndarray) -> tuple[np.ndarray, list]:
+    # Códigos 0..k-1 (ordenados) das linhas selecionadas e os valores de cada código;
+    # category usa os códigos que já existem (sem comparar textos)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()[mask]
+        used = np.flatnonzero(np.bincount(codes[codes >= 0], minlength=len(values.cat.categories)))
+        remap = np.full(len(values.cat.categories), -1, dtype=np.int64)
+        remap[used] = np.arange(len(used))
+        return remap[codes], list(values.cat.categories[used])
+    codes, uniques = pd.factorize(values.to_numpy()[mask], sort=True)
+    return codes, list(uniques)
+
+
+def _empty_table(segments: list[str]) -> pd.DataFrame:
+    # Mesmas colunas da tabela, sem linhas (base vazia ou filtro sem ninguém)
+    return pd.DataFrame({
+        **{dim: pd.Series(dtype=object) for dim in segments},
+        TENURE: pd.Series(dtype=np.int64), COHORT: pd.Series(dtype=np.int64),
+        "Funcionarios": pd.Series(dtype=np.int64), "Saidas": pd.Series(dtype=np.int64),
+        "EmRisco": pd.Series(dtype=np.int64), "Retencao": pd.Series(dtype=np.float64),
+        "Sobrevivencia": pd.Series(dtype=np.float64),
+    })
+
+
+def cohort_tables(employee_df: pd.DataFrame, filters: dict | None = BASE_FILTERS,
+                  segments: list[str] = COHORT_SEGMENTS) -> pd.DataFrame:
+    # Tabela longa: segmentos (texto, "Todos" = sem filtro) + coorte + curvas
+    segments = [s for s in segments if s in employee_df.columns]
+    mask = selection_mask(employee_df, filters)
+
+    codes, labels = [], []
+    for dim in segments:
+        dim_codes, uniques = _encode(employee_df[dim], mask)
+        codes.append(dim_codes)
+        labels.append([str(v) for v in uniques] + [ALL_LABEL])
+    tenure_codes, tenures = _encode(employee_df[TENURE], mask)
+    if not tenures:
+        return _empty_table(segments)
+    reference_year = int(employee_df[COHORT].iloc[0] + employee_df[TENURE].iloc[0])
+
+    # A passada sobre as linhas: chave plana (segmentos..., anos de casa)
+    shape = tuple(len(l) - 1 for l in labels) + (len(tenures),)
+    key = np.ravel_multi_index(codes + [tenure_codes], shape)
+    size = int(np.prod(shape))
+    count = np.bincount(key, minlength=size).reshape(shape)
+    leavers = np.bincount(key, weights=employee_df[MEASURE].to_numpy()[mask],
+                          minlength=size).reshape(shape)
+
+    # "Todos" em cada dimensão, depois uma linha por segmento × anos de casa
+    count = _with_totals(count, len(segments)).reshape(-1, len(tenures)).astype(np.int64)
+    leavers = _with_totals(leavers, len(segments)).reshape(-1, len(tenures)).round().astype(np.int64)
+
+    at_risk = np.cumsum(count[:, ::-1], axis=1)[:, ::-1]
+    hazard = np.divide(leavers, at_risk, out=np.zeros(count.shape), where=at_risk > 0)
+    survival = np.cumprod(1 - hazard, axis=1)
+    retention = np.divide(count - leavers, count, out=np.full(count.shape, np.nan), where=count > 0)
+
+    n_segments, n_tenures = count.shape
+    index = pd.MultiIndex.from_product(labels, names=segments).to_frame(index=False)
+    table = index.loc[index.index.repeat(n_tenures)].reset_index(drop=True)
+    table[TENURE] = np.tile(np.asarray(tenures, dtype=np.int64), n_segments)
+    table[COHORT] = reference_year - table[TENURE]
+    table["Funcionarios"] = count.ravel()
+    table["Saidas"] = leavers.ravel()
+    table["EmRisco"] = at_risk.ravel()
+    table["Retencao"] = retention.ravel()
+    table["Sobrevivencia"] = survival.ravel()
+    # coortes sem ninguém no segmento não têm ponto na curva
+    return table[table["Funcionarios"] > 0].reset_index(drop=True)
+
+
+def segment_curves(table: pd.DataFrame, split: str, fixed: dict | None = None) -> pd.DataFrame:
+    # Curvas de um recorte: `split` com seus valores (sem "Todos") e as demais
+    # dimensões fixadas em `fixed` (padrão "Todos")
+    fixed = fixed or {}
+    mask = table[split] != ALL_LABEL
+    for dim in COHORT_SEGMENTS:
+        if dim in table.columns and dim != split:
+            mask &= table[dim] == fixed.get(dim, ALL_LABEL)
+    curves = table.loc[mask, [split, COHORT, TENURE, *CURVE_COLUMNS]]
+    return curves.sort_values([split, TENURE]).reset_index(drop=True)
+
+
+def main(argv=None) -> pd.DataFrame:
+    from dados_tratados import load_data
+
+    parser = argparse.ArgumentParser(description="Curvas de retenção por coorte e segmento")
+    parser.add_argument("--fonte", default=None, help="CSV de origem (padrão: data/Employee.csv)")
+    args = parser.parse_args(argv)
+
+    employee_df = load_data(args.fonte, read_only=True)
+    start = time.perf_counter()
+    table = cohort_tables(employee_df)
+    seconds = time.perf_counter() - start
+    n_segments = len(table[COHORT_SEGMENTS].drop_duplicates())
+    print(f"{len(employee_df):,} linhas -> {n_segments} segmentos, {len(table)} pontos "
+          f"em {seconds * 1000:.1f} ms")
+    print(segment_curves(table, "PaymentTier").to_string(index=False))
+    return table
+
+
+if __name__ == "__main__":
+    main()
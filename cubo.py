@@ -0,0 +1,115 @@
+# cubo.py
+# ----------------------------------------------------------
+# Cubo de agregação (estilo OLAP) montado uma vez a partir do
+# DataFrame tratado por load_data().
+#
+# Cada célula é uma combinação de JoiningYear × PaymentTier × Gender ×
+# EverBenched × Education × Experiência e guarda:
+#   count     -> número de funcionários
+#   leave_sum -> soma de LeaveOrNot (quantos saíram)
+#
+# Os insights do dashboard são respondidos a partir de fatias do cubo,
+# então cada interação custa O(células) e não O(linhas).
+# ----------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from limpeza import concat_frames
+
+# ======= DIMENSÕES E MEDIDA =======
+CUBE_DIMS = [
+    "JoiningYear",
+    "PaymentTier",
+    "Gender",
+    "EverBenched",
+    "Education",
+    "ExperienceInCurrentDomain",
+]
+MEASURE = "LeaveOrNot"
+# ==================================
+
+
+def selection_mask(frame: pd.DataFrame, filters: dict | None) -> np.ndarray:
+    # Filtros no formato {coluna: condição}:
+    #   valor único   -> igualdade          ex.: {"Gender": "Female"}
+    #   lista/set     -> pertence ao grupo  ex.: {"Gender": ["Female", "Male"]}
+    #   tupla (a, b)  -> intervalo fechado  ex.: {"JoiningYear": (2013, 2016)}
+    #   None          -> sem filtro
+    mask = np.ones(len(frame), dtype=bool)
+    for col, cond in (filters or {}).items():
+        if cond is None:
+            continue
+        values = frame[col]
+        if isinstance(cond, tuple):
+            lo, hi = cond
+            mask &= values.between(lo, hi).to_numpy()
+        elif isinstance(cond, (list, set, frozenset)):
+            mask &= values.isin(list(cond)).to_numpy()
+        else:
+            mask &= (values == cond).to_numpy()
+    return mask
+
+
+class AggregateCube:
+    # Células não vazias do cubo (dimensões + count + leave_sum)
+
+    def __init__(self, cells: pd.DataFrame, dims: list[str], version: str | None = None):
+        self.cells = cells
+        self.dims = list(dims)
+        self.version = version   # versão do dataset de origem (chave dos caches)
+
+    @classmethod
+    def from_frame(cls, employee_df: pd.DataFrame, dims: list[str] | None = None) -> "AggregateCube":
+        dims = [d for d in (dims or CUBE_DIMS) if d in employee_df.columns]
+        cells = (
+            employee_df.groupby(dims, observed=True)[MEASURE]
+            .agg(count="size", leave_sum="sum")
+            .reset_index()
+        )
+        cells["count"] = cells["count"].astype("int64")
+        cells["leave_sum"] = cells["leave_sum"].astype("int64")
+        return cls(cells, dims, employee_df.attrs.get("dataset_version"))
+
+    def merge(self, other: "AggregateCube") -> "AggregateCube":
+        # Soma célula a célula (count/leave_sum são aditivos); base do modo incremental
+        if other.dims != self.dims:
+            raise ValueError(f"Dimensões diferentes: {self.dims} x {other.dims}")
+        cells = (
+            concat_frames([self.cells.copy(), other.cells.copy()])
+            .groupby(self.dims, observed=True)[["count", "leave_sum"]]
+            .sum()
+            .reset_index()
+        )
+        return AggregateCube(cells, self.dims, other.version or self.version)
+
+    def append(self, new_rows: pd.DataFrame) -> "AggregateCube":
+        # Atualiza o cubo só com as linhas novas (ex.: saída de append_extract)
+        return self.merge(AggregateCube.from_frame(new_rows, self.dims))
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.cells.memory_usage(deep=True).sum())
+
+    def aggregate(self, filters: dict | None = None, by: list[str] | tuple = ()) -> pd.DataFrame:
+        # Soma count/leave_sum das células selecionadas, agrupando por `by`
+        cells = self.cells[selection_mask(self.cells, filters)]
+        by = list(by)
+        if not by:
+            return pd.DataFrame({
+                "count": [int(cells["count"].sum())],
+                "leave_sum": [int(cells["leave_sum"].sum())],
+            })
+        return (
+            cells.groupby(by, observed=True)[["count", "leave_sum"]]
+            .sum()
+            .reset_index()
+        )
+
+    def values(self, dim: str, filters: dict | None = None) -> list:
+        # Valores distintos (ordenados) de uma dimensão dentro da seleção
+        cells = self.cells[selection_mask(self.cells, filters)]
+        return sorted(cells.loc[cells["count"] > 0, dim].unique().tolist())
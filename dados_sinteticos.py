@@ -0,0 +1,89 @@
+# dados_sinteticos.py
+# ----------------------------------------------------------
+# Gera bases sintéticas no formato do Employee.csv (mesmas colunas
+# e mesma distribuição de valores), para testes de desempenho.
+#
+# As linhas são sorteadas com reposição a partir do data/Employee.csv
+# original, então a distribuição conjunta das colunas (inclusive a
+# taxa de duplicatas) é preservada. Opcionalmente, uma fração das
+# células vira vazia para exercitar a limpeza de nulos.
+#
+# Como as linhas se repetem, a deduplicação reduz qualquer base às
+# ~2.8 mil linhas distintas do original; com with_ids=True cada linha
+# ganha um EmployeeID sequencial e todas sobrevivem à limpeza.
+#
+# Uso:
+#   python dados_sinteticos.py 1000000 data/Employee_1M.csv
+# ----------------------------------------------------------
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# ======= AJUSTES =======
+SOURCE_CSV = Path(__file__).parent / "data" / "Employee.csv"
+WRITE_CHUNK_ROWS = 1_000_000   # linhas geradas/escritas por vez
+# =======================
+
+
+def load_reference(source: Path = SOURCE_CSV) -> pd.DataFrame:
+    # Base real de onde as distribuições são copiadas (colunas de texto como category)
+    reference = pd.read_csv(source)
+    for col in reference.columns:
+        if reference[col].dtype == object:
+            reference[col] = reference[col].astype("category")
+    return reference
+
+
+def generate_employees(n_rows: int, seed: int = 42, null_rate: float = 0.0,
+                       reference: pd.DataFrame | None = None,
+                       first_id: int | None = None) -> pd.DataFrame:
+    if reference is None:
+        reference = load_reference()
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(reference), size=n_rows)
+    employee_df = reference.take(idx).reset_index(drop=True)
+    if first_id is not None:
+        employee_df.insert(0, "EmployeeID", np.arange(first_id, first_id + n_rows))
+
+    if null_rate > 0:
+        # Células vazias espalhadas pelas colunas (viram '' no CSV)
+        for col in employee_df.columns:
+            holes = rng.random(n_rows) < null_rate / len(employee_df.columns)
+            if holes.any():
+                if employee_df[col].dtype.kind in "iu":
+                    employee_df[col] = employee_df[col].astype("float64")
+                employee_df.loc[holes, col] = np.nan
+    return employee_df
+
+
+def write_synthetic_csv(path: Path, n_rows: int, seed: int = 42,
+                        null_rate: float = 0.0, with_ids: bool = False) -> Path:
+    # Escreve em blocos para não precisar da base inteira em memória
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    reference = load_reference()
+    written = 0
+    block = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        while written < n_rows:
+            size = min(WRITE_CHUNK_ROWS, n_rows - written)
+            chunk = generate_employees(size, seed=seed + block, null_rate=null_rate,
+                                       reference=reference,
+                                       first_id=written if with_ids else None)
+            chunk.to_csv(f, index=False, header=(block == 0), float_format="%.0f")
+            written += size
+            block += 1
+    return path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Uso: python dados_sinteticos.py <n_linhas> <saida.csv> [null_rate]")
+        sys.exit(1)
+    _n = int(sys.argv[1])
+    _null_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    _path = write_synthetic_csv(Path(sys.argv[2]), _n, null_rate=_null_rate)
+    print(f"✅ {_n} linhas em {_path}")
@@ -3,79 +3,979 @@
 # Lê o Employee.csv da pasta data/ (caminho relativo ao projeto),
 # aplica os mesmos tratamentos do seu código e retorna um DataFrame.
 # Pronto para uso local e no Streamlit Cloud.
+#
+# É o carregamento único do projeto: o dashboard, o data/dados_tratados.py
+# e o processamento em lote (app.py) usam load_data(), com arquivo de
+# origem e ano de referência configuráveis.
+#
+# O resultado tratado fica salvo em cache colunar (Arrow IPC) em
+# data/.cache/ e é lido via memory-map nas execuções seguintes.
+# O cache só é refeito quando o CSV ou as regras de limpeza mudam.
+#
+# Arquivos grandes são lidos em blocos (modo streaming): cada bloco é
+# limpo isoladamente e as duplicatas entre blocos são removidas por um
+# índice compacto de impressões digitais (hash de 64 bits por linha).
+#
+# O DataFrame sai com esquema compacto: texto como category (já
+# padronizado), inteiros como int8/int16 e Female como bool.
 # ----------------------------------------------------------
 
 from pathlib import Path
 from datetime import datetime
+import hashlib
+import json
+import os
+import sys
+from typing import TYPE_CHECKING
 import pandas as pd
 import numpy as np
 
+from escrita_atomica import replace_from_tmp
+from limpeza import (
+    CLEANING_VERSION, clean_data, concat_frames, derive_columns,
+    drop_invalid_rows, memory_report, read_only_array, read_only_frame, years_of_service,
+)
+from rastreio import span, traced
+
+# amostragem e coortes só são importados por quem os usa (load_sample,
+# load_cohorts e o cache das amostras): o dashboard carrega este módulo
+# sem eles
+if TYPE_CHECKING:
+    from amostragem import SampledSource
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # sem pyarrow o cache fica desligado
+    pa = None
+    pq = None
+
 # ======= AJUSTES DO ARQUIVO (se precisar trocar separador/decimal/encoding) =======
 CSV_FILENAME = "Employee.csv"   # nome do arquivo dentro de data/
+# Arquivo padrão (pode ser trocado pela variável de ambiente EMPLOYEE_CSV)
+DEFAULT_SOURCE = Path(os.environ.get("EMPLOYEE_CSV", Path(__file__).parent / "data" / CSV_FILENAME))
 CSV_SEP = ","                   # "," ou ";"
 CSV_DECIMAL = "."               # "." ou ","
 CSV_ENCODING = "utf-8"          # "utf-8" ou "latin-1" se acentos quebrados
+CSV_CHUNKSIZE = 250_000         # linhas por bloco no modo streaming
+STREAMING_MIN_BYTES = 256 * 1024 * 1024  # acima disso o CSV é lido em blocos
 # ================================================================================
 
-def load_data() -> pd.DataFrame:
-    # Caminho relativo: <pasta_do_projeto>/data/Employee.csv
-    csv_path = Path(__file__).parent / "data" / CSV_FILENAME
+# ======= CACHE COLUNAR =======
+CACHE_DIR = Path(__file__).parent / "data" / ".cache"
+# =============================
+
+# ======= ESQUEMA DO DATAFRAME TRATADO =======
+# Colunas de texto viram category já na leitura do CSV
+READ_DTYPES = {
+    "Education": "category",
+    "City": "category",
+    "Gender": "category",
+    "EverBenched": "category",
+}
+# ============================================
+
+
+def read_csv(csv_path: Path, **kwargs) -> pd.DataFrame:
+    # Leitura do CSV com os ajustes do arquivo e o esquema de texto declarado
+    return pd.read_csv(csv_path, sep=CSV_SEP, decimal=CSV_DECIMAL,
+                       encoding=CSV_ENCODING, dtype=dict(READ_DTYPES), **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# Modo streaming: leitura em blocos + deduplicação entre blocos
+# ---------------------------------------------------------------------------
+class RowFingerprintIndex:
+    # Conjunto ordenado de hashes uint64 (8 bytes por linha única).
+    # Colisões de 64 bits são desprezíveis para o volume de RH (~1e-9 em 1e5 milhões).
+    #
+    # Guardado como poucas sequências ordenadas e disjuntas (tamanhos ~ potências
+    # de 2): um bloco novo vira mais uma sequência e só se funde com as menores
+    # que ela. Cada hash é copiado O(log n) vezes no total, em vez de o índice
+    # inteiro ser recopiado a cada bloco (np.insert).
+
+    def __init__(self, hashes: np.ndarray | None = None):
+        self._runs = [np.unique(hashes)] if hashes is not None and len(hashes) else []
+
+    @classmethod
+    def load(cls, path: Path) -> "RowFingerprintIndex":
+        index = cls()
+        hashes = np.load(path)   # já salvo ordenado e sem repetição
+        index._runs = [hashes] if len(hashes) else []
+        return index
+
+    def save(self, path: Path) -> None:
+        # sufixo .npy no temporário: senão o np.save acrescenta um
+        hashes = self.hashes
+        replace_from_tmp(path, lambda tmp: np.save(tmp, hashes), ".tmp.npy")
+
+    @property
+    def hashes(self) -> np.ndarray:
+        # Índice inteiro numa sequência só (funde as pendentes)
+        if len(self._runs) == 1:
+            return self._runs[0]
+        merged = np.empty(0, dtype=np.uint64)
+        for run in self._runs:
+            merged = _merge_sorted(merged, run)
+        self._runs = [merged] if len(merged) else []
+        return merged
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self._runs)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(run.nbytes for run in self._runs)
+
+    def add(self, employee_df: pd.DataFrame) -> np.ndarray:
+        # Retorna a máscara das linhas inéditas (1ª ocorrência) e as registra no índice
+        row_hashes = row_fingerprints(employee_df)
+        keep = np.zeros(len(row_hashes), dtype=bool)
+        uniq, first_idx = np.unique(row_hashes, return_index=True)
+
+        seen = np.zeros(len(uniq), dtype=bool)
+        for run in self._runs:
+            pos = np.minimum(np.searchsorted(run, uniq), len(run) - 1)
+            seen |= run[pos] == uniq
+        keep[first_idx[~seen]] = True
+
+        # uniq já está ordenado: vira uma sequência nova, fundida com as menores
+        run = uniq[~seen]
+        while self._runs and len(self._runs[-1]) <= len(run):
+            run = _merge_sorted(self._runs.pop(), run)
+        if len(run):
+            self._runs.append(run)
+        return keep
+
+
+def _merge_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Junta duas sequências ordenadas e disjuntas em O(len(a) + len(b))
+    merged = np.empty(len(a) + len(b), dtype=np.uint64)
+    pos = np.searchsorted(a, b) + np.arange(len(b))
+    from_a = np.ones(len(merged), dtype=bool)
+    from_a[pos] = False
+    merged[pos] = b
+    merged[from_a] = a
+    return merged
+
+
+def row_fingerprints(employee_df: pd.DataFrame) -> np.ndarray:
+    # Hash por valor (independe do índice e das categorias de cada bloco)
+    return pd.util.hash_pandas_object(employee_df, index=False).to_numpy()
+
+
+def _normalize_chunk_dtypes(chunk: pd.DataFrame, read_only: bool = False) -> pd.DataFrame:
+    # Um bloco com nulos lê colunas inteiras como float; depois do dropna
+    # elas voltam a int64 para que o hash seja igual entre blocos.
+    # Aplicado também ao DataFrame final (leitura inteira, em blocos ou do
+    # cache): o tipo de cada coluna fora do esquema não depende dos blocos
+    changed = False
+    for col in chunk.columns:
+        values = chunk[col]
+        if values.dtype.kind == "f" and np.all(np.mod(values.to_numpy(), 1) == 0):
+            chunk[col] = values.astype("int64")
+            changed = True
+    # só a coluna convertida é nova; as mapeadas seguem sem cópia
+    return read_only_frame(chunk) if read_only and changed else chunk
+
+
+def iter_clean_chunks(csv_path: Path | None = None, chunksize: int = CSV_CHUNKSIZE,
+                      current_year: int | None = None, index: RowFingerprintIndex | None = None,
+                      timings: list | None = None):
+    # Gera blocos já limpos; memória ~ 1 bloco + índice de duplicatas
+    if csv_path is None:
+        csv_path = DEFAULT_SOURCE
+    if current_year is None:
+        current_year = datetime.now().year
+    if index is None:
+        index = RowFingerprintIndex()
+
+    reader = read_csv(csv_path, chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            chunk = _normalize_chunk_dtypes(drop_invalid_rows(chunk, timings))
+            chunk = chunk[index.add(chunk)]
+            if chunk.empty:
+                continue
+            yield derive_columns(chunk.copy(), current_year, timings)
+
+
+def _or_empty(chunks, csv_path: Path, current_year: int):
+    # Os mesmos blocos; se nenhum sobrar, um DataFrame vazio com o esquema tratado
+    empty = True
+    for chunk in chunks:
+        empty = False
+        yield chunk
+    if empty:
+        yield clean_data(read_csv(csv_path, nrows=0), current_year)
+
+
+# ---------------------------------------------------------------------------
+# Cache: chave = tamanho/mtime/sha256 do CSV + versão das regras + parâmetros
+#
+# Arquivos em data/.cache/ (um conjunto por CSV de origem):
+#   <nome>-<tag>.arrow        base tratada
+#   <nome>-<tag>.dNNNN.arrow  extrações incrementais já tratadas (append_extract)
+#   <nome>-<tag>.fp.npy       impressões digitais das linhas mantidas (dedup)
+#   <nome>-<tag>.json         metadados (origem, regras, extrações aplicadas)
+# ---------------------------------------------------------------------------
+@traced("cache.sha256")
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cache_paths(csv_path: Path) -> tuple[Path, Path]:
+    # Um cache por arquivo de origem (o nome leva o hash do caminho absoluto)
+    tag = hashlib.sha1(str(csv_path.resolve()).encode("utf-8")).hexdigest()[:12]
+    stem = f"{csv_path.stem}-{tag}"
+    return CACHE_DIR / f"{stem}.arrow", CACHE_DIR / f"{stem}.json"
+
+
+def _fingerprint_path(csv_path: Path) -> Path:
+    return _cache_paths(csv_path)[0].with_suffix(".fp.npy")
+
+
+def _parquet_paths(csv_path: Path) -> tuple[Path, Path]:
+    data_path = _cache_paths(csv_path)[0].with_suffix(".parquet")
+    return data_path, data_path.with_suffix(".parquet.json")
+
+
+def dataset_version(sha256: str, current_year: int, delta_hashes: list[str] = ()) -> str:
+    # Identifica o conteúdo tratado (CSV + extrações + regras); usado como chave dos caches derivados
+    if delta_hashes:
+        sha256 = hashlib.sha256("".join([sha256, *delta_hashes]).encode("utf-8")).hexdigest()
+    return f"{sha256[:16]}-r{CLEANING_VERSION}-{current_year}"
+
+
+def _meta_version(meta: dict) -> str:
+    return dataset_version(meta["source"]["sha256"], meta["rules"]["current_year"],
+                           [d["sha256"] for d in meta.get("deltas", [])])
+
+
+def _cache_rules(current_year: int) -> dict:
+    # Tudo que, se mudar, muda o resultado da limpeza
+    return {
+        "cleaning_version": CLEANING_VERSION,
+        "current_year": current_year,
+        "sep": CSV_SEP,
+        "decimal": CSV_DECIMAL,
+        "encoding": CSV_ENCODING,
+    }
+
+
+def _load_meta(csv_path: Path, paths: tuple[Path, Path] | None = None) -> dict | None:
+    meta_path = (paths or _cache_paths(csv_path))[1]
+    try:
+        return json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _save_meta(csv_path: Path, meta: dict, paths: tuple[Path, Path] | None = None) -> None:
+    meta_path = (paths or _cache_paths(csv_path))[1]
+    text = json.dumps(meta, indent=2)
+    replace_from_tmp(meta_path, lambda tmp: tmp.write_text(text, encoding="utf-8"))
+
+
+def _read_meta(csv_path: Path, current_year: int,
+               paths: tuple[Path, Path] | None = None) -> dict | None:
+    # Metadados do cache, só se ele ainda vale para o CSV e as regras atuais
+    # (paths: outro par dado/metadados, ex.: o cache Parquet)
+    data_path = (paths or _cache_paths(csv_path))[0]
+    meta = _load_meta(csv_path, paths)
+    if meta is None or not data_path.exists():
+        return None
+    if meta.get("rules") != _cache_rules(current_year):
+        return None
+
+    stat = csv_path.stat()
+    source = meta.get("source", {})
+    if source.get("size") != stat.st_size:
+        return None
+    if source.get("mtime_ns") != stat.st_mtime_ns:
+        # mtime mudou (cópia, touch, checkout): confere o conteúdo pelo hash
+        if source.get("sha256") != _file_sha256(csv_path):
+            return None
+        source["mtime_ns"] = stat.st_mtime_ns
+        try:
+            _save_meta(csv_path, meta, paths)
+        except OSError:
+            pass
+    meta.setdefault("deltas", [])
+    return meta
+
+
+def _read_arrow(path: Path, read_only: bool = False) -> pd.DataFrame:
+    with pa.memory_map(str(path), "r") as source_file:
+        table = pa.ipc.open_file(source_file).read_all()
+    return _zero_copy_frame(table) if read_only else table.to_pandas()
+
+
+def _zero_copy_column(column: "pa.ChunkedArray"):
+    # Inteiros e códigos das categorias viram visões (somente-leitura) do arquivo
+    # mapeado: as páginas ficam no cache do SO e são divididas entre processos
+    if column.num_chunks == 1 and column.null_count == 0:
+        chunk = column.chunk(0)
+        if pa.types.is_dictionary(chunk.type) and pa.types.is_integer(chunk.type.index_type):
+            dtype = pd.CategoricalDtype(chunk.dictionary.to_pylist(), ordered=chunk.type.ordered)
+            return pd.Categorical.from_codes(chunk.indices.to_numpy(zero_copy_only=True), dtype=dtype)
+        if pa.types.is_integer(chunk.type) or pa.types.is_floating(chunk.type):
+            return chunk.to_numpy(zero_copy_only=True)
+    # Demais tipos (bool empacotado em bits, colunas com nulo): cópia somente-leitura
+    return read_only_array(column.to_pandas().array)
+
+
+def _zero_copy_frame(table: "pa.Table") -> pd.DataFrame:
+    index_columns = (table.schema.pandas_metadata or {}).get("index_columns", [])
+    columns = {name: _zero_copy_column(table.column(name))
+               for name in table.column_names if name not in index_columns}
+    if index_columns and isinstance(index_columns[0], str):
+        index = pd.Index(_zero_copy_column(table.column(index_columns[0])), copy=False)
+    elif index_columns:
+        spec = index_columns[0]   # RangeIndex guardado só como metadado
+        index = pd.RangeIndex(spec["start"], spec["stop"], spec["step"])
+    else:
+        index = None
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def _write_arrow(employee_df: pd.DataFrame, path: Path) -> None:
+    table = pa.Table.from_pandas(employee_df, preserve_index=True)
+
+    def write(tmp_path: Path) -> None:
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    # Escreve em arquivo temporário e troca no final (nunca deixa cache pela metade)
+    replace_from_tmp(path, write)
+
+
+def _write_arrow_chunks(chunks, path: Path) -> int:
+    # Grava blocos já limpos um a um (memória ~ 1 bloco) e devolve o total de linhas.
+    # As categorias de cada coluna só crescem (as novas vão para o fim), então
+    # cada bloco acrescenta ao dicionário do anterior (delta), sem substituí-lo
+    categories = {}
+    rows = 0
+
+    def write(tmp_path: Path) -> None:
+        nonlocal rows
+        options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            writer = schema = None
+            try:
+                for chunk in chunks:
+                    for col in chunk.columns:
+                        if isinstance(chunk[col].dtype, pd.CategoricalDtype):
+                            known = categories.get(col, pd.Index([]))
+                            categories[col] = known.union(chunk[col].cat.categories, sort=False)
+                            chunk[col] = chunk[col].cat.set_categories(categories[col])
+                        elif chunk[col].dtype == "int64":
+                            # colunas fora do esquema: um bloco posterior pode trazer
+                            # decimais, então vão como float64 (o esquema do arquivo é o
+                            # do 1º bloco); a leitura volta a int64 se forem inteiras
+                            chunk[col] = chunk[col].astype("float64")
+                    # rótulos como coluna em todos os blocos (RangeIndex seria só metadado)
+                    chunk.index = pd.Index(chunk.index.to_numpy(), name=chunk.index.name)
+                    table = pa.Table.from_pandas(chunk, preserve_index=True)
+                    if writer is None:
+                        schema = table.schema
+                        writer = pa.ipc.new_file(sink, schema, options=options)
+                    writer.write_table(table.cast(schema))
+                    rows += len(chunk)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+    replace_from_tmp(path, write)
+    return rows
+
+
+@traced("cache.leitura")
+def _read_cache(csv_path: Path, current_year: int, read_only: bool = False) -> pd.DataFrame | None:
+    meta = _read_meta(csv_path, current_year)
+    if meta is None:
+        return None
+    try:
+        frames = [_read_arrow(_cache_paths(csv_path)[0], read_only)]
+        frames += [_read_arrow(CACHE_DIR / d["file"], read_only)
+                   for d in meta["deltas"] if d.get("file")]
+    except (OSError, pa.ArrowException):
+        return None
+    if len(frames) > 1:
+        employee_df = concat_frames(frames)
+        if read_only:
+            employee_df = read_only_frame(employee_df)
+    else:
+        employee_df = frames[0]
+    employee_df = _normalize_chunk_dtypes(employee_df, read_only)
+    employee_df.attrs["dataset_version"] = _meta_version(meta)
+    return employee_df
+
+
+@traced("cache.escrita")
+def _write_cache(csv_path: Path, current_year: int, employee_df, sha256: str,
+                 fingerprints: RowFingerprintIndex, raw_rows) -> bool:
+    # employee_df: DataFrame tratado ou blocos já limpos (modo streaming, gravados
+    # um a um); raw_rows: int ou função, quando só se sabe depois de ler os blocos.
+    # Devolve False se não deu para gravar (segue sem cache)
+    data_path = _cache_paths(csv_path)[0]
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        if isinstance(employee_df, pd.DataFrame):
+            _write_arrow(employee_df, data_path)
+            rows = len(employee_df)
+        else:
+            rows = _write_arrow_chunks(employee_df, data_path)
+        stat = csv_path.stat()
+        meta = {
+            "source": {
+                "path": str(csv_path.resolve()),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": sha256,
+            },
+            "rules": _cache_rules(current_year),
+            "rows": int(rows),
+            # próximo rótulo de linha livre (as extrações continuam a numeração)
+            "next_row": raw_rows() if callable(raw_rows) else raw_rows,
+            "deltas": [],
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        fingerprints.save(_fingerprint_path(csv_path))
+        _save_meta(csv_path, meta)
+    except (OSError, pa.ArrowException):
+        # Disco somente-leitura (ex.: Streamlit Cloud) -> segue sem cache
+        return False
+    return True
+
+
+def cached_version(source: Path | str | None = None, reference_year: int | None = None) -> str | None:
+    # Versão do dataset em cache sem carregá-lo (None se não há cache válido)
+    csv_path = Path(source) if source is not None else DEFAULT_SOURCE
+    current_year = reference_year if reference_year is not None else datetime.now().year
+    if pa is None or not csv_path.exists():
+        return None
+    meta = _read_meta(csv_path, current_year)
+    return _meta_version(meta) if meta else None
+
+
+def appended_rows(employee_df: pd.DataFrame, version: str | None,
+                  source: Path | str | None = None,
+                  reference_year: int | None = None) -> pd.DataFrame | None:
+    # Linhas de employee_df que chegaram por extrações incrementais depois da
+    # versão `version` (as anteriores são as mesmas, na mesma ordem). None se a
+    # base, as regras ou o próprio cache mudaram: aí só montando tudo de novo
+    csv_path = Path(source) if source is not None else DEFAULT_SOURCE
+    current_year = reference_year if reference_year is not None else datetime.now().year
+    meta = _read_meta(csv_path, current_year) if pa is not None and csv_path.exists() else None
+    if meta is None or employee_df.attrs.get("dataset_version") != _meta_version(meta):
+        return None
+    deltas = meta["deltas"]
+    for applied in range(len(deltas), -1, -1):
+        if dataset_version(meta["source"]["sha256"], current_year,
+                           [d["sha256"] for d in deltas[:applied]]) == version:
+            new_rows = sum(d["rows_out"] for d in deltas[applied:])
+            return employee_df.iloc[len(employee_df) - new_rows:]
+    return None
+
+
+@traced("load_data")
+def load_data(source: Path | str | None = None, reference_year: int | None = None,
+              force_refresh: bool = False, use_cache: bool = True,
+              chunksize: int | None = None, timings: list | None = None,
+              read_only: bool = False) -> pd.DataFrame:
+    # source: CSV de origem (padrão: <pasta_do_projeto>/data/Employee.csv)
+    # reference_year: ano usado no tempo de casa (padrão: ano atual)
+    # timings: se for uma lista, recebe o tempo de cada etapa da limpeza
+    # read_only: colunas somente-leitura, mapeadas do cache Arrow sem cópia
+    #            (para compartilhar um único DataFrame entre sessões)
+    csv_path = Path(source) if source is not None else DEFAULT_SOURCE
     if not csv_path.exists():
         raise FileNotFoundError(f"Arquivo não encontrado: {csv_path}")
 
-    # Leitura do CSV
-    employee_df = pd.read_csv(csv_path, sep=CSV_SEP, decimal=CSV_DECIMAL, encoding=CSV_ENCODING)
+    # Tempo de casa é calculado em relação ao ano de referência
+    current_year = reference_year if reference_year is not None else datetime.now().year
 
-    # ----- (debug opcional) -----
-    # print(employee_df.head())
+    use_cache = use_cache and pa is not None
+    if use_cache and not force_refresh:
+        cached = _read_cache(csv_path, current_year, read_only)
+        if cached is not None:
+            return cached
 
-    # Deixando strings vazias como valores nulos
-    employee_df.replace('', np.nan, inplace=True)
+    # Arquivos grandes vão automaticamente para o modo streaming
+    if chunksize is None and csv_path.stat().st_size >= STREAMING_MIN_BYTES:
+        chunksize = CSV_CHUNKSIZE
 
-    # (debug opcional)
-    # print("Valores nulos antes da limpeza:")
-    # print(employee_df.isnull().sum())
+    # Extrações incrementais já aplicadas antes entram de novo na base refeita:
+    # do próprio cache, se a base e as regras (fora o ano) não mudaram; senão
+    # tratadas de novo a partir dos arquivos de origem (conferidos antes de gravar)
+    sha256 = _file_sha256(csv_path)
+    previous = _load_meta(csv_path) if use_cache else None
+    previous_deltas = previous.get("deltas", []) if previous else []
+    previous_fingerprints = None
+    if previous_deltas and _deltas_reusable(csv_path, previous, sha256):
+        previous_fingerprints = RowFingerprintIndex.load(_fingerprint_path(csv_path))
+    else:
+        for delta in previous_deltas:
+            if not Path(delta["path"]).exists():
+                raise FileNotFoundError(
+                    f"Extração incremental aplicada ao cache não encontrada: {delta['path']}. "
+                    f"A base ou as regras de limpeza mudaram e ela precisa ser tratada de novo; "
+                    f"restaure o arquivo ou apague {_cache_paths(csv_path)[1]} para voltar só à base.")
+    fingerprints = RowFingerprintIndex()
+    cache_written = mapped = False
+    if chunksize:
+        # Leitura em blocos direto para o cache Arrow (memória ~ 1 bloco + índice);
+        # a base inteira volta mapeada do arquivo
+        step_timings = []
+        raw_rows = lambda: sum(t["rows_in"] for t in step_timings if t["step"] == "nulos")
+        if use_cache:
+            chunks = _or_empty(iter_clean_chunks(csv_path, chunksize, current_year,
+                                                 fingerprints, step_timings), csv_path, current_year)
+            cache_written = _write_cache(csv_path, current_year, chunks, sha256,
+                                         fingerprints, raw_rows)
+        if cache_written:
+            employee_df = _read_arrow(_cache_paths(csv_path)[0], read_only)
+            mapped = True
+        else:
+            # Sem cache (desligado ou disco somente-leitura): junta os blocos na memória
+            fingerprints, step_timings[:] = RowFingerprintIndex(), []
+            chunks = list(_or_empty(iter_clean_chunks(csv_path, chunksize, current_year,
+                                                      fingerprints, step_timings),
+                                    csv_path, current_year))
+            employee_df = concat_frames(chunks)
+            del chunks
+        raw_rows = raw_rows()
+        if timings is not None:
+            timings.extend(step_timings)
+    else:
+        # Leitura do CSV
+        with span("read_csv") as s:
+            employee_df = read_csv(csv_path)
+            s.rows_out = len(employee_df)
+        raw_rows = len(employee_df)
+        if use_cache:
+            # impressões digitais das linhas válidas (base do modo incremental)
+            fingerprints.add(_normalize_chunk_dtypes(drop_invalid_rows(employee_df)))
+        employee_df = clean_data(employee_df, current_year, timings)
 
-    # Removendo linhas com quaisquer valores nulos
-    employee_df.dropna(inplace=True)
+    # mesmo tipo por coluna nos dois caminhos (blocos decidem cada um o seu)
+    employee_df = _normalize_chunk_dtypes(employee_df, read_only and mapped)
+    employee_df.attrs["dataset_version"] = dataset_version(sha256, current_year)
+    if use_cache:
+        if not cache_written:
+            cache_written = _write_cache(csv_path, current_year, employee_df, sha256,
+                                         fingerprints, raw_rows)
+        frames = [employee_df]
+        if previous_fingerprints is not None and cache_written:
+            frames += _restore_deltas(csv_path, current_year, previous, previous_fingerprints)
+        else:
+            for delta in previous_deltas:
+                frames.append(append_extract(delta["path"], csv_path, current_year)[0])
+        if len(frames) > 1:
+            employee_df = _normalize_chunk_dtypes(concat_frames(frames))
+            employee_df.attrs["dataset_version"] = cached_version(csv_path, current_year)
+        _write_samples(csv_path, current_year, employee_df)
 
-    # (debug opcional)
-    # print("\nValores nulos depois da limpeza:")
-    # print(employee_df.isnull().sum())
+    if read_only:
+        if mapped and len(frames) == 1:
+            return employee_df   # já veio mapeado do cache
+        # Relê do cache recém-gravado (mapeado); sem cache, cópia somente-leitura
+        cached = _read_cache(csv_path, current_year, read_only=True) if use_cache else None
+        return cached if cached is not None else read_only_frame(employee_df)
+    return employee_df
 
-    # Removendo duplicidades
-    # print("\nDuplicadas antes:", employee_df.duplicated().sum())
-    employee_df.drop_duplicates(inplace=True)
-    # print("Duplicadas depois:", employee_df.duplicated().sum())
 
-    # Redefinindo a coluna Education (mesma regra que você usou)
-    education_map = {'Bachelors': 1, 'Masters': 2, 'PHD': 3}
-    # .replace preserva valores não mapeados (se existirem)
-    employee_df['Education'] = employee_df['Education'].replace(education_map)
-    # Garante numérico (qualquer coisa fora do mapeado vira NaN, mas já tiramos NaN antes)
-    employee_df['Education'] = pd.to_numeric(employee_df['Education'], errors='coerce')
+def _deltas_reusable(csv_path: Path, previous: dict, sha256: str) -> bool:
+    # As extrações já tratadas (.dNNNN.arrow) e as impressões digitais valem para
+    # a base refeita se o CSV base e as regras são os mesmos (só o ano pode mudar)
+    rules = dict(previous.get("rules", {}), current_year=None)
+    return (previous.get("source", {}).get("sha256") == sha256
+            and rules == dict(_cache_rules(0), current_year=None)
+            and _fingerprint_path(csv_path).exists()
+            and all((CACHE_DIR / d["file"]).exists() for d in previous["deltas"] if d.get("file")))
 
-    # Criando coluna Female a partir de Gender
-    employee_df['Female'] = employee_df['Gender'].apply(lambda x: 1 if x == 'Female' else 0)
 
-    # Tempo de casa: ano atual - JoiningYear
-    current_year = datetime.now().year
-    # Garante que JoiningYear é numérico
-    employee_df['JoiningYear'] = pd.to_numeric(employee_df['JoiningYear'], errors='coerce')
-    employee_df['years_of_service'] = current_year - employee_df['JoiningYear']
+def _restore_deltas(csv_path: Path, current_year: int, previous: dict,
+                    fingerprints: RowFingerprintIndex) -> list[pd.DataFrame]:
+    # Devolve as extrações gravadas ao cache recém-refeito (sem precisar dos CSVs
+    # de origem); com ano novo, só o tempo de casa é recalculado
+    meta = _read_meta(csv_path, current_year)
+    if meta is None:
+        return []
+    frames = []
+    for delta in previous["deltas"]:
+        if not delta.get("file"):
+            continue
+        path = CACHE_DIR / delta["file"]
+        frame = _read_arrow(path)
+        if previous["rules"]["current_year"] != current_year:
+            frame = frame.assign(**years_of_service(frame, {"current_year": current_year}))
+            _write_arrow(frame, path)
+        frames.append(frame)
+    meta["deltas"] = previous["deltas"]
+    meta["rows"] += sum(len(frame) for frame in frames)
+    meta["next_row"] = previous["next_row"]
+    fingerprints.save(_fingerprint_path(csv_path))
+    _save_meta(csv_path, meta)
+    return frames
 
-    # (debug opcional)
-    # print(employee_df.head())
 
-    return employee_df
+# ---------------------------------------------------------------------------
+# Cache Parquet: base tratada inteira em disco, sem passar pela memória
+# (gravada bloco a bloco), para consultas SQL diretas (motor_sql.py)
+# ---------------------------------------------------------------------------
+def _parquet_table(employee_df: pd.DataFrame) -> "pa.Table":
+    # category -> texto simples (o Parquet já codifica em dicionário por coluna)
+    table = pa.Table.from_pandas(employee_df, preserve_index=False)
+    schema = pa.schema([
+        field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+        for field in table.schema
+    ])
+    return table.cast(schema.remove_metadata())
+
+
+def parquet_version(source: Path | str | None = None, reference_year: int | None = None) -> str | None:
+    # Versão do cache Parquet sem abri-lo (None se não há cache válido)
+    csv_path = Path(source) if source is not None else DEFAULT_SOURCE
+    current_year = reference_year if reference_year is not None else datetime.now().year
+    if pq is None or not csv_path.exists():
+        return None
+    meta = _read_meta(csv_path, current_year, _parquet_paths(csv_path))
+    return _meta_version(meta) if meta else None
+
+
+def parquet_cache(source: Path | str | None = None, reference_year: int | None = None,
+                  force_refresh: bool = False,
+                  chunksize: int = CSV_CHUNKSIZE) -> tuple[Path, str]:
+    # Caminho do Parquet tratado e sua versão; refaz só se o CSV/regras mudaram.
+    # Pico de memória ~ 1 bloco + índice de duplicatas (8 bytes por linha)
+    if pq is None:
+        raise RuntimeError("O cache Parquet precisa do pyarrow.")
+    csv_path = Path(source) if source is not None else DEFAULT_SOURCE
+    if not csv_path.exists():
+        raise FileNotFoundError(f"Arquivo não encontrado: {csv_path}")
+    current_year = reference_year if reference_year is not None else datetime.now().year
+    paths = _parquet_paths(csv_path)
+
+    meta = None if force_refresh else _read_meta(csv_path, current_year, paths)
+    if meta is not None:
+        return paths[0], _meta_version(meta)
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    rows = 0
+
+    def write(tmp_path: Path) -> None:
+        nonlocal rows
+        writer = None
+        try:
+            for chunk in iter_clean_chunks(csv_path, chunksize, current_year):
+                table = _parquet_table(chunk)
+                if writer is None:
+                    writer = pq.ParquetWriter(str(tmp_path), table.schema)
+                writer.write_table(table.cast(writer.schema))
+                rows += len(chunk)
+            if writer is None:
+                # CSV sem linhas válidas: Parquet vazio com o esquema tratado
+                empty = clean_data(read_csv(csv_path, nrows=0), current_year)
+                pq.write_table(_parquet_table(empty), str(tmp_path))
+        finally:
+            if writer is not None:
+                writer.close()
+
+    replace_from_tmp(paths[0], write)
+
+    stat = csv_path.stat()
+    meta = {
+        "source": {
+            "path": str(csv_path.resolve()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": _file_sha256(csv_path),
+        },
+        "rules": _cache_rules(current_year),
+        "rows": rows,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    _save_meta(csv_path, meta, paths)
+    return paths[0], _meta_version(meta)
+
+
+# ---------------------------------------------------------------------------
+# Modo incremental: extrações mensais (só as linhas novas são processadas)
+# ---------------------------------------------------------------------------
+def append_extract(delta_path: Path | str, source: Path | str | None = None,
+                   reference_year: int | None = None,
+                   chunksize: int = CSV_CHUNKSIZE) -> tuple[pd.DataFrame, dict]:
+    # Limpa só a extração nova, remove as linhas que já existem no histórico
+    # (pelas impressões digitais) e grava o resultado como mais um pedaço do cache.
+    # Devolve (linhas novas já tratadas, resumo). Custo proporcional à extração.
+    if pa is None:
+        raise RuntimeError("O modo incremental precisa do pyarrow (cache colunar).")
+    delta_path = Path(delta_path)
+    if not delta_path.exists():
+        raise FileNotFoundError(f"Arquivo não encontrado: {delta_path}")
+    csv_path = Path(source) if source is not None else DEFAULT_SOURCE
+    current_year = reference_year if reference_year is not None else datetime.now().year
+
+    meta = _read_meta(csv_path, current_year)
+    if meta is None:
+        # Sem cache válido: monta a base completa primeiro
+        load_data(csv_path, current_year, force_refresh=True)
+        meta = _read_meta(csv_path, current_year)
+        if meta is None:
+            raise RuntimeError(f"Não foi possível gravar o cache em {CACHE_DIR}")
+
+    delta_sha = _file_sha256(delta_path)
+    summary = {"delta": str(delta_path), "sha256": delta_sha, "rows_in": 0, "rows_out": 0}
+    empty = clean_data(read_csv(delta_path, nrows=0), current_year)
+    if any(d["sha256"] == delta_sha for d in meta["deltas"]):
+        summary["skipped"] = "extração já aplicada"
+        return empty, summary
+
+    fingerprints = RowFingerprintIndex.load(_fingerprint_path(csv_path))
+    timings = []
+    chunks = list(iter_clean_chunks(delta_path, chunksize, current_year, fingerprints, timings))
+    new_rows = concat_frames(chunks) if chunks else empty
+    rows_in = sum(t["rows_in"] for t in timings if t["step"] == "nulos")
+
+    # Rótulos de linha continuam depois do histórico
+    new_rows.index = new_rows.index + meta["next_row"]
+    delta_file = None
+    if len(new_rows):
+        delta_file = f"{_cache_paths(csv_path)[0].stem}.d{len(meta['deltas']) + 1:04d}.arrow"
+        _write_arrow(new_rows, CACHE_DIR / delta_file)
+    fingerprints.save(_fingerprint_path(csv_path))
+
+    meta["deltas"].append({
+        "path": str(delta_path.resolve()),
+        "sha256": delta_sha,
+        "file": delta_file,
+        "rows_in": rows_in,
+        "rows_out": len(new_rows),
+        "applied_at": datetime.now().isoformat(timespec="seconds"),
+    })
+    meta["rows"] += len(new_rows)
+    meta["next_row"] += rows_in
+    if len(new_rows):
+        _extend_samples(csv_path, meta, new_rows)
+    _save_meta(csv_path, meta)
+
+    new_rows.attrs["dataset_version"] = _meta_version(meta)
+    summary.update(rows_in=rows_in, rows_out=len(new_rows), dataset_version=_meta_version(meta))
+    return new_rows, summary
+
+
+# ---------------------------------------------------------------------------
+# Amostras estratificadas do modo aproximado (amostragem.py): gravadas junto
+# com o cache, estendidas a cada extração incremental
+# ---------------------------------------------------------------------------
+def _sample_path(csv_path: Path, size: int) -> Path:
+    return CACHE_DIR / f"{_cache_paths(csv_path)[0].stem}.s{size}.arrow"
+
+
+def _strata_records(strata: pd.DataFrame) -> list[dict]:
+    return strata.astype({c: "object" for c in strata.columns
+                          if isinstance(strata[c].dtype, pd.CategoricalDtype)}).to_dict(orient="records")
+
+
+def _store_sample(csv_path: Path, meta: dict, size: int,
+                  sample: pd.DataFrame, strata: pd.DataFrame) -> None:
+    path = _sample_path(csv_path, size)
+    _write_arrow(sample, path)
+    meta.setdefault("samples", {})[str(size)] = {
+        "file": path.name, "rows": len(sample), "strata": _strata_records(strata),
+    }
+
+
+@traced("cache.amostras")
+def _write_samples(csv_path: Path, current_year: int, employee_df: pd.DataFrame) -> None:
+    # Um arquivo por nível de precisão (só em bases grandes o bastante)
+    from amostragem import SAMPLE_SIZES, approx_available, stratified_sample
+    meta = _read_meta(csv_path, current_year)
+    if meta is None or not approx_available(len(employee_df)):
+        return
+    try:
+        for size in SAMPLE_SIZES:
+            if size < len(employee_df):
+                _store_sample(csv_path, meta, size, *stratified_sample(employee_df, size))
+        _save_meta(csv_path, meta)
+    except (OSError, pa.ArrowException):
+        pass
+
+
+def _extend_samples(csv_path: Path, meta: dict, new_rows: pd.DataFrame) -> None:
+    # Linhas novas de uma extração entram nas amostras na mesma proporção
+    from amostragem import extend_sample
+    for size, entry in meta.get("samples", {}).items():
+        path = CACHE_DIR / entry["file"]
+        if not path.exists():
+            continue
+        extra, strata = extend_sample(pd.DataFrame(entry["strata"]), new_rows, int(size))
+        sample = concat_frames([_read_arrow(path), extra]) if len(extra) else _read_arrow(path)
+        _store_sample(csv_path, meta, int(size), sample, strata)
+
+
+def load_sample(source: Path | str | None = None, reference_year: int | None = None,
+                size: int | None = None, employee_df: pd.DataFrame | None = None) -> "SampledSource":
+    # Amostra estratificada (~size linhas; padrão: SAMPLE_SIZES[0]) pronta para
+    # consultas aproximadas. Lida do cache; montada (e gravada) se faltar ou se
+    # já cresceu demais com as extrações incrementais
+    from amostragem import SAMPLE_SIZES, SampledSource, stratified_sample
+    if size is None:
+        size = SAMPLE_SIZES[0]
+    csv_path = Path(source) if source is not None else DEFAULT_SOURCE
+    current_year = reference_year if reference_year is not None else datetime.now().year
+    meta = _read_meta(csv_path, current_year) if pa is not None else None
+    entry = (meta or {}).get("samples", {}).get(str(size))
+    if entry is not None and entry["rows"] <= 2 * size and (CACHE_DIR / entry["file"]).exists():
+        sample = _read_arrow(CACHE_DIR / entry["file"], read_only=True)
+        return SampledSource(sample, pd.DataFrame(entry["strata"]), f"{_meta_version(meta)}-s{size}", size)
+
+    if employee_df is None:
+        employee_df = load_data(csv_path, current_year, read_only=True)
+        meta = _read_meta(csv_path, current_year) if pa is not None else None
+    sample, strata = stratified_sample(employee_df, size)
+    if meta is not None:
+        try:
+            _store_sample(csv_path, meta, size, sample, strata)
+            _save_meta(csv_path, meta)
+        except (OSError, pa.ArrowException):
+            pass
+    version = employee_df.attrs.get("dataset_version")
+    return SampledSource(sample, strata, f"{version}-s{size}" if version else None, size)
+
+
+# ---------------------------------------------------------------------------
+# Curvas de retenção por coorte (coortes.py): tabela de todos os segmentos,
+# gravada junto com o cache e refeita quando a versão do dataset muda
+# ---------------------------------------------------------------------------
+def _cohort_path(csv_path: Path) -> Path:
+    return CACHE_DIR / f"{_cache_paths(csv_path)[0].stem}.coortes.arrow"
+
+
+def load_cohorts(source: Path | str | None = None, reference_year: int | None = None,
+                 employee_df: pd.DataFrame | None = None) -> pd.DataFrame:
+    # Lida do cache quando é da versão atual; senão calculada (uma passada)
+    # sobre employee_df (ou a base carregada) e gravada
+    from coortes import cohort_tables
+    csv_path = Path(source) if source is not None else DEFAULT_SOURCE
+    current_year = reference_year if reference_year is not None else datetime.now().year
+    meta = _read_meta(csv_path, current_year) if pa is not None and csv_path.exists() else None
+    version = _meta_version(meta) if meta else None
+    entry = (meta or {}).get("cohorts")
+    path = _cohort_path(csv_path)
+    if entry is not None and entry["version"] == version and path.exists():
+        return _read_arrow(path)
+
+    if employee_df is None:
+        employee_df = load_data(csv_path, current_year, read_only=True)
+    table = cohort_tables(employee_df)
+    # só grava se a base usada é a mesma versão do cache (sem corrida com extrações)
+    if meta is not None and employee_df.attrs.get("dataset_version") == version:
+        try:
+            _write_arrow(table, path)
+            meta["cohorts"] = {"file": path.name, "version": version, "rows": len(table)}
+            _save_meta(csv_path, meta)
+        except (OSError, pa.ArrowException):
+            pass
+    return table
+
+
+# ---------------------------------------------------------------------------
+# Processamento em lote (usado pelo app.py)
+# ---------------------------------------------------------------------------
+def clean_file(source: Path | str, output_dir: Path | str,
+               reference_year: int | None = None, output_format: str = "parquet") -> dict:
+    # Limpa um CSV e grava o resultado em output_dir; devolve um resumo
+    # (roda em processo separado, então não devolve o DataFrame)
+    source = Path(source)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    start = datetime.now()
+    timings = []
+    employee_df = load_data(source, reference_year, use_cache=False, timings=timings)
+
+    if output_format == "parquet" and pa is None:
+        output_format = "csv"
+    output_path = output_dir / f"{source.stem}_tratado.{output_format}"
+    if output_format == "parquet":
+        employee_df.to_parquet(output_path)
+    else:
+        employee_df.to_csv(output_path, index=False)
+
+    return {
+        "source": str(source),
+        "output": str(output_path),
+        "rows_in": sum(t["rows_in"] for t in timings if t["step"] == "nulos"),
+        "rows_out": len(employee_df),
+        "seconds": round((datetime.now() - start).total_seconds(), 3),
+    }
+
+
+def _verify_streaming(source: Path | str | None = None, chunksize: int = 500) -> None:
+    # Leitura em blocos == leitura inteira (tipos inclusive), sem e com cache.
+    # Usa uma cópia do CSV com uma coluna numérica extra, nula só no 1º bloco
+    # (cada bloco decidia o próprio tipo); o cache vai para uma pasta
+    # temporária, sem tocar no data/.cache
+    global CACHE_DIR
+    import tempfile
+    csv_path = Path(source) if source is not None else DEFAULT_SOURCE
+    employee_df = read_csv(csv_path)
+    employee_df["Extra"] = np.arange(len(employee_df), dtype="float64")
+    employee_df.loc[employee_df.index[:1], "Extra"] = np.nan
+    cache_dir = CACHE_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_path = Path(tmp) / csv_path.name
+        employee_df.to_csv(copy_path, sep=CSV_SEP, decimal=CSV_DECIMAL,
+                           encoding=CSV_ENCODING, index=False)
+        CACHE_DIR = Path(tmp) / ".cache"
+        try:
+            expected = load_data(copy_path, use_cache=False)
+            for use_cache in (False, True):
+                streamed = load_data(copy_path, use_cache=use_cache, force_refresh=True,
+                                     chunksize=chunksize)
+                pd.testing.assert_frame_equal(streamed, expected, check_index_type=False)
+            # e a leitura seguinte, do cache gravado em blocos
+            pd.testing.assert_frame_equal(load_data(copy_path), expected, check_index_type=False)
+        finally:
+            CACHE_DIR = cache_dir
 
 
 # Validação rápida no terminal:
+#   python dados_tratados.py            -> usa o cache se estiver válido
+#   python dados_tratados.py --refresh  -> força a reconstrução do cache
+#   python dados_tratados.py --stream   -> lê o CSV em blocos de CSV_CHUNKSIZE linhas
+#   python dados_tratados.py --memoria  -> relatório de bytes antes/depois do esquema compacto
+#   python dados_tratados.py --etapas   -> tempo de cada etapa da limpeza (sem usar o cache)
+#   python dados_tratados.py --append novo.csv -> incorpora uma extração mensal ao cache
+#   python dados_tratados.py --verificar -> confere leitura em blocos == leitura inteira
 if __name__ == "__main__":
     try:
-        _df = load_data()
+        if "--verificar" in sys.argv:
+            _verify_streaming()
+            print("✅ load_data() em blocos == leitura inteira (sem e com cache)")
+            sys.exit(0)
+        if "--append" in sys.argv:
+            _new_rows, _summary = append_extract(sys.argv[sys.argv.index("--append") + 1])
+            print("✅ append_extract() OK")
+            print(json.dumps(_summary, indent=2))
+            sys.exit(0)
+        _timings = []
+        _df = load_data(force_refresh="--refresh" in sys.argv or "--etapas" in sys.argv,
+                        chunksize=CSV_CHUNKSIZE if "--stream" in sys.argv else None,
+                        timings=_timings)
         print("✅ load_data() OK")
         print("Shape:", _df.shape)
         print(_df.head(5))
+        if "--memoria" in sys.argv:
+            print(memory_report(_df))
+        if "--etapas" in sys.argv:
+            print(pd.DataFrame(_timings).to_string(index=False))
     except Exception as e:
         print("❌ Erro em load_data():", e)
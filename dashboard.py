@@ -1,12 +1,13 @@
 # dashboard.py 
 
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
 from pathlib import Path
 
-from dados_tratados import load_data
+from imagens import LOGO_WIDTHS, pick_variant, variants_stamp
+from rastreio import (
+    TRACE_ALWAYS, current_trace, finish_trace, recent_traces, span, start_trace,
+    to_chrome_trace, to_json, traced,
+)
 
 # 1) Config da página
 st.set_page_config(
@@ -15,38 +16,159 @@ st.set_page_config(
     layout="wide",
 )
 
+# Rastreamento por etapas: painel oculto com ?debug=1 na URL
+# (ou sempre ligado com DASHBOARD_TRACE=1); desligado, não custa nada
+debug_panel = st.query_params.get("debug") == "1"
+if debug_panel or TRACE_ALWAYS:
+    start_trace("rerun")
+else:
+    finish_trace()   # a thread da sessão é reaproveitada entre reruns
+
 # 2) Logo centralizada
+# Variante redimensionada/recomprimida (imagens.py), gerada no aquecimento
+# e reaproveitada por todas as sessões; muda sozinha se o logo.png ou as
+# variantes mudarem. Sem variantes ainda, usa o logo original (não gera aqui)
+@st.cache_resource(max_entries=1)
+def get_logo(mtime, variants):
+    return pick_variant(max(LOGO_WIDTHS))
+
 logo_path = Path(__file__).parent / "logo.png"
 c1, c2, c3 = st.columns([1, 1, 1])
 with c2:
     if logo_path.exists():
-        st.image(str(logo_path), use_container_width=True)
+        st.image(str(get_logo(logo_path.stat().st_mtime_ns, variants_stamp())), use_container_width=True)
 st.markdown("---")
 
-# 3) Carregar dados tratados
-@st.cache_data
-def get_df():
-    return load_data()
+# Módulos de dados (pandas, numpy, pyarrow, plotly por baixo): importados só
+# depois do cabeçalho, que já chega ao navegador enquanto eles carregam.
+# Continuam no caminho da 1ª sessão porque a base (cache Arrow) e os insights
+# precisam deles antes do primeiro gráfico; com `partida.py --servir` o
+# processo já sobe com eles importados
+import pandas as pd
 
-with st.spinner("Carregando dados..."):
-    employee_df = get_df()
+from dados_tratados import load_sample, parquet_version
+from motor_sql import SqlSource, use_sql_backend
+from amostragem import (
+    SAMPLE_SIZES, approx_available, insight1_intervals, insight2_intervals, insight3_intervals,
+)
+from exportacao_estatica import StaticSource, static_version, use_static
+from coortes import ALL_LABEL, COHORT_SEGMENTS, segment_curves
+from partida import dashboard_dataset
+from cache_insights import InsightCache
+from figuras import (
+    cached_figure, insight1_figure, insight2_figure, insight3_figure, insight4_figure,
+)
+from insights import (
+    BASE_FILTERS, EDU_LABELS, experience_column, total_rows,
+    insight1_percent, insight2_rates, insight3_counts,
+)
+
+# 3) Carregar dados tratados
+# Um único DataFrame (somente-leitura, mapeado do cache Arrow) para todas as
+# sessões do processo. Quando o CSV ou uma extração incremental (append_extract)
+# muda, uma thread em segundo plano monta a versão nova (dados + fonte) e troca
+# no fim; nenhuma sessão espera a recarga. A fonte dos insights (cubo de
+# agregação ou motor de filtros por bitmap) e as curvas por coorte (lidas do
+# cache quando já calculadas para a versão) são montadas junto com cada versão.
+# É a instância do processo: com `partida.py --servir` já chega montada
+@st.cache_resource
+def get_dataset():
+    return dashboard_dataset()
+
+# Bases grandes: filtros e agregações viram consultas SQL (DuckDB) sobre o
+# Parquet tratado; o DataFrame inteiro nunca é carregado
+@st.cache_resource(max_entries=1)
+def get_sql_source(version):
+    return SqlSource.from_csv()
+
+# Tabelas dos insights já calculadas, por seleção (LRU compartilhado no processo)
+@st.cache_resource
+def get_insight_cache():
+    return InsightCache()
+
+# Modo estático (exportacao_estatica.py): todas as combinações de filtros já
+# calculadas; as interações só consultam tabelas prontas, sem o CSV
+@st.cache_resource(max_entries=1)
+def get_static_source(version):
+    source = StaticSource.load()
+    source.preload(get_insight_cache())
+    return source
+
+# Aquecimento (partida.py): as tabelas de todas as combinações de filtros,
+# quando são da versão atual do dataset, entram fixas no cache dos insights
+@st.cache_resource(max_entries=1)
+def preload_insights(version):
+    StaticSource.load().preload(get_insight_cache())
+
+# Modo aproximado (amostragem.py): em bases grandes, os insights saem de uma
+# amostra estratificada de tamanho fixo (mantida pelo load_data), com barras
+# de erro; o usuário refina até a resposta exata quando precisar
+@st.cache_resource(max_entries=len(SAMPLE_SIZES))
+def get_sample_source(size, version, _frame):
+    return load_sample(size=size, employee_df=_frame)
+
+PRECISION_LABELS = {
+    f"Rápida (~{SAMPLE_SIZES[0] // 1000} mil linhas)": SAMPLE_SIZES[0],
+    f"Refinada (~{SAMPLE_SIZES[1] // 1000} mil linhas)": SAMPLE_SIZES[1],
+    "Exata": None,
+}
+
+static_mode = use_static()
+sql_backend = not static_mode and use_sql_backend()
+with st.spinner("Carregando dados..."), span("dados"):
+    if static_mode:
+        source = get_static_source(static_version())
+        columns = frozenset(source.columns)
+    elif sql_backend:
+        source = get_sql_source(parquet_version())
+        columns = frozenset(source.columns)
+    else:
+        # versão fixa durante todo o rerun (e nos fragmentos, até o próximo)
+        snapshot = get_dataset().snapshot()
+        columns = frozenset(snapshot.frame.columns)
+        if snapshot.version is not None and static_version() == snapshot.version:
+            preload_insights(snapshot.version)
 
 # 4) Validação de colunas
 required = {"Gender", "PaymentTier"}
-missing = required - set(employee_df.columns)
+missing = required - columns
 if missing:
     st.error(f"Colunas faltando: {sorted(missing)}")
     st.stop()
 
-# 5) Padronizar Gender e manter Female/Male
-employee_df = employee_df.copy()
-employee_df["Gender"] = employee_df["Gender"].astype(str).str.strip().str.title()
-employee_df = employee_df[employee_df["Gender"].isin(["Female", "Male"])]
+# coluna de experiência (ExpGrupo como padrao)
+exp_col = experience_column(columns)
+if not (sql_backend or static_mode):
+    if approx_available(len(snapshot.frame)):
+        precision = st.segmented_control(
+            "Precisão",
+            options=list(PRECISION_LABELS),
+            default=next(iter(PRECISION_LABELS)),
+            help="Rápida/Refinada: estimativas a partir de uma amostra estratificada, "
+                 "com intervalos de confiança de 95%. Exata: toda a base.",
+        )
+        sample_size = PRECISION_LABELS.get(precision)
+    else:
+        sample_size = None
+    with span("fonte"):
+        if sample_size is not None:
+            source = get_sample_source(sample_size, snapshot.version, snapshot.frame)
+        else:
+            source = snapshot.derived("fonte")
+approximate = getattr(source, "approximate", False)
+if approximate:
+    st.caption(
+        f"Modo aproximado: amostra estratificada de **{len(source):,}** de "
+        f"**{source.total_rows:,}** linhas. Barras de erro = IC de 95%."
+    )
+insight_cache = get_insight_cache()
+
+# 5) Manter Female/Male (Gender já vem padronizado como category do load_data)
+filters = dict(BASE_FILTERS)
 
 # 6) Filtro por ano de ingresso (JoiningYear) — segmented control
-if "JoiningYear" in employee_df.columns:
-    employee_df["JoiningYear"] = pd.to_numeric(employee_df["JoiningYear"], errors="coerce").astype("Int64")
-    year_opts = sorted([int(y) for y in employee_df["JoiningYear"].dropna().unique().tolist()])
+if "JoiningYear" in columns:
+    year_opts = [int(y) for y in source.values("JoiningYear", filters)]
     year_labels = ["Todos"] + [str(y) for y in year_opts]
 
     selected_year = st.segmented_control(
@@ -56,83 +178,51 @@ if "JoiningYear" in employee_df.columns:
     )
 
     if selected_year != "Todos":
-        employee_df = employee_df[employee_df["JoiningYear"] == int(selected_year)]
+        filters["JoiningYear"] = int(selected_year)
 
-    if employee_df.empty:
+    if total_rows(source, filters) == 0:
         st.warning("Não há dados para o ano selecionado.")
         st.stop()
 else:
     st.info("Coluna **JoiningYear** não encontrada; filtro por ano indisponível.")
 
-# 7) Tabela de percentuais PaymentTier × Gender
-counts = employee_df.groupby(["PaymentTier", "Gender"]).size().unstack(fill_value=0)
-row_sums = counts.sum(axis=1).replace(0, np.nan)
-percent = counts.div(row_sums, axis=0).mul(100)
-
-for g in ["Female", "Male"]:
-    if g not in percent.columns:
-        percent[g] = 0.0
-
-percent = percent[["Female", "Male"]].fillna(0).round(1)
-percent["Diferença (%)"] = (
-    percent[["Female", "Male"]].max(axis=1) -
-    percent[["Female", "Male"]].min(axis=1)
-).round(1)
-
-st.subheader("Insight 1 — Distribuição percentual por Nível de Pagamento e Gênero")
-st.caption("Percentuais por PaymentTier × Gênero com filtro por ano de ingresso.")
-st.dataframe(percent.reset_index().rename(columns={"PaymentTier": "Nível de Pagamento"}), use_container_width=True)
-
-# 8) Gráfico 100% empilhado (Plotly)
-order = sorted(percent.index.tolist())
-plot_df = (
-    percent[["Female", "Male"]]
-      .reset_index()
-      .melt(id_vars="PaymentTier", var_name="Gender", value_name="Percent")
-)
-plot_df["PaymentTier"] = pd.Categorical(plot_df["PaymentTier"], categories=order, ordered=True)
-
-fig = px.bar(
-    plot_df,
-    x="PaymentTier",
-    y="Percent",
-    color="Gender",
-    text="Percent",  
-    title="Distribuição Percentual por Nível de Pagamento e Gênero",
-    labels={"PaymentTier": "Nível de Pagamento", "Percent": "Percentual (%)"},
-    height=450,     
-)
-fig.update_traces(
-    texttemplate="%{text:.1f}%",
-    textposition="auto",   
-    cliponaxis=False,      
-)
-fig.update_layout(
-    barmode="stack",
-    yaxis=dict(range=[0, 100]),
-    legend_title_text="Gênero",
-    uniformtext_minsize=10,   
-    uniformtext_mode="show",  
-    margin=dict(t=60, r=30, b=40, l=40),
-)
-st.plotly_chart(fig, use_container_width=True)
+# Cada insight é um fragmento: mexer num widget dele reexecuta só aquele
+# bloco (consulta + tabela + gráfico), não o script inteiro. Filtros que
+# valem para todos (ano de ingresso) ficam fora e disparam o rerun completo.
+@st.fragment
+@traced("insight1")
+def insight1_section(source, filters):
+    # 7) Tabela de percentuais PaymentTier × Gender
+    percent = insight_cache.compute(insight1_percent, source, filters)
+    errors = insight_cache.compute(insight1_intervals, source, filters) if approximate else None
 
+    st.subheader("Insight 1 — Distribuição percentual por Nível de Pagamento e Gênero")
+    st.caption("Percentuais por PaymentTier × Gênero com filtro por ano de ingresso.")
+    st.dataframe(percent.reset_index().rename(columns={"PaymentTier": "Nível de Pagamento"}), use_container_width=True)
 
+    # 8) Gráfico 100% empilhado (Plotly)
+    fig = cached_figure(insight_cache, insight1_figure, percent, errors)
+    with span("insight1.envio"):
+        st.plotly_chart(fig, use_container_width=True)
 
 
 # ───────────────────────────────────────────────────────────────
 # Insight 2 — Taxa de saída por experiência × EverBenched (PaymentTier selecionável)
 # ───────────────────────────────────────────────────────────────
-st.markdown("---")
-st.subheader("Insight 2 — Taxa de saída por experiência × EverBenched")
+@st.fragment
+@traced("insight2")
+def insight2_section(source, filters, columns, exp_col):
+    st.markdown("---")
+    st.subheader("Insight 2 — Taxa de saída por experiência × EverBenched")
+
+    needed = {"PaymentTier", "LeaveOrNot", "EverBenched"}
+    missing = needed - set(columns)
+    if missing:
+        st.info(f"Para este insight, faltam as colunas: {sorted(missing)}")
+        return
 
-needed = {"PaymentTier", "LeaveOrNot", "EverBenched"}
-missing = needed - set(employee_df.columns)
-if missing:
-    st.info(f"Para este insight, faltam as colunas: {sorted(missing)}")
-else:
     # widget ----
-    tiers_raw = employee_df["PaymentTier"].dropna().unique().tolist()
+    tiers_raw = source.values("PaymentTier", filters)
     # tenta ordenar numericamente; se não der, ordena por string...
     try:
         tiers_labels = [str(int(t)) for t in tiers_raw]
@@ -145,160 +235,94 @@ else:
     selected_tier = selected_label  
 
     # Base filtrada pelo tier escolhido
-    base = employee_df[employee_df["PaymentTier"].astype(str) == str(selected_tier)].copy()
-    if base.empty:
+    tier_filters = {**filters, "PaymentTier": int(selected_tier)}
+    if total_rows(source, tier_filters) == 0:
         st.warning("Sem dados para o PaymentTier selecionado após os filtros atuais.")
-        st.stop()
+        return
 
-    # coluna de experiência (ExpGrupo como padrao)
-    exp_col = "ExpGrupo" if "ExpGrupo" in base.columns else "ExperienceInCurrentDomain"
-    if exp_col not in base.columns:
+    if exp_col not in columns:
         st.info("Coluna de experiência não encontrada (ExpGrupo ou ExperienceInCurrentDomain).")
-    else:
-        # Normalizar EverBenched -> 'No'/'Yes'
-        ever_map = {
-            "no": "No", "n": "No", "0": "No", "false": "No", "f": "No",
-            "yes": "Yes", "y": "Yes", "1": "Yes", "true": "Yes", "t": "Yes",
-        }
-        base["EverBenched"] = (
-            base["EverBenched"].astype(str).str.strip().str.lower().map(ever_map)
-        )
-        base = base[base["EverBenched"].isin(["No", "Yes"])]
-
-        # Garantir LeaveOrNot numérico 0/1
-        if not np.issubdtype(base["LeaveOrNot"].dtype, np.number):
-            base["LeaveOrNot"] = (
-                base["LeaveOrNot"].astype(str)
-                .str.strip().str.lower()
-                .map({"1": 1, "0": 0, "yes": 1, "no": 0, "true": 1, "false": 0})
-            )
-        base["LeaveOrNot"] = pd.to_numeric(base["LeaveOrNot"], errors="coerce")
-        base = base.dropna(subset=["LeaveOrNot"])
-
-        if base.empty:
-            st.warning("Sem dados válidos para calcular a taxa de saída.")
-            st.stop()
-
-        # Tabela da taxa (média) por experiência × EverBenched
-        taxa = (
-            base.groupby([exp_col, "EverBenched"])["LeaveOrNot"]
-                .mean()
-                .unstack("EverBenched")
-                .fillna(0)
-                .sort_index()
-        )
+        return
 
-        # garantir as duas colunas (No/Yes)
-        for c in ["No", "Yes"]:
-            if c not in taxa.columns:
-                taxa[c] = 0.0
-
-        # remover linhas sem dados
-        taxa = taxa[(taxa[["No", "Yes"]].sum(axis=1) > 0)].sort_index()
-
-        if taxa.empty:
-            st.warning("Sem dados suficientes para montar a tabela de taxas.")
-            st.stop()
-
-        # Tabela em %
-        taxa_pct = (taxa * 100).round(1).rename_axis(index=exp_col).reset_index()
-        taxa_pct = taxa_pct.rename(columns={"No": "Ocioso = Não", "Yes": "Ocioso = Sim"})
-        st.caption(f"Taxa de saída (%) por experiência × EverBenched (PaymentTier = {selected_label})")
-        st.dataframe(taxa_pct, use_container_width=True)
-
-        # Plotly — barras agrupadas com rótulos dinâmicos
-        plot_df = (
-            taxa.reset_index()
-                .melt(id_vars=exp_col, value_vars=["No", "Yes"],
-                      var_name="EverBenched", value_name="Rate")
-        )
-        plot_df["EverBenched"] = plot_df["EverBenched"].map({"No": "Ocioso = Não", "Yes": "Ocioso = Sim"})
-
-        fig2 = px.bar(
-            plot_df,
-            x=exp_col, y="Rate", color="EverBenched",
-            barmode="group",
-            title=f"Taxa de saída por experiência (PaymentTier = {selected_label})",
-            labels={exp_col: "Experiência na mesma função", "Rate": "Taxa de saída"},
-            text="Rate",
-            height=450,
-        )
-        fig2.update_yaxes(range=[0, 1], tickformat=".0%")
-        fig2.update_traces(
-            texttemplate="%{y:.0%}",
-            textposition="outside",   
-            cliponaxis=False,         
-            # width=0.35,             
-        )
-        fig2.update_layout(
-            legend_title_text="EverBenched",
-            uniformtext_minsize=10,
-            uniformtext_mode="show",
-            margin=dict(t=60, r=30, b=40, l=40),
-        )
+    # LeaveOrNot já vem como inteiro 0/1 e EverBenched como 'No'/'Yes' do load_data
+    if total_rows(source, {**tier_filters, "EverBenched": ["No", "Yes"]}) == 0:
+        st.warning("Sem dados válidos para calcular a taxa de saída.")
+        return
+
+    # Tabela da taxa (média) por experiência × EverBenched
+    taxa = insight_cache.compute(insight2_rates, source, tier_filters, exp_col)
+
+    if taxa.empty:
+        st.warning("Sem dados suficientes para montar a tabela de taxas.")
+        return
+
+    errors = (insight_cache.compute(insight2_intervals, source, tier_filters, exp_col)
+              if approximate else None)
 
+    # Tabela em %
+    taxa_pct = (taxa * 100).round(1).rename_axis(index=exp_col).reset_index()
+    taxa_pct = taxa_pct.rename(columns={"No": "Ocioso = Não", "Yes": "Ocioso = Sim"})
+    st.caption(f"Taxa de saída (%) por experiência × EverBenched (PaymentTier = {selected_label})")
+    st.dataframe(taxa_pct, use_container_width=True)
+
+    fig2 = cached_figure(insight_cache, insight2_figure, taxa, exp_col, selected_label, errors)
+    with span("insight2.envio"):
         st.plotly_chart(fig2, use_container_width=True)
 
-        with st.expander("📌 Como interpretar"):
-            st.markdown(f"""
+    with st.expander("📌 Como interpretar"):
+        st.markdown(f"""
 - Cada grupo de barras representa uma **faixa de experiência** ({exp_col}).
 - Em cada faixa, comparamos **Ocioso = Não** vs **Ocioso = Sim**.
 - O eixo Y mostra a **taxa de saída** (proporção de `LeaveOrNot = 1`).
 - O seletor acima permite analisar **qualquer PaymentTier** (atual: **{selected_label}**).
 """)
 
-            
 
 # ───────────────────────────────────────────────────────────────
 # Insight 3 — Distribuição da Faixa Salarial (menor escolaridade) + FILTROS
 # ───────────────────────────────────────────────────────────────
-st.markdown("---")
-st.subheader("Insight 3 — Distribuição da Faixa Salarial para Funcionários com Menor Escolaridade")
+@st.fragment
+@traced("insight3")
+def insight3_section(source, filters, columns):
+    st.markdown("---")
+    st.subheader("Insight 3 — Distribuição da Faixa Salarial para Funcionários com Menor Escolaridade")
 
-needed = {"Education", "PaymentTier"}
-missing = needed - set(employee_df.columns)
-if missing:
-    st.info(f"Para este insight, faltam as colunas: {sorted(missing)}")
-else:
-    base_all = employee_df.copy()
+    needed = {"Education", "PaymentTier"}
+    missing = needed - set(columns)
+    if missing:
+        st.info(f"Para este insight, faltam as colunas: {sorted(missing)}")
+        return
 
-    
+    base_filters = dict(filters)
+
+    # Gender/EverBenched já chegam padronizados do load_data (category)
     # 1) Filtro por Gênero (segmented control)
-    if "Gender" in base_all.columns:
-        base_all["Gender_std"] = base_all["Gender"].astype(str).str.strip().str.title()
+    if "Gender" in columns:
         g_choice = st.segmented_control(
             "Filtrar por gênero",
             options=["Todos", "Female", "Male"],
             default="Todos",
         )
         if g_choice != "Todos":
-            base_all = base_all[base_all["Gender_std"] == g_choice]
+            base_filters["Gender"] = g_choice
 
     # 2) Filtro por EverBenched (Ocioso)
-    if "EverBenched" in base_all.columns:
-        ever_map = {
-            "no": "No", "n": "No", "0": "No", "false": "No", "f": "No",
-            "yes": "Yes", "y": "Yes", "1": "Yes", "true": "Yes", "t": "Yes",
-        }
-        base_all["EverBenched_std"] = (
-            base_all["EverBenched"].astype(str).str.strip().str.lower().map(ever_map)
-        )
+    if "EverBenched" in columns:
         e_choice = st.segmented_control(
             "Filtrar por ociosidade (EverBenched)",
             options=["Todos", "Ocioso = Não", "Ocioso = Sim"],
             default="Todos",
         )
         if e_choice == "Ocioso = Não":
-            base_all = base_all[base_all["EverBenched_std"] == "No"]
+            base_filters["EverBenched"] = "No"
         elif e_choice == "Ocioso = Sim":
-            base_all = base_all[base_all["EverBenched_std"] == "Yes"]
+            base_filters["EverBenched"] = "Yes"
 
     # 3) Filtro por período de ingresso (JoiningYear)
-    if "JoiningYear" in base_all.columns:
-        base_all["JoiningYear_num"] = pd.to_numeric(base_all["JoiningYear"], errors="coerce").astype("Int64")
-        years = base_all["JoiningYear_num"].dropna()
-        if not years.empty:
-            y_min, y_max = int(years.min()), int(years.max())
+    if "JoiningYear" in columns:
+        years = source.values("JoiningYear", base_filters)
+        if years:
+            y_min, y_max = int(years[0]), int(years[-1])
             if y_min == y_max:
                 st.caption(f"Período de ingresso disponível: **{y_min}**")
             else:
@@ -307,45 +331,26 @@ else:
                     min_value=y_min, max_value=y_max,
                     value=(y_min, y_max), step=1,
                 )
-                base_all = base_all[base_all["JoiningYear_num"].between(y_from, y_to)]
+                base_filters["JoiningYear"] = (y_from, y_to)
 
-    if base_all.empty:
+    if total_rows(source, base_filters) == 0:
         st.warning("Sem dados após aplicar os filtros.")
-        st.stop()
-
-    # -------------------- Preparação de Education --------------------
-    # Education pode ser numérica (1=Bachelors, 2=Masters, 3=PHD) ou texto
-    edu_map = {"Bachelors": 1, "Masters": 2, "PHD": 3}
-    if not np.issubdtype(base_all["Education"].dtype, np.number):
-        base_all["Education"] = base_all["Education"].replace(edu_map)
-    base_all["Education"] = pd.to_numeric(base_all["Education"], errors="coerce")
+        return
 
-    lowest_education = base_all["Education"].min()
-    if pd.isna(lowest_education):
+    # -------------------- Contagem por PaymentTier --------------------
+    # Education já vem numérica (1=Bachelors, 2=Masters, 3=PHD) do load_data;
+    # a contagem considera só a menor escolaridade dentro do recorte filtrado
+    counts, lowest_education = insight_cache.compute(insight3_counts, source, base_filters)
+    if lowest_education is None:
         st.warning("Não foi possível determinar a menor escolaridade na seleção atual.")
-        st.stop()
-
-    label_map = {1: "Bachelors", 2: "Masters", 3: "PHD"}
-    edu_label = label_map.get(int(lowest_education), str(lowest_education))
-
-    # Base final: somente menor escolaridade dentro do recorte filtrado
-    base = base_all[base_all["Education"] == lowest_education].copy()
-    if base.empty:
-        st.warning("Não há registros para a menor escolaridade na seleção atual.")
-        st.stop()
+        return
 
-    # -------------------- Contagem por PaymentTier --------------------
-    counts = (
-        base["PaymentTier"]
-        .value_counts(dropna=False)
-        .rename_axis("PaymentTier")
-        .sort_index()
-        .reset_index(name="Quantidade")
-    )
-    counts["Percentual"] = counts["Quantidade"] / counts["Quantidade"].sum()
+    edu_label = EDU_LABELS.get(lowest_education, str(lowest_education))
+    errors = (insight_cache.compute(insight3_intervals, source, base_filters, lowest_education)
+              if approximate else None)
 
     st.caption(
-        f"Escolaridade mínima **{edu_label}** | Registros: **{len(base)}** "
+        f"Escolaridade mínima **{edu_label}** | Registros: **{counts['Quantidade'].sum()}** "
         f"| Faixas salariais distintas: **{counts['PaymentTier'].nunique()}**"
     )
 
@@ -356,29 +361,92 @@ else:
             use_container_width=True,
         )
 
-    # -------------------- Gráfico de barras (contagem) --------------------
-    fig3 = px.bar(
-        counts,
-        x="PaymentTier",
-        y="Quantidade",
-        text="Quantidade",
-        title=f"Distribuição da Faixa Salarial — Escolaridade mínima: {edu_label}",
-        labels={"PaymentTier": "Faixa Salarial", "Quantidade": "Número de Funcionários"},
-        height=450,
-    )
-    # Mostrar % no hover e garantir rótulo sempre visível
-    fig3.update_traces(
-        hovertemplate="Faixa: %{x}<br>Qtd: %{y}<br>%: %{customdata:.1%}<extra></extra>",
-        customdata=counts["Percentual"],
-        textposition="outside",
-        cliponaxis=False,
-    )
-    fig3.update_layout(
-        uniformtext_minsize=10,
-        uniformtext_mode="show",
-        margin=dict(t=60, r=30, b=40, l=40),
+    fig3 = cached_figure(insight_cache, insight3_figure, counts, edu_label, errors)
+    with span("insight3.envio"):
+        st.plotly_chart(fig3, use_container_width=True)
+
+
+# ───────────────────────────────────────────────────────────────
+# Insight 4 — Retenção por coorte (anos de casa) e segmento
+# ───────────────────────────────────────────────────────────────
+SEGMENT_LABELS = {"PaymentTier": "Nível de Pagamento", "City": "Cidade",
+                  "Gender": "Gênero", "EverBenched": "Ocioso"}
+
+@st.fragment
+@traced("insight4")
+def insight4_section(cohorts):
+    st.markdown("---")
+    st.subheader("Insight 4 — Retenção por coorte de ingresso e segmento")
+
+    if cohorts is None:
+        st.info("Curvas por coorte disponíveis só com a base carregada em memória "
+                "(indisponíveis nos modos SQL e estático).")
+        return
+    if cohorts.empty:
+        st.info("Não há funcionários na base para montar as curvas por coorte.")
+        return
+
+    # Todas as combinações de segmentos já vêm calculadas (coortes.py):
+    # os widgets só escolhem quais curvas mostrar
+    segments = [d for d in COHORT_SEGMENTS if d in cohorts.columns]
+    split_label = st.segmented_control(
+        "Comparar por",
+        options=[SEGMENT_LABELS.get(d, d) for d in segments],
+        default=SEGMENT_LABELS.get(segments[0], segments[0]),
+    ) or SEGMENT_LABELS.get(segments[0], segments[0])
+    split = next(d for d in segments if SEGMENT_LABELS.get(d, d) == split_label)
+
+    fixed = {}
+    others = [d for d in segments if d != split]
+    for col, dim in zip(st.columns(len(others)) if others else [], others):
+        values = sorted(v for v in cohorts[dim].unique() if v != ALL_LABEL)
+        fixed[dim] = col.selectbox(SEGMENT_LABELS.get(dim, dim), [ALL_LABEL] + values)
+
+    curves = segment_curves(cohorts, split, fixed)
+    if curves.empty:
+        st.warning("Sem funcionários para essa combinação de segmentos.")
+        return
+
+    st.caption(
+        "Cada ponto é uma coorte (ano de ingresso): anos de casa no eixo X e a "
+        "fração estimada ainda na empresa (Kaplan–Meier; quem não saiu conta até o tempo de casa atual)."
     )
+    fig4 = cached_figure(insight_cache, insight4_figure, curves, split, split_label)
+    with span("insight4.envio"):
+        st.plotly_chart(fig4, use_container_width=True)
+
+    with st.expander("📊 Retenção (%) por coorte"):
+        table = (curves.pivot_table(index="JoiningYear", columns=split, values="Retencao")
+                       .mul(100).round(1).sort_index(ascending=False))
+        st.dataframe(table, use_container_width=True)
 
-    st.plotly_chart(fig3, use_container_width=True)
 
+insight1_section(source, filters)
+insight2_section(source, filters, columns, exp_col)
+insight3_section(source, filters, columns)
+insight4_section(None if (sql_backend or static_mode) else snapshot.derived("coortes"))
 
+
+# ───────────────────────────────────────────────────────────────
+# Painel de depuração (oculto): tempo, linhas e memória por etapa
+# ───────────────────────────────────────────────────────────────
+if debug_panel:
+    with st.expander("🛠️ Depuração — etapas desta execução", expanded=False):
+        trace = current_trace()
+        spans = pd.DataFrame(trace.to_dict()["spans"]) if trace else pd.DataFrame()
+        if not spans.empty:
+            spans["etapa"] = ["  " * d + n for d, n in zip(spans["depth"], spans["name"])]
+            spans["ms"] = (spans["seconds"] * 1000).round(2)
+            spans["memória (MB)"] = (spans["rss_delta"] / 1e6).round(2)
+            st.dataframe(
+                spans[["etapa", "ms", "rows_in", "rows_out", "memória (MB)"]],
+                use_container_width=True, hide_index=True,
+            )
+        st.caption(f"Cache dos insights: {insight_cache.stats()}")
+        if not (sql_backend or static_mode):
+            st.caption(f"Dataset: {get_dataset().stats()}")
+        traces = recent_traces()
+        c1, c2 = st.columns(2)
+        c1.download_button("Exportar JSON", to_json(traces), "rastreio.json", "application/json")
+        c2.download_button("Exportar Chrome trace", to_chrome_trace(traces),
+                           "rastreio_chrome.json", "application/json")
@@ -1,61 +1,32 @@
 # dados_tratados.py
+# ----------------------------------------------------------
+# Mantido por compatibilidade: não tem mais uma cópia própria da
+# limpeza. Usa o carregamento único do dados_tratados.py da raiz
+# (mesmas regras, mesmo cache), apontando para o Employee.csv
+# desta pasta.
+# ----------------------------------------------------------
 
 from pathlib import Path
-from datetime import datetime
+import importlib.util
+import sys
 import pandas as pd
-import numpy as np
 
-# ======= AJUSTES DO ARQUIVO (se precisar trocar separador/decimal/encoding) =======
+# ======= AJUSTES DO ARQUIVO =======
 CSV_FILENAME = "Employee.csv"   # nome do arquivo dentro de data/
-CSV_SEP = ","                   # "," ou ";"
-CSV_DECIMAL = "."               # "." ou ","
-CSV_ENCODING = "utf-8"          # "utf-8" ou "latin-1" se acentos quebrados
-# ================================================================================
+# ==================================
 
-def load_data() -> pd.DataFrame:
-    # Caminho relativo: <pasta_do_projeto>/data/Employee.csv
-    csv_path = Path(__file__).parent / "data" / CSV_FILENAME
-    if not csv_path.exists():
-        raise FileNotFoundError(f"Arquivo não encontrado: {csv_path}")
-
-    # Leitura do CSV
-    employee_df = pd.read_csv(csv_path, sep=CSV_SEP, decimal=CSV_DECIMAL, encoding=CSV_ENCODING)
-
-
-    # Deixando strings vazias como valores nulos
-    employee_df.replace('', np.nan, inplace=True)
-
-
-
-    # Removendo linhas com quaisquer valores nulos
-    employee_df.dropna(inplace=True)
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
 
+# Carrega o dados_tratados.py da raiz com outro nome (este arquivo tem o mesmo nome)
+_spec = importlib.util.spec_from_file_location("_dados_tratados_raiz", ROOT / "dados_tratados.py")
+_raiz = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_raiz)
 
 
-    # Removendo duplicidades
-    
-    employee_df.drop_duplicates(inplace=True)
-   
-
-    # Redefinindo a coluna Education (mesma regra que você usou)
-    education_map = {'Bachelors': 1, 'Masters': 2, 'PHD': 3}
-    # .replace preserva valores não mapeados (se existirem)
-    employee_df['Education'] = employee_df['Education'].replace(education_map)
-    # Garante numérico (qualquer coisa fora do mapeado vira NaN, mas já tiramos NaN antes)
-    employee_df['Education'] = pd.to_numeric(employee_df['Education'], errors='coerce')
-
-    # Criando coluna Female a partir de Gender
-    employee_df['Female'] = employee_df['Gender'].apply(lambda x: 1 if x == 'Female' else 0)
-
-    # Tempo de casa: ano atual - JoiningYear
-    current_year = datetime.now().year
-    # Garante que JoiningYear é numérico
-    employee_df['JoiningYear'] = pd.to_numeric(employee_df['JoiningYear'], errors='coerce')
-    employee_df['years_of_service'] = current_year - employee_df['JoiningYear']
-
-   
-
-    return employee_df
+def load_data(reference_year: int | None = None, **kwargs) -> pd.DataFrame:
+    # Caminho relativo: <pasta_do_projeto>/data/Employee.csv
+    return _raiz.load_data(Path(__file__).parent / CSV_FILENAME, reference_year, **kwargs)
 
 
 # Validação rápida no terminal:
@@ -0,0 +1,220 @@
+# dataset_compartilhado.py
+# ----------------------------------------------------------
+# DataFrame tratado montado uma única vez por processo e dividido
+# entre todas as sessões do dashboard (e demais consumidores).
+#
+# As colunas são somente-leitura e, quando o cache Arrow existe,
+# mapeadas direto do arquivo (load_data(read_only=True)): as sessões
+# recebem o mesmo objeto, nunca uma cópia, e processos diferentes
+# dividem as mesmas páginas do cache do sistema operacional.
+# Escrita acidental em uma coluna levanta ValueError em vez de vazar
+# para as outras sessões.
+#
+# Cada versão carregada é um Snapshot: DataFrame + agregados derivados
+# (register(), ex.: a fonte dos insights), montados juntos. Um agregado
+# registrado com update(anterior, linhas_novas) é atualizado só com as
+# linhas das extrações incrementais (append_extract) quando a versão nova
+# apenas acrescenta linhas à anterior, em vez de remontado do zero.
+#
+# Sem atualizador, quando o CSV ou uma extração incremental muda
+# (cached_version), a próxima chamada a snapshot()/get() recarrega.
+#
+# Com start_refresher(), uma thread em segundo plano vigia a fonte,
+# monta o Snapshot novo (limpeza + agregados) fora das requisições e
+# só então troca a referência (buffer duplo): nenhuma sessão espera a
+# recarga, e quem pegou o Snapshot antigo continua com ele, consistente,
+# até o próximo rerun. Na troca, o Snapshot antigo é fechado (close): os
+# agregados soltam pools de processos e afins e seguem respondendo em série.
+#
+# shared_dataset() devolve a instância única do processo: quem sobe o
+# servidor já aquecido (partida.py --servir) e o dashboard usam a mesma.
+# ----------------------------------------------------------
+
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from dados_tratados import DEFAULT_SOURCE, appended_rows, cached_version, load_data
+
+# ======= AJUSTES =======
+REFRESH_INTERVAL = 5.0   # segundos entre verificações da fonte (atualizador)
+# =======================
+
+
+class Snapshot:
+    # Uma versão do dataset e dos agregados derivados dela (imutável para as sessões)
+
+    def __init__(self, frame: pd.DataFrame, version: str | None, builders: dict):
+        self.frame = frame
+        self.version = version
+        self.created_at = time.time()
+        self._builders = builders
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        # Libera o que os agregados seguram fora do DataFrame (ex.: pool de
+        # processos da fonte particionada); continuam respondendo para quem
+        # ainda tiver este Snapshot, só que sem os recursos extras
+        for value in list(self._derived.values()):
+            if hasattr(value, "close"):
+                value.close()
+
+    def derived(self, name: str):
+        # Agregado registrado, montado uma vez por Snapshot
+        value = self._derived.get(name)
+        if value is None:
+            with self._lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = self._derived[name] = self._builders[name](self.frame)
+        return value
+
+
+class SharedDataset:
+
+    def __init__(self, source: Path | str | None = None, reference_year: int | None = None):
+        self.source = source
+        self.reference_year = reference_year
+        self.loads = 0
+        self.swaps = 0
+        self.last_error = None
+        self.last_build_seconds = None
+        self._builders = {}
+        self._updaters = {}
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, name: str, builder, update=None) -> None:
+        # builder(frame) -> agregado; montado junto com cada versão nova.
+        # update(agregado_anterior, linhas_novas) -> agregado (ou None = remontar)
+        self._builders[name] = builder
+        if update is not None:
+            self._updaters[name] = update
+
+    def _version(self) -> str | None:
+        return cached_version(self.source, self.reference_year)
+
+    def _build(self, previous: Snapshot | None = None) -> Snapshot:
+        start = time.perf_counter()
+        frame = load_data(self.source, self.reference_year, read_only=True)
+        # versão lida depois da carga: se a fonte mudou no meio, fica diferente
+        # e a próxima verificação monta de novo
+        snapshot = Snapshot(frame, self._version(), self._builders)
+        new_rows = (appended_rows(frame, previous.version, self.source, self.reference_year)
+                    if previous is not None and self._updaters else None)
+        for name in list(self._builders):
+            if new_rows is not None and name in self._updaters and name in previous._derived:
+                value = self._updaters[name](previous._derived[name], new_rows)
+                if value is not None:
+                    snapshot._derived[name] = value
+            snapshot.derived(name)
+        self.loads += 1
+        self.last_build_seconds = round(time.perf_counter() - start, 3)
+        return snapshot
+
+    def snapshot(self) -> Snapshot:
+        # Versão atual (mesmo objeto para todos). Com o atualizador ligado,
+        # nunca recarrega aqui; sem ele, recarrega quando a versão em disco muda
+        snapshot = self._snapshot
+        if snapshot is not None and (self.refreshing or self._version() == snapshot.version):
+            return snapshot
+        with self._lock:
+            # outra sessão pode ter carregado enquanto esperávamos o lock
+            snapshot = self._snapshot
+            if snapshot is None or (not self.refreshing and self._version() != snapshot.version):
+                previous, snapshot = snapshot, self._build(snapshot)
+                self._snapshot = snapshot
+                if previous is not None:
+                    previous.close()
+            return snapshot
+
+    def get(self) -> pd.DataFrame:
+        return self.snapshot().frame
+
+    def refresh(self) -> bool:
+        # Monta a versão nova se a fonte mudou e troca a referência no fim
+        with self._lock:
+            current = self._snapshot
+            if current is not None and self._version() == current.version:
+                return False
+            snapshot = self._build(current)
+            self._snapshot = snapshot   # troca atômica: sessões em andamento mantêm a antiga
+            self.swaps += current is not None
+        if current is not None:
+            current.close()
+        return True
+
+    # ---------------- atualizador em segundo plano ----------------
+    @property
+    def refreshing(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _source_stat(self) -> tuple | None:
+        csv_path = Path(self.source) if self.source is not None else DEFAULT_SOURCE
+        try:
+            stat = csv_path.stat()
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _run(self, interval: float) -> None:
+        last_stat = self._source_stat()
+        while not self._stop.wait(interval):
+            stat = self._source_stat()
+            if stat != last_stat:
+                # CSV mudou desde a última olhada: espera parar de mudar (cópia em andamento)
+                last_stat = stat
+                continue
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as exc:   # fonte inválida: segue servindo a versão atual
+                self.last_error = f"{type(exc).__name__}: {exc}"
+
+    def start_refresher(self, interval: float = REFRESH_INTERVAL) -> None:
+        if self.refreshing:
+            return
+        self.snapshot()   # primeira versão pronta antes de ligar a troca em segundo plano
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,),
+                                        name="dataset-refresher", daemon=True)
+        self._thread.start()
+
+    def stop_refresher(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        frame = snapshot.frame if snapshot is not None else None
+        return {
+            "version": snapshot.version if snapshot is not None else None,
+            "rows": len(frame) if frame is not None else 0,
+            "nbytes": int(frame.memory_usage(deep=True).sum()) if frame is not None else 0,
+            "loads": self.loads,
+            "swaps": self.swaps,
+            "refreshing": self.refreshing,
+            "last_build_seconds": self.last_build_seconds,
+            "last_error": self.last_error,
+        }
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_dataset(source: Path | str | None = None, reference_year: int | None = None) -> SharedDataset:
+    # Uma instância por fonte no processo
+    key = (str(source) if source is not None else None, reference_year)
+    with _shared_lock:
+        dataset = _shared.get(key)
+        if dataset is None:
+            dataset = _shared[key] = SharedDataset(source, reference_year)
+        return dataset
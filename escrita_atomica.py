@@ -0,0 +1,34 @@
+# escrita_atomica.py
+# ----------------------------------------------------------
+# Escrita atômica dos arquivos gerados (cache tratado, metadados,
+# variantes do logo, exportação estática).
+#
+# Cada escrita vai para um temporário exclusivo de quem grava (processo
+# + sorteio: threads do mesmo processo não se cruzam) e só no fim troca
+# de lugar com os.replace. Leitores nunca veem um arquivo pela metade e,
+# se a escrita falhar, o temporário é apagado.
+#
+# Só biblioteca padrão: importado também no cabeçalho do dashboard.
+#
+# Uso:
+#   replace_from_tmp(path, lambda tmp: tmp.write_text(texto, encoding="utf-8"))
+# ----------------------------------------------------------
+
+import os
+import uuid
+from pathlib import Path
+
+
+def tmp_path(path: Path, suffix: str = ".tmp") -> Path:
+    # Temporário ao lado do destino (mesmo disco: os.replace é atômico)
+    return path.with_name(f"{path.name}.{os.getpid()}-{uuid.uuid4().hex[:8]}{suffix}")
+
+
+def replace_from_tmp(path: Path, write, suffix: str = ".tmp") -> None:
+    # write(tmp) grava o conteúdo; o temporário some se a escrita falhar
+    tmp = tmp_path(path, suffix)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
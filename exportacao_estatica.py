@@ -0,0 +1,260 @@
+# exportacao_estatica.py
+# ----------------------------------------------------------
+# Exportação estática: todas as combinações de filtros do dashboard
+# pré-calculadas em lote, para rodar o dashboard só com consultas
+# prontas (modo estático) — interações em tempo constante e uma versão
+# somente-leitura que quase não usa CPU (nem precisa do CSV).
+#
+# O espaço de filtros é pequeno e discreto:
+#   ano de ingresso (Todos + anos) × PaymentTier          -> insights 1 e 2
+#   ano × gênero (Todos/Female/Male) × ociosidade (Todos/Não/Sim)
+#     × intervalo de anos do slider                       -> insight 3
+#
+# Uma única passada vetorizada sobre os dados monta o cubo de agregação
+# (groupby de todas as dimensões); todas as combinações saem das
+# células do cubo, sem voltar às linhas.
+#
+# Arquivos (data/estatico/):
+#   manifest.json            versão, colunas, combinações e seus filtros
+#   <versão>/cells.*         células do cubo (opções dos widgets e checagens)
+#   <versão>/insight*.*      tabelas de cada insight, formato longo (query_id)
+# Cada exportação vai para uma pasta nova e o manifest troca no fim:
+# um dashboard rodando nunca lê uma exportação pela metade.
+#
+# Uso:
+#   python exportacao_estatica.py                  # Parquet em data/estatico/
+#   python exportacao_estatica.py --formato json
+#   DASHBOARD_STATIC=1 streamlit run dashboard.py  # dashboard em modo estático
+# ----------------------------------------------------------
+
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from cache_insights import freeze_filters, insight_key
+from cubo import CUBE_DIMS, AggregateCube
+from dados_tratados import DEFAULT_SOURCE, load_data
+from escrita_atomica import replace_from_tmp
+from insights import (
+    BASE_FILTERS, experience_column, insight1_percent, insight2_rates, insight3_counts, total_rows,
+)
+
+# ======= AJUSTES =======
+STATIC_DIR = Path(os.environ.get("DASHBOARD_STATIC_DIR", Path(__file__).parent / "data" / "estatico"))
+STATIC_FORMAT = "parquet"   # "parquet" (pyarrow) ou "json"
+# Modo estático no dashboard (liga sozinho se não houver CSV e existir exportação)
+STATIC_MODE = os.environ.get("DASHBOARD_STATIC", "") not in ("", "0")
+# =======================
+
+INSIGHT_FUNCS = {f.__name__: f for f in (insight1_percent, insight2_rates, insight3_counts)}
+
+
+def dashboard_queries(source, columns):
+    # Todas as consultas que os widgets do dashboard podem gerar,
+    # com os filtros montados exatamente como em dashboard.py
+    exp_col = experience_column(columns)
+    for year in [None] + source.values("JoiningYear", BASE_FILTERS):
+        filters = dict(BASE_FILTERS)
+        if year is not None:
+            filters["JoiningYear"] = int(year)
+        if total_rows(source, filters) == 0:
+            continue
+        yield insight1_percent, filters, ()
+
+        for tier in source.values("PaymentTier", filters):
+            yield insight2_rates, {**filters, "PaymentTier": int(tier)}, (exp_col,)
+
+        for gender in (None, "Female", "Male"):
+            for benched in (None, "No", "Yes"):
+                base_filters = dict(filters)
+                if gender is not None:
+                    base_filters["Gender"] = gender
+                if benched is not None:
+                    base_filters["EverBenched"] = benched
+                years = source.values("JoiningYear", base_filters)
+                if not years:
+                    continue
+                y_min, y_max = int(years[0]), int(years[-1])
+                if y_min == y_max:
+                    yield insight3_counts, base_filters, ()
+                    continue
+                for y_from in range(y_min, y_max + 1):
+                    for y_to in range(y_from, y_max + 1):
+                        yield insight3_counts, {**base_filters, "JoiningYear": (y_from, y_to)}, ()
+
+
+def _write_table(frame: pd.DataFrame, path: Path, fmt: str) -> None:
+    # Mesma versão de dados reexportada cai na mesma pasta: troca atômica por arquivo
+    if fmt == "parquet":
+        replace_from_tmp(path, lambda tmp: frame.to_parquet(tmp, index=False))
+    else:
+        replace_from_tmp(path, lambda tmp: frame.to_json(tmp, orient="split", index=False,
+                                                          double_precision=15))
+
+
+def _read_table(path: Path, fmt: str) -> pd.DataFrame:
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    return pd.read_json(path, orient="split", convert_dates=False)
+
+
+def _frozen(items) -> tuple:
+    # JSON (listas) -> mesma chave de freeze_filters (tuplas)
+    return tuple(tuple(item) for item in items)
+
+
+def _load_manifest(out_dir: Path) -> dict | None:
+    try:
+        return json.loads((out_dir / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def export_static(source: Path | str | None = None, reference_year: int | None = None,
+                  out_dir: Path | str | None = None, fmt: str = STATIC_FORMAT) -> dict:
+    out_dir = Path(out_dir) if out_dir is not None else STATIC_DIR
+    ext = "parquet" if fmt == "parquet" else "json"
+    employee_df = load_data(source, reference_year)
+    columns = list(employee_df.columns)
+    exp_col = experience_column(columns)
+    version = employee_df.attrs.get("dataset_version") or datetime.now().strftime("%Y%m%d%H%M%S")
+
+    # A única passada sobre as linhas: groupby de todas as dimensões
+    cube = AggregateCube.from_frame(employee_df, CUBE_DIMS[:-1] + [exp_col])
+
+    queries, tables = [], {name: [] for name in INSIGHT_FUNCS}
+    for query_id, (func, filters, args) in enumerate(dashboard_queries(cube, columns)):
+        result = func(cube, filters, *args)
+        entry = {"id": query_id, "insight": func.__name__,
+                 "filters": freeze_filters(filters), "args": list(args)}
+        if func is insight3_counts:
+            frame, entry["lowest_education"] = result
+        else:
+            frame = result.reset_index()
+        tables[func.__name__].append(frame.assign(query_id=query_id))
+        queries.append(entry)
+
+    data_dir = out_dir / version
+    data_dir.mkdir(parents=True, exist_ok=True)
+    files = {"cells": f"cells.{ext}"}
+    _write_table(cube.cells, data_dir / files["cells"], fmt)
+    for name, frames in tables.items():
+        files[name] = f"{name}.{ext}"
+        # combinações sem linhas não entram (e não "contaminam" os tipos das colunas)
+        frames = [f for f in frames if len(f)] or frames
+        _write_table(pd.concat(frames, ignore_index=True), data_dir / files[name], fmt)
+
+    previous = _load_manifest(out_dir)
+    manifest = {
+        "version": version,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "format": fmt,
+        "dir": version,
+        "dims": cube.dims,
+        "columns": columns,
+        "exp_col": exp_col,
+        "files": files,
+        "queries": queries,
+    }
+    text = json.dumps(manifest, ensure_ascii=False, default=int)
+    replace_from_tmp(out_dir / "manifest.json", lambda tmp: tmp.write_text(text, encoding="utf-8"))
+
+    # mantém só a exportação atual e a anterior (pode estar em uso)
+    keep = {version, previous.get("dir") if previous else None}
+    for old in out_dir.iterdir():
+        if old.is_dir() and old.name not in keep:
+            shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+
+def static_version(out_dir: Path | str | None = None) -> str | None:
+    manifest = _load_manifest(Path(out_dir) if out_dir is not None else STATIC_DIR)
+    return manifest["version"] if manifest else None
+
+
+def use_static(out_dir: Path | str | None = None) -> bool:
+    if static_version(out_dir) is None:
+        return False
+    return STATIC_MODE or not DEFAULT_SOURCE.exists()
+
+
+class StaticSource(AggregateCube):
+    # Cubo exportado + resultados de todas as combinações (para InsightCache.pin)
+
+    def __init__(self, cells: pd.DataFrame, dims: list[str], version: str,
+                 columns: list[str], results: list[tuple]):
+        super().__init__(cells, dims, version)
+        self.columns = columns
+        self.results = results   # [(chave do InsightCache, resultado)]
+
+    @classmethod
+    def load(cls, out_dir: Path | str | None = None) -> "StaticSource":
+        out_dir = Path(out_dir) if out_dir is not None else STATIC_DIR
+        manifest = _load_manifest(out_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"Exportação estática não encontrada em {out_dir}")
+        data_dir = out_dir / manifest["dir"]
+        fmt = manifest["format"]
+        version = manifest["version"]
+        cells = _read_table(data_dir / manifest["files"]["cells"], fmt)
+
+        groups = {}
+        for name in INSIGHT_FUNCS:
+            table = _read_table(data_dir / manifest["files"][name], fmt)
+            empty = table.iloc[0:0].drop(columns="query_id")
+            groups[name] = ({qid: g.drop(columns="query_id").reset_index(drop=True)
+                             for qid, g in table.groupby("query_id", sort=False)}, empty)
+
+        results = []
+        for entry in manifest["queries"]:
+            by_id, empty = groups[entry["insight"]]
+            frame = by_id.get(entry["id"], empty)
+            if entry["insight"] == "insight1_percent":
+                frame = frame.set_index("PaymentTier")
+                frame.columns.name = "Gender"
+                value = frame
+            elif entry["insight"] == "insight2_rates":
+                frame = frame.set_index(manifest["exp_col"])
+                frame.columns.name = "EverBenched"
+                value = frame
+            else:
+                value = (frame, entry["lowest_education"])
+            key = insight_key(INSIGHT_FUNCS[entry["insight"]], version,
+                              _frozen(entry["filters"]), tuple(entry["args"]))
+            results.append((key, value))
+        return cls(cells, manifest["dims"], version, manifest["columns"], results)
+
+    def preload(self, cache) -> None:
+        cache.unpin_stale(self.version)
+        for key, value in self.results:
+            cache.pin(key, value)
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Exporta todas as combinações de filtros do dashboard")
+    parser.add_argument("--fonte", default=None, help="CSV de origem (padrão: data/Employee.csv)")
+    parser.add_argument("--saida", default=None, help=f"pasta de saída (padrão: {STATIC_DIR})")
+    parser.add_argument("--formato", choices=["parquet", "json"], default=STATIC_FORMAT)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    manifest = export_static(args.fonte, out_dir=args.saida, fmt=args.formato)
+    seconds = time.perf_counter() - start
+    out_dir = Path(args.saida) if args.saida else STATIC_DIR
+    data_dir = out_dir / manifest["dir"]
+    total = sum(f.stat().st_size for f in data_dir.iterdir()) + (out_dir / "manifest.json").stat().st_size
+    counts = pd.Series([q["insight"] for q in manifest["queries"]]).value_counts().sort_index()
+    print(f"Exportação {manifest['version']} em {data_dir} ({seconds:.2f} s, {total / 1024:.1f} KB)")
+    for name, n in counts.items():
+        print(f"  {name:<18} {n:>5} combinações")
+    return manifest
+
+
+if __name__ == "__main__":
+    main()
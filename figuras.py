@@ -0,0 +1,278 @@
+# figuras.py
+# ----------------------------------------------------------
+# Gráficos Plotly dos insights: memoização e enxugamento do JSON
+# enviado ao navegador.
+#
+# Os gráficos dependem só das tabelas agregadas (poucas linhas) e de
+# alguns rótulos; cached_figure() guarda a figura pronta com chave
+# (função, hash da tabela, parâmetros), no mesmo LRU dos insights.
+# No modo aproximado (amostragem.py) os gráficos recebem também a
+# meia-largura dos ICs (errors) e mostram barras de erro.
+#
+# slim_figure() reduz o payload sem mudar o desenho:
+#   - template do Plotly só com o que os gráficos usam (barras e linhas; o template
+#     padrão traz defaults de ~30 tipos de gráfico e é quase todo o JSON;
+#     o tema do Streamlit é aplicado sobre template.layout, que fica);
+#   - texto das barras vira texttemplate sobre o próprio y (sem repetir
+#     o array de valores);
+#   - números com 4 casas decimais (os rótulos mostram no máximo 1).
+#
+# O plotly só é importado ao montar o primeiro gráfico (plotly.express
+# leva ~140 ms): o que vem antes dos gráficos aparece sem esperar por ele.
+#
+# Medição do payload antes/depois:
+#   python figuras.py
+# ----------------------------------------------------------
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from rastreio import span
+
+# ======= AJUSTES =======
+FLOAT_DECIMALS = 4
+TEMPLATE_LAYOUT_KEYS = {
+    "font", "title", "hovermode", "hoverlabel", "paper_bgcolor", "plot_bgcolor",
+    "xaxis", "yaxis", "colorway", "legend", "bargap", "uniformtext",
+}
+TEMPLATE_DATA_KEYS = {"bar", "scatter"}
+# =======================
+
+
+# ---------------------------------------------------------------------------
+# Gráficos dos insights (recebem só as tabelas agregadas)
+# ---------------------------------------------------------------------------
+def insight1_figure(percent, errors=None):
+    import plotly.express as px
+    order = sorted(percent.index.tolist())
+    plot_df = (
+        percent[["Female", "Male"]]
+          .reset_index()
+          .melt(id_vars="PaymentTier", var_name="Gender", value_name="Percent")
+    )
+    if errors is not None:
+        # modo aproximado: meia-largura do IC (pontos percentuais)
+        plot_df["Erro"] = _melted_errors(errors, "PaymentTier", ["Female", "Male"], "Gender", plot_df)
+    plot_df["PaymentTier"] = pd.Categorical(plot_df["PaymentTier"], categories=order, ordered=True)
+
+    fig = px.bar(
+        plot_df,
+        x="PaymentTier",
+        y="Percent",
+        color="Gender",
+        text="Percent",
+        error_y="Erro" if errors is not None else None,
+        title="Distribuição Percentual por Nível de Pagamento e Gênero",
+        labels={"PaymentTier": "Nível de Pagamento", "Percent": "Percentual (%)"},
+        height=450,
+    )
+    fig.update_traces(
+        texttemplate="%{text:.1f}%",
+        textposition="auto",
+        cliponaxis=False,
+    )
+    fig.update_layout(
+        barmode="stack",
+        yaxis=dict(range=[0, 100]),
+        legend_title_text="Gênero",
+        uniformtext_minsize=10,
+        uniformtext_mode="show",
+        margin=dict(t=60, r=30, b=40, l=40),
+    )
+    return fig
+
+
+def insight2_figure(taxa, exp_col, selected_label, errors=None):
+    import plotly.express as px
+    # Plotly — barras agrupadas com rótulos dinâmicos
+    plot_df = (
+        taxa.reset_index()
+            .melt(id_vars=exp_col, value_vars=["No", "Yes"],
+                  var_name="EverBenched", value_name="Rate")
+    )
+    if errors is not None:
+        plot_df["Erro"] = _melted_errors(errors, exp_col, ["No", "Yes"], "EverBenched", plot_df)
+    plot_df["EverBenched"] = plot_df["EverBenched"].map({"No": "Ocioso = Não", "Yes": "Ocioso = Sim"})
+
+    fig2 = px.bar(
+        plot_df,
+        x=exp_col, y="Rate", color="EverBenched",
+        barmode="group",
+        error_y="Erro" if errors is not None else None,
+        title=f"Taxa de saída por experiência (PaymentTier = {selected_label})",
+        labels={exp_col: "Experiência na mesma função", "Rate": "Taxa de saída"},
+        text="Rate",
+        height=450,
+    )
+    fig2.update_yaxes(range=[0, 1], tickformat=".0%")
+    fig2.update_traces(
+        texttemplate="%{y:.0%}",
+        textposition="outside",
+        cliponaxis=False,
+        # width=0.35,
+    )
+    fig2.update_layout(
+        legend_title_text="EverBenched",
+        uniformtext_minsize=10,
+        uniformtext_mode="show",
+        margin=dict(t=60, r=30, b=40, l=40),
+    )
+    return fig2
+
+
+def insight3_figure(counts, edu_label, errors=None):
+    import plotly.express as px
+    # -------------------- Gráfico de barras (contagem) --------------------
+    if errors is not None:
+        counts = counts.merge(errors, on="PaymentTier", how="left").fillna({"Erro": 0})
+    fig3 = px.bar(
+        counts,
+        x="PaymentTier",
+        y="Quantidade",
+        text="Quantidade",
+        error_y="Erro" if errors is not None else None,
+        title=f"Distribuição da Faixa Salarial — Escolaridade mínima: {edu_label}",
+        labels={"PaymentTier": "Faixa Salarial", "Quantidade": "Número de Funcionários"},
+        height=450,
+    )
+    # Mostrar % no hover e garantir rótulo sempre visível
+    fig3.update_traces(
+        hovertemplate="Faixa: %{x}<br>Qtd: %{y}<br>%: %{customdata:.1%}<extra></extra>",
+        customdata=counts["Percentual"],
+        textposition="outside",
+        cliponaxis=False,
+    )
+    fig3.update_layout(
+        uniformtext_minsize=10,
+        uniformtext_mode="show",
+        margin=dict(t=60, r=30, b=40, l=40),
+    )
+    return fig3
+
+
+def insight4_figure(curves, split, split_label):
+    import plotly.express as px
+    # Curvas de sobrevivência (Kaplan–Meier) por anos de casa, uma por segmento
+    fig4 = px.line(
+        curves,
+        x="years_of_service",
+        y="Sobrevivencia",
+        color=split,
+        markers=True,
+        custom_data=["JoiningYear", "Funcionarios", "Retencao"],
+        title=f"Retenção por tempo de casa — por {split_label}",
+        labels={"years_of_service": "Anos de casa", "Sobrevivencia": "Ainda na empresa",
+                split: split_label},
+        height=450,
+    )
+    fig4.update_yaxes(range=[0, 1.05], tickformat=".0%")
+    fig4.update_traces(
+        hovertemplate="Anos de casa: %{x} (coorte %{customdata[0]})<br>"
+                      "Sobrevivência: %{y:.1%}<br>Funcionários da coorte: %{customdata[1]}<br>"
+                      "Retenção da coorte: %{customdata[2]:.1%}<extra></extra>",
+    )
+    fig4.update_layout(
+        legend_title_text=split_label,
+        margin=dict(t=60, r=30, b=40, l=40),
+    )
+    return fig4
+
+
+def _melted_errors(errors, id_col, value_cols, var_name, plot_df):
+    # Meia-largura dos ICs (tabela larga) alinhada às linhas do melt
+    long = (errors.reindex(columns=value_cols).reset_index()
+                  .melt(id_vars=id_col, var_name=var_name, value_name="Erro"))
+    merged = plot_df[[id_col, var_name]].merge(long, on=[id_col, var_name], how="left")
+    return merged["Erro"].fillna(0).to_numpy()
+
+
+# ---------------------------------------------------------------------------
+# Cache e enxugamento
+# ---------------------------------------------------------------------------
+def frame_digest(frame: pd.DataFrame) -> str:
+    # Hash do conteúdo (valores + índice + colunas + tipos) de uma tabela pequena
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    h.update(repr((list(frame.columns), list(frame.index.names),
+                   [str(t) for t in frame.dtypes])).encode("utf-8"))
+    return h.hexdigest()
+
+
+def payload_bytes(fig) -> int:
+    # Tamanho do JSON que o st.plotly_chart envia ao navegador
+    import plotly.io as pio
+    return len(pio.to_json(fig, validate=False))
+
+
+def _compact(values):
+    if values is None:
+        return None
+    array = np.asarray(values)
+    if array.dtype.kind == "f":
+        return np.round(array, FLOAT_DECIMALS)
+    return values
+
+
+def slim_figure(fig):
+    template = fig.layout.template.to_plotly_json()
+    fig.layout.template = {
+        "layout": {k: v for k, v in template.get("layout", {}).items() if k in TEMPLATE_LAYOUT_KEYS},
+        "data": {k: v for k, v in template.get("data", {}).items() if k in TEMPLATE_DATA_KEYS},
+    }
+    for trace in fig.data:
+        y = _compact(trace.y)
+        text = trace.text
+        if text is not None and y is not None and np.array_equal(np.asarray(text, dtype=object),
+                                                                 np.asarray(trace.y, dtype=object)):
+            # rótulo = valor da barra: formata o próprio y no navegador
+            template_text = trace.texttemplate or "%{y}"
+            trace.texttemplate = template_text.replace("%{text", "%{y")
+            trace.text = None
+        trace.y = y
+        if trace.customdata is not None:
+            trace.customdata = _compact(trace.customdata)
+        if trace.error_y.array is not None:
+            trace.error_y.array = _compact(trace.error_y.array)
+    return fig
+
+
+def cached_figure(cache, builder, table: pd.DataFrame, *args):
+    # Figura de builder(table, *args), montada e enxugada uma vez por conteúdo
+    # (tabelas nos args, ex.: ICs do modo aproximado, entram pelo hash)
+    key = ("figura", builder.__module__, builder.__qualname__, frame_digest(table),
+           tuple(frame_digest(a) if isinstance(a, pd.DataFrame) else a for a in args))
+    with span(f"figura.{builder.__name__}") as s:
+        found, fig = cache.get(key)
+        s.attrs["cache"] = "hit" if found else "miss"
+        if not found:
+            fig = slim_figure(builder(table, *args))
+            cache.put(key, fig)
+        return fig
+
+
+# Medição rápida no terminal: payload dos 3 gráficos (seleção padrão do dashboard)
+if __name__ == "__main__":
+    from cubo import CUBE_DIMS
+    from dados_tratados import load_data
+    from insights import (BASE_FILTERS, EDU_LABELS, build_source,
+                          insight1_percent, insight2_rates, insight3_counts)
+
+    _source = build_source(load_data(), CUBE_DIMS)
+    _years = _source.values("JoiningYear", BASE_FILTERS)
+    _counts, _edu = insight3_counts(_source, {**BASE_FILTERS, "JoiningYear": (_years[0], _years[-1])})
+    _charts = {
+        "insight1": (insight1_figure, insight1_percent(_source, BASE_FILTERS)),
+        "insight2": (insight2_figure, insight2_rates(_source, {**BASE_FILTERS, "PaymentTier": 1}),
+                     "ExperienceInCurrentDomain", "1"),
+        "insight3": (insight3_figure, _counts, EDU_LABELS.get(_edu, str(_edu))),
+    }
+    _total = [0, 0]
+    for _name, (_builder, *_args) in _charts.items():
+        _before = payload_bytes(_builder(*_args))
+        _after = payload_bytes(slim_figure(_builder(*_args)))
+        _total[0] += _before
+        _total[1] += _after
+        print(f"{_name}: {_before:>7,} -> {_after:>6,} bytes ({100 * (1 - _after / _before):.0f}% menor)")
+    print(f"total:    {_total[0]:>7,} -> {_total[1]:>6,} bytes ({100 * (1 - _total[1] / _total[0]):.0f}% menor)")
@@ -0,0 +1,137 @@
+# filtros.py
+# ----------------------------------------------------------
+# Motor de filtros por bitmap, montado uma vez sobre o DataFrame
+# tratado por load_data().
+#
+# Para cada valor de JoiningYear, Gender, EverBenched, PaymentTier e
+# Education guardamos um bitmap compactado (np.packbits, 1 bit por
+# linha). Uma seleção do usuário vira um AND bit a bit dos bitmaps e
+# só as colunas pedidas pelo gráfico são materializadas, sem criar
+# cópias intermediárias do DataFrame a cada filtro.
+#
+# Oferece a mesma interface do AggregateCube (aggregate/values), então
+# os insights funcionam sobre qualquer um dos dois.
+# ----------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+# ======= COLUNAS INDEXADAS =======
+INDEX_COLUMNS = ["JoiningYear", "Gender", "EverBenched", "PaymentTier", "Education"]
+MEASURE = "LeaveOrNot"
+# =================================
+
+
+class FilterIndex:
+
+    def __init__(self, employee_df: pd.DataFrame, columns: list[str] | None = None,
+                 measure: str = MEASURE):
+        self.frame = employee_df          # referência, sem cópia
+        self.n_rows = len(employee_df)
+        self.measure = measure
+        self.version = employee_df.attrs.get("dataset_version")
+        self._codes = {}                  # coluna -> (códigos, valores distintos)
+        self.bitmaps = {}                 # coluna -> {valor: bitmap compactado}
+        for col in columns or INDEX_COLUMNS:
+            if col not in employee_df.columns:
+                continue
+            codes, uniques = self._factorize(col)
+            self.bitmaps[col] = {
+                value: np.packbits(codes == i) for i, value in enumerate(uniques.tolist())
+            }
+
+    @property
+    def nbytes(self) -> int:
+        bitmaps = sum(b.nbytes for col in self.bitmaps.values() for b in col.values())
+        return bitmaps + sum(codes.nbytes for codes, _ in self._codes.values())
+
+    def _factorize(self, col: str):
+        # Códigos inteiros por coluna (calculados uma vez e reaproveitados).
+        # Ficam guardados enquanto o índice existir: no menor inteiro com sinal
+        # que caiba (-1 = nulo), ex. int8 para as colunas indexadas, em vez do
+        # int64 do pd.factorize (8 bytes por linha e por coluna)
+        if col not in self._codes:
+            codes, uniques = pd.factorize(self.frame[col], sort=True)
+            codes = codes.astype(np.min_scalar_type(-max(len(uniques), 1)), copy=False)
+            self._codes[col] = (codes, uniques)
+        return self._codes[col]
+
+    def _empty(self) -> np.ndarray:
+        return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+
+    def _bitmap(self, col: str, cond) -> np.ndarray:
+        # Mesmo formato de filtro de cubo.selection_mask
+        if col not in self.bitmaps:
+            # coluna sem bitmap: monta na hora só para essa condição
+            values = self.frame[col]
+            if isinstance(cond, tuple):
+                mask = values.between(*cond)
+            elif isinstance(cond, (list, set, frozenset)):
+                mask = values.isin(list(cond))
+            else:
+                mask = values == cond
+            return np.packbits(mask.to_numpy())
+
+        bitmaps = self.bitmaps[col]
+        if isinstance(cond, tuple):
+            lo, hi = cond
+            wanted = [v for v in bitmaps if lo <= v <= hi]
+        elif isinstance(cond, (list, set, frozenset)):
+            wanted = list(cond)
+        else:
+            wanted = [cond]
+
+        result = self._empty()
+        for value in wanted:
+            if value in bitmaps:
+                result |= bitmaps[value]
+        return result
+
+    def mask(self, filters: dict | None = None) -> np.ndarray | None:
+        # AND de todos os filtros (None = todas as linhas)
+        result = None
+        for col, cond in (filters or {}).items():
+            if cond is None:
+                continue
+            bitmap = self._bitmap(col, cond)
+            result = bitmap if result is None else result & bitmap
+        return result
+
+    def positions(self, filters: dict | None = None) -> np.ndarray:
+        packed = self.mask(filters)
+        if packed is None:
+            return np.arange(self.n_rows)
+        return np.flatnonzero(np.unpackbits(packed, count=self.n_rows))
+
+    def rows(self, filters: dict | None = None, columns: list[str] | None = None) -> pd.DataFrame:
+        # Materializa só as colunas pedidas, apenas nas linhas selecionadas
+        pos = self.positions(filters)
+        columns = columns or list(self.frame.columns)
+        return pd.DataFrame({col: self.frame[col].take(pos) for col in columns})
+
+    def aggregate(self, filters: dict | None = None, by: list[str] | tuple = ()) -> pd.DataFrame:
+        # count/leave_sum por grupo via bincount sobre os códigos das colunas `by`
+        pos = self.positions(filters)
+        measure = self.frame[self.measure].to_numpy()[pos].astype(np.float64)
+        by = list(by)
+        if not by:
+            return pd.DataFrame({"count": [len(pos)], "leave_sum": [int(measure.sum())]})
+
+        codes, uniques = zip(*(self._factorize(col) for col in by))
+        shape = tuple(len(u) for u in uniques)
+        selected = [c[pos] for c in codes]
+        valid = np.logical_and.reduce([c >= 0 for c in selected])  # código -1 = nulo
+        key = np.ravel_multi_index(tuple(c[valid] for c in selected), shape)
+        size = int(np.prod(shape))
+        count = np.bincount(key, minlength=size)
+        leave_sum = np.bincount(key, weights=measure[valid], minlength=size)
+
+        cells = np.flatnonzero(count)
+        idx = np.unravel_index(cells, shape)
+        result = {col: u.take(i) for col, u, i in zip(by, uniques, idx)}
+        result["count"] = count[cells].astype("int64")
+        result["leave_sum"] = leave_sum[cells].astype("int64")
+        return pd.DataFrame(result)
+
+    def values(self, dim: str, filters: dict | None = None) -> list:
+        return sorted(self.aggregate(filters, [dim])[dim].tolist())
@@ -0,0 +1,159 @@
+# imagens.py
+# ----------------------------------------------------------
+# Pipeline dos arquivos estáticos da página (logo do cabeçalho).
+#
+# O logo.png original tem 1536x1024 RGBA (~2,1 MB) e aparece num
+# cabeçalho pequeno; o Streamlit ainda redimensiona e recodifica a
+# imagem a cada rerun (acima de 1460 px de largura).
+#
+# build_variants() gera, uma vez, versões nas larguras exibidas:
+#   - PNG com paleta de 256 cores (o logo é arte chapada) e WebP;
+#   - nome com hash do conteúdo + parâmetros (logo-960-1a2b3c4d.png),
+#     então mudar o logo ou os ajustes gera arquivos novos sozinho;
+#   - manifesto JSON ao lado, para não reprocessar nas próximas execuções.
+#
+# O dashboard usa a variante PNG: o st.image só entrega PNG/JPEG e
+# converteria o WebP de volta a cada rerun. Uma variante PNG menor que
+# o limite do Streamlit passa direto, sem recodificação.
+#
+# As variantes são geradas fora da renderização (este script ou o
+# aquecimento do partida.py); enquanto não existem, o cabeçalho mostra
+# o logo original em vez de esperar o Pillow.
+#
+# Uso (build):
+#   python imagens.py              # gera as variantes e mostra os tamanhos
+#   python partida.py              # idem, junto com os caches de dados
+# ----------------------------------------------------------
+
+import hashlib
+import importlib.util
+import json
+from pathlib import Path
+
+from escrita_atomica import replace_from_tmp
+
+# O Pillow (que ainda puxa o numpy) só é importado para gerar as variantes:
+# com o manifesto em dia, o cabeçalho do dashboard sai sem esse import.
+# Sem Pillow o dashboard usa o arquivo original
+HAS_PIL = importlib.util.find_spec("PIL") is not None
+
+# ======= AJUSTES =======
+LOGO_SOURCE = Path(__file__).parent / "logo.png"
+ASSET_DIR = Path(__file__).parent / "data" / ".cache" / "imagens"
+LOGO_WIDTHS = (480, 960)        # largura exibida no cabeçalho (1x e 2x para telas HiDPI)
+ASSET_FORMATS = ("png", "webp")
+PNG_COLORS = 256                # paleta do PNG (arte chapada: sem perda visível)
+WEBP_QUALITY = 85
+# =======================
+
+PIPELINE_VERSION = "1"
+
+
+def _params() -> dict:
+    return {"pipeline": PIPELINE_VERSION, "widths": list(LOGO_WIDTHS), "formats": list(ASSET_FORMATS),
+            "png_colors": PNG_COLORS, "webp_quality": WEBP_QUALITY}
+
+
+def content_hash(source: Path) -> str:
+    # Hash do arquivo de origem + ajustes do pipeline (nome das variantes)
+    h = hashlib.sha256(source.read_bytes())
+    h.update(json.dumps(_params(), sort_keys=True).encode("utf-8"))
+    return h.hexdigest()[:8]
+
+
+def _manifest_path(source: Path) -> Path:
+    return ASSET_DIR / f"{source.stem}.json"
+
+
+def _save_image(image, path: Path, fmt: str) -> None:
+    from PIL import Image
+
+    # Grava num temporário e troca atomicamente (sessões/processos concorrentes)
+    if fmt == "png":
+        image = image.quantize(PNG_COLORS, method=Image.Quantize.FASTOCTREE)
+        replace_from_tmp(path, lambda tmp: image.save(tmp, "PNG", optimize=True))
+    else:
+        replace_from_tmp(path, lambda tmp: image.save(tmp, "WEBP", quality=WEBP_QUALITY, method=6))
+
+
+def _load_manifest(source: Path, digest: str) -> dict | None:
+    try:
+        manifest = json.loads(_manifest_path(source).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if manifest.get("hash") != digest:
+        return None
+    if not all((ASSET_DIR / v["file"]).exists() for v in manifest["variants"]):
+        return None
+    return manifest
+
+
+def build_variants(source: Path | str | None = None, force_refresh: bool = False) -> dict | None:
+    # Manifesto {"hash", "source_bytes", "variants": [{"width", "format", "file", "bytes"}]}
+    source = Path(source) if source is not None else LOGO_SOURCE
+    if not HAS_PIL or not source.exists():
+        return None
+    digest = content_hash(source)
+    if not force_refresh:
+        manifest = _load_manifest(source, digest)
+        if manifest is not None:
+            return manifest
+
+    from PIL import Image
+
+    ASSET_DIR.mkdir(parents=True, exist_ok=True)
+    with Image.open(source) as original:
+        original.load()
+        variants = []
+        for width in LOGO_WIDTHS:
+            width = min(width, original.width)
+            height = round(original.height * width / original.width)
+            resized = original.resize((width, height), Image.LANCZOS)
+            for fmt in ASSET_FORMATS:
+                path = ASSET_DIR / f"{source.stem}-{width}-{digest}.{fmt}"
+                _save_image(resized, path, fmt)
+                variants.append({"width": width, "format": fmt, "file": path.name,
+                                 "bytes": path.stat().st_size})
+
+    manifest = {"hash": digest, "source": source.name, "source_bytes": source.stat().st_size,
+                "params": _params(), "variants": variants}
+    text = json.dumps(manifest, indent=2)
+    replace_from_tmp(_manifest_path(source), lambda tmp: tmp.write_text(text, encoding="utf-8"))
+    return manifest
+
+
+def variants_stamp(source: Path | str | None = None) -> int:
+    # Muda quando o manifesto é regravado (chave de cache de quem usa pick_variant)
+    source = Path(source) if source is not None else LOGO_SOURCE
+    try:
+        return _manifest_path(source).stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def pick_variant(width: int, fmt: str = "png", source: Path | str | None = None) -> Path | None:
+    # Menor variante com largura >= `width` (ou a maior disponível).
+    # Só lê o manifesto, nunca gera: quem gera é o build/aquecimento
+    # (partida.py). Sem variantes em dia, devolve o arquivo original
+    source = Path(source) if source is not None else LOGO_SOURCE
+    if not source.exists():
+        return None
+    manifest = _load_manifest(source, content_hash(source))
+    if manifest is None:
+        return source if source.exists() else None
+    candidates = sorted((v for v in manifest["variants"] if v["format"] == fmt), key=lambda v: v["width"])
+    if not candidates:
+        return source
+    chosen = next((v for v in candidates if v["width"] >= width), candidates[-1])
+    return ASSET_DIR / chosen["file"]
+
+
+if __name__ == "__main__":
+    result = build_variants(force_refresh=True)
+    if result is None:
+        print("Pillow não instalado ou logo.png ausente.")
+    else:
+        print(f"{result['source']}: {result['source_bytes']:,} bytes")
+        for v in result["variants"]:
+            print(f"  {v['file']:<28} {v['bytes']:>9,} bytes "
+                  f"({100 * (1 - v['bytes'] / result['source_bytes']):.1f}% menor)")
@@ -0,0 +1,128 @@
+# insights.py
+# ----------------------------------------------------------
+# Tabelas dos três insights do dashboard, calculadas a partir de uma
+# fonte agregada (ex.: AggregateCube de cubo.py).
+#
+# A fonte só precisa oferecer:
+#   aggregate(filters, by) -> DataFrame com `by` + count + leave_sum
+#   values(dim, filters)   -> valores distintos de uma dimensão
+#
+# build_source() escolhe entre o cubo (poucas células) e o motor de
+# filtros por bitmap (quando o cubo ficaria quase do tamanho dos dados);
+# bases grandes usam o motor de bitmap particionado, um núcleo por parte.
+# ----------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from agregacao_paralela import PARALLEL_MIN_ROWS, PartitionedSource, default_executor
+from cubo import CUBE_DIMS, AggregateCube
+from filtros import FilterIndex
+
+# Cubo só compensa se tiver bem menos células do que linhas
+CUBE_MAX_FILL = 0.5
+
+# Recorte padrão do dashboard: só Female/Male
+BASE_FILTERS = {"Gender": ["Female", "Male"]}
+
+EDU_LABELS = {1: "Bachelors", 2: "Masters", 3: "PHD"}
+
+
+def build_source(employee_df: pd.DataFrame, dims: list[str]):
+    # Estimativa (limite superior) de células: produto das cardinalidades
+    dims = [d for d in dims if d in employee_df.columns]
+    max_cells = int(np.prod([employee_df[d].nunique() for d in dims], dtype=np.float64))
+    if max_cells <= CUBE_MAX_FILL * len(employee_df):
+        return AggregateCube.from_frame(employee_df, dims)
+    if len(employee_df) >= PARALLEL_MIN_ROWS and default_executor() is not None:
+        return PartitionedSource.from_frame(employee_df)
+    return FilterIndex(employee_df)
+
+
+def experience_column(columns) -> str:
+    # Coluna de experiência dos insights (ExpGrupo como padrão)
+    return "ExpGrupo" if "ExpGrupo" in columns else "ExperienceInCurrentDomain"
+
+
+def insights_source(employee_df: pd.DataFrame):
+    # Fonte com as dimensões usadas pelos três insights (dashboard e API)
+    return build_source(employee_df, CUBE_DIMS[:-1] + [experience_column(employee_df.columns)])
+
+
+def update_source(source, new_rows: pd.DataFrame):
+    # Fonte da versão seguinte só com as linhas de extrações incrementais:
+    # o cubo soma as células das linhas novas; as demais fontes são remontadas (None)
+    if isinstance(source, AggregateCube):
+        cube = source.append(new_rows)
+        cube.version = new_rows.attrs.get("dataset_version", cube.version)
+        return cube
+    return None
+
+
+def total_rows(source, filters: dict | None = None) -> int:
+    return int(source.aggregate(filters)["count"].sum())
+
+
+# Insight 1 — percentuais PaymentTier × Gender
+def insight1_percent(source, filters: dict | None = None) -> pd.DataFrame:
+    agg = source.aggregate(filters, ["PaymentTier", "Gender"])
+    counts = agg.pivot_table(index="PaymentTier", columns="Gender", values="count",
+                             aggfunc="sum", fill_value=0, observed=True)
+    counts.columns = counts.columns.astype(str)
+    row_sums = counts.sum(axis=1).replace(0, np.nan)
+    percent = counts.div(row_sums, axis=0).mul(100)
+
+    for g in ["Female", "Male"]:
+        if g not in percent.columns:
+            percent[g] = 0.0
+
+    percent = percent[["Female", "Male"]].fillna(0).round(1)
+    percent["Diferença (%)"] = (
+        percent[["Female", "Male"]].max(axis=1) -
+        percent[["Female", "Male"]].min(axis=1)
+    ).round(1)
+    percent.columns.name = "Gender"
+    return percent
+
+
+# Insight 2 — taxa de saída por experiência × EverBenched
+def insight2_rates(source, filters: dict | None = None,
+                   exp_col: str = "ExperienceInCurrentDomain") -> pd.DataFrame:
+    filters = {**(filters or {}), "EverBenched": ["No", "Yes"]}
+    agg = source.aggregate(filters, [exp_col, "EverBenched"])
+    agg["Rate"] = agg["leave_sum"] / agg["count"]
+    taxa = (
+        agg.pivot_table(index=exp_col, columns="EverBenched", values="Rate",
+                        aggfunc="sum", observed=True)
+        .fillna(0)
+        .sort_index()
+    )
+    taxa.columns = taxa.columns.astype(str)
+
+    # garantir as duas colunas (No/Yes)
+    for c in ["No", "Yes"]:
+        if c not in taxa.columns:
+            taxa[c] = 0.0
+
+    # remover linhas sem dados
+    taxa = taxa[(taxa[["No", "Yes"]].sum(axis=1) > 0)].sort_index()
+    taxa.columns.name = "EverBenched"
+    return taxa
+
+
+# Insight 3 — contagem por PaymentTier na menor escolaridade do recorte
+def insight3_counts(source, filters: dict | None = None) -> tuple[pd.DataFrame, int | None]:
+    agg = source.aggregate(filters, ["Education", "PaymentTier"])
+    agg = agg[agg["count"] > 0]
+    if agg.empty:
+        return pd.DataFrame(columns=["PaymentTier", "Quantidade", "Percentual"]), None
+
+    lowest_education = int(agg["Education"].min())
+    counts = (
+        agg[agg["Education"] == lowest_education]
+        .groupby("PaymentTier")["count"].sum()
+        .sort_index()
+        .reset_index(name="Quantidade")
+    )
+    counts["Percentual"] = counts["Quantidade"] / counts["Quantidade"].sum()
+    return counts, lowest_education
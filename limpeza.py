@@ -0,0 +1,314 @@
+# limpeza.py
+# ----------------------------------------------------------
+# Regras de limpeza do Employee.csv como um pipeline declarativo:
+# uma lista ordenada de etapas vetorizadas (sem .apply linha a linha),
+# compartilhada por dados_tratados.py, data/dados_tratados.py e app.py.
+#
+# Cada etapa é (nome, tipo, função):
+#   "linhas"  -> função(df, ctx) devolve a máscara das linhas a manter
+#   "colunas" -> função(df, ctx) devolve {coluna: novos valores}
+#
+# Etapas vizinhas do mesmo tipo são fundidas: as máscaras de linhas
+# são combinadas com AND e aplicadas em um único recorte, e as etapas
+# de colunas rodam juntas sobre as linhas que sobraram. Cada etapa é
+# cronometrada (lista `timings`) e vira um span do rastreio.py.
+# ----------------------------------------------------------
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from rastreio import span
+
+# Incrementar sempre que as regras de limpeza abaixo mudarem (invalida o cache)
+CLEANING_VERSION = 2
+
+# ======= ESQUEMA DO DATAFRAME TRATADO =======
+# Tipos finais das colunas numéricas (depois da limpeza)
+INT_DTYPES = {
+    "Education": "int8",
+    "JoiningYear": "int16",
+    "PaymentTier": "int8",
+    "Age": "int16",
+    "ExperienceInCurrentDomain": "int8",
+    "LeaveOrNot": "int8",
+    "years_of_service": "int16",
+}
+CATEGORY_COLUMNS = ["City", "Gender", "EverBenched"]
+
+# Redefinindo a coluna Education (mesma regra que você usou)
+EDUCATION_MAP = {'Bachelors': 1, 'Masters': 2, 'PHD': 3}
+
+# Normalização de EverBenched -> 'No'/'Yes' (antes feita no dashboard)
+EVER_MAP = {
+    "no": "No", "n": "No", "0": "No", "false": "No", "f": "No",
+    "yes": "Yes", "y": "Yes", "1": "Yes", "true": "Yes", "t": "Yes",
+}
+# ============================================
+
+
+# ---------------------------------------------------------------------------
+# Auxiliares vetorizados
+# ---------------------------------------------------------------------------
+def _normalize_categories(values: pd.Series, normalize) -> pd.Series:
+    # Aplica `normalize` só nas categorias (poucas) e remapeia os códigos;
+    # categorias que viram o mesmo rótulo (ex.: "male" e "Male ") são unidas
+    values = values.astype("category")
+    labels = normalize(pd.Series(values.cat.categories.astype(str)))
+    new_categories = pd.Index(labels.unique())
+    lookup = np.append(new_categories.get_indexer(labels), -1)  # código -1 = nulo
+    codes = lookup[values.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=new_categories),
+                     index=values.index, name=values.name)
+
+
+def _to_int(values: pd.Series, dtype: str) -> pd.Series:
+    # Inteiro compacto; se sobrar nulo usa a versão anulável (Int8/Int16)
+    values = pd.to_numeric(values, errors='coerce')
+    if values.isna().any():
+        return values.astype(dtype.capitalize())
+    return values.astype(dtype)
+
+
+# ---------------------------------------------------------------------------
+# Etapas
+# ---------------------------------------------------------------------------
+def valid_rows(employee_df: pd.DataFrame, ctx: dict) -> np.ndarray:
+    # Strings vazias contam como nulo; linha com qualquer nulo sai
+    # (equivale a replace('', np.nan) + dropna, sem copiar o DataFrame)
+    keep = np.ones(len(employee_df), dtype=bool)
+    for col, values in employee_df.items():
+        keep &= values.notna().to_numpy()
+        if values.dtype == object or isinstance(values.dtype, pd.CategoricalDtype):
+            keep &= (values != '').to_numpy()
+    return keep
+
+
+def first_occurrences(employee_df: pd.DataFrame, ctx: dict) -> np.ndarray:
+    # Removendo duplicidades (mantém a 1ª ocorrência).
+    # Pode ser fundida com valid_rows: se uma linha é inválida, sua cópia também é.
+    return ~employee_df.duplicated().to_numpy()
+
+
+def normalized_text(employee_df, ctx: dict) -> dict:
+    # Padronizando textos uma única vez (antes era feito a cada rerun do dashboard)
+    return {
+        'City': _normalize_categories(employee_df['City'], lambda s: s.str.strip()),
+        'Gender': _normalize_categories(
+            employee_df['Gender'], lambda s: s.str.strip().str.title()),
+        'EverBenched': _normalize_categories(
+            employee_df['EverBenched'],
+            lambda s: s.str.strip().str.lower().map(EVER_MAP).fillna(s.str.strip())),
+    }
+
+
+def education_level(employee_df, ctx: dict) -> dict:
+    # Mapeia só as categorias; valores fora do mapeado viram nulo (Int8 anulável)
+    education = employee_df['Education']
+    if education.dtype.kind not in "iuf":
+        education = education.astype('category').cat.rename_categories(
+            lambda c: EDUCATION_MAP.get(c, pd.to_numeric(c, errors='coerce')))
+        education = education.astype('float64')
+    return {'Education': _to_int(education, INT_DTYPES['Education'])}
+
+
+def female_flag(employee_df, ctx: dict) -> dict:
+    # Criando coluna Female a partir de Gender (comparação vetorizada, sem .apply)
+    return {'Female': (employee_df['Gender'] == 'Female').to_numpy()}
+
+
+def years_of_service(employee_df, ctx: dict) -> dict:
+    # Tempo de casa: ano de referência - JoiningYear (vetorizado, sem .apply)
+    joining_year = _to_int(employee_df['JoiningYear'], INT_DTYPES['JoiningYear'])
+    return {
+        'JoiningYear': joining_year,
+        'years_of_service': _to_int(ctx['current_year'] - joining_year,
+                                    INT_DTYPES['years_of_service']),
+    }
+
+
+def compact_ints(employee_df, ctx: dict) -> dict:
+    # Demais inteiros no tipo compacto
+    return {
+        col: _to_int(employee_df[col], INT_DTYPES[col])
+        for col in ("PaymentTier", "Age", "ExperienceInCurrentDomain", "LeaveOrNot")
+        if col in employee_df.columns
+    }
+
+
+ROW_STEPS = [
+    ("nulos", "linhas", valid_rows),
+    ("duplicadas", "linhas", first_occurrences),
+]
+COLUMN_STEPS = [
+    ("texto", "colunas", normalized_text),
+    ("education", "colunas", education_level),
+    ("female", "colunas", female_flag),
+    ("anos_de_casa", "colunas", years_of_service),
+    ("inteiros", "colunas", compact_ints),
+]
+CLEANING_STEPS = ROW_STEPS + COLUMN_STEPS
+
+
+# ---------------------------------------------------------------------------
+# Execução
+# ---------------------------------------------------------------------------
+class _ColumnView:
+    # Lê as colunas já recalculadas no grupo fundido antes das originais
+
+    def __init__(self, employee_df: pd.DataFrame, updates: dict):
+        self._df = employee_df
+        self._updates = updates
+        self.columns = employee_df.columns
+
+    def __getitem__(self, col):
+        if col in self._updates:
+            return pd.Series(self._updates[col], index=self._df.index, name=col)
+        return self._df[col]
+
+
+def _groups(steps: list, fuse: bool) -> list[list]:
+    groups = []
+    for step in steps:
+        if fuse and groups and groups[-1][0][1] == step[1]:
+            groups[-1].append(step)
+        else:
+            groups.append([step])
+    return groups
+
+
+def run_pipeline(employee_df: pd.DataFrame, steps: list | None = None,
+                 current_year: int | None = None, fuse: bool = True,
+                 timings: list | None = None) -> pd.DataFrame:
+    steps = CLEANING_STEPS if steps is None else steps
+    ctx = {"current_year": current_year}
+
+    for group in _groups(steps, fuse):
+        kind = group[0][1]
+        rows_in = len(employee_df)
+
+        if kind == "linhas":
+            keep = None
+            for name, _, func in group:
+                with span(f"limpeza.{name}", rows_in) as s:
+                    start = time.perf_counter()
+                    mask = func(employee_df, ctx)
+                    keep = mask if keep is None else keep & mask
+                    s.rows_out = rows_out = int(keep.sum())
+                    _record(timings, name, start, rows_in, rows_out)
+            if not keep.all():
+                with span("limpeza.recorte", rows_in) as s:
+                    start = time.perf_counter()
+                    employee_df = employee_df.take(np.flatnonzero(keep))
+                    s.rows_out = len(employee_df)
+                    _record(timings, "+".join(n for n, _, _ in group) + " (recorte)",
+                            start, rows_in, len(employee_df))
+        else:
+            updates = {}
+            view = _ColumnView(employee_df, updates)
+            for name, _, func in group:
+                with span(f"limpeza.{name}", rows_in):
+                    start = time.perf_counter()
+                    updates.update(func(view, ctx))
+                    _record(timings, name, start, rows_in, rows_in)
+            # Escrita única das colunas calculadas pelo grupo
+            for col, values in updates.items():
+                employee_df[col] = values
+
+    return employee_df
+
+
+def _record(timings: list | None, name: str, start: float, rows_in: int, rows_out: int) -> None:
+    if timings is not None:
+        timings.append({
+            "step": name,
+            "seconds": round(time.perf_counter() - start, 6),
+            "rows_in": rows_in,
+            "rows_out": rows_out,
+        })
+
+
+# Atalhos usados pelo carregamento (e pelo benchmark)
+def drop_invalid_rows(employee_df: pd.DataFrame, timings: list | None = None) -> pd.DataFrame:
+    return run_pipeline(employee_df, ROW_STEPS[:1], timings=timings)
+
+
+def derive_columns(employee_df: pd.DataFrame, current_year: int,
+                   timings: list | None = None) -> pd.DataFrame:
+    return run_pipeline(employee_df, COLUMN_STEPS, current_year, timings=timings)
+
+
+def clean_data(employee_df: pd.DataFrame, current_year: int,
+               timings: list | None = None) -> pd.DataFrame:
+    return run_pipeline(employee_df, CLEANING_STEPS, current_year, timings=timings)
+
+
+# ---------------------------------------------------------------------------
+# Esquema / memória
+# ---------------------------------------------------------------------------
+def concat_frames(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    # pd.concat vira object quando as categorias diferem entre blocos;
+    # unifica as categorias antes para manter o esquema compacto
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            categories = pd.Index([])
+            for frame in frames:
+                categories = categories.union(frame[col].cat.categories, sort=False)
+            for frame in frames:
+                frame[col] = frame[col].cat.set_categories(categories)
+    return pd.concat(frames)
+
+
+def read_only_array(values):
+    # Mesmo array marcado como somente-leitura (escrita acidental vira ValueError);
+    # cópia só quando o array não é dono dos dados
+    if isinstance(values, pd.Categorical):
+        return pd.Categorical.from_codes(read_only_array(values.codes), dtype=values.dtype)
+    if isinstance(values, (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)):
+        data = values.to_numpy(dtype=values.dtype.numpy_dtype, na_value=0)
+        return type(values)(read_only_array(data), read_only_array(values.isna()))
+    values = np.asarray(values)
+    if values.flags.writeable:
+        if not values.flags.owndata:
+            values = values.copy()
+        values.flags.writeable = False
+    return values
+
+
+def read_only_frame(employee_df: pd.DataFrame) -> pd.DataFrame:
+    # DataFrame com todas as colunas somente-leitura (uma coluna por bloco,
+    # sem consolidar), para ser compartilhado entre sessões sem cópias
+    frame = pd.DataFrame(
+        {col: read_only_array(values.array) for col, values in employee_df.items()},
+        index=employee_df.index, copy=False,
+    )
+    frame.attrs.update(employee_df.attrs)
+    return frame
+
+
+def legacy_dtypes(employee_df: pd.DataFrame) -> pd.DataFrame:
+    # Mesmo DataFrame com os tipos antigos (object/int64) - base do relatório de memória
+    legacy = {}
+    for col, values in employee_df.items():
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            legacy[col] = values.astype(object)
+        elif values.dtype.kind in "biu":
+            legacy[col] = values.astype("int64")
+        else:
+            legacy[col] = values
+    return pd.DataFrame(legacy, index=employee_df.index)
+
+
+def memory_report(employee_df: pd.DataFrame) -> pd.DataFrame:
+    # Bytes por coluna: esquema antigo (antes) x esquema compacto (depois)
+    before = legacy_dtypes(employee_df).memory_usage(deep=True, index=False)
+    after = employee_df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "dtype": employee_df.dtypes.astype(str),
+        "bytes_antes": before,
+        "bytes_depois": after,
+    })
+    report.loc["TOTAL"] = ["", before.sum(), after.sum()]
+    report["reducao (%)"] = (100 * (1 - report["bytes_depois"] / report["bytes_antes"])).round(1)
+    return report
@@ -0,0 +1,127 @@
+# motor_sql.py
+# ----------------------------------------------------------
+# Fonte dos insights para bases grandes: consultas SQL (DuckDB,
+# embutido no processo, sem servidor) direto sobre arquivos Parquet.
+#
+# Os filtros do dashboard (JoiningYear/Gender/EverBenched/PaymentTier...)
+# viram WHERE e os agrupamentos viram GROUP BY; o DuckDB empurra os
+# filtros para a leitura do Parquet (pula row groups pelas estatísticas
+# de min/max) e só a tabela agregada, de poucas linhas, volta ao Python.
+# O DataFrame completo nunca é carregado.
+#
+# Mesma interface do AggregateCube/FilterIndex (ver insights.py):
+#   aggregate(filters, by) -> DataFrame com `by` + count + leave_sum
+#   values(dim, filters)   -> valores distintos de uma dimensão
+#
+# CSVs pequenos continuam no caminho pandas (use_sql_backend()).
+# ----------------------------------------------------------
+
+import importlib.util
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from cubo import MEASURE
+from dados_tratados import DEFAULT_SOURCE, parquet_cache
+
+# O duckdb só é importado quando o motor SQL é usado (no caminho pandas a
+# partida do dashboard não paga o import); sem ele, fica sempre no pandas
+HAS_DUCKDB = importlib.util.find_spec("duckdb") is not None
+
+# ======= AJUSTES =======
+SQL_MIN_BYTES = 256 * 1024 * 1024   # CSVs a partir desse tamanho usam o motor SQL
+SQL_THREADS = None                  # threads do DuckDB (None = nº de CPUs)
+# =======================
+
+
+def use_sql_backend(source: Path | str | None = None) -> bool:
+    csv_path = Path(source) if source is not None else DEFAULT_SOURCE
+    return HAS_DUCKDB and csv_path.exists() and csv_path.stat().st_size >= SQL_MIN_BYTES
+
+
+def _quote(col: str) -> str:
+    return '"' + str(col).replace('"', '""') + '"'
+
+
+def _param(value):
+    # numpy -> tipo Python (o DuckDB não aceita np.int64 como parâmetro)
+    return value.item() if hasattr(value, "item") else value
+
+
+def where_clause(filters: dict | None) -> tuple[str, list]:
+    # Mesmo formato de filtros do cubo.selection_mask, em SQL parametrizado
+    conditions, params = [], []
+    for col, cond in (filters or {}).items():
+        if cond is None:
+            continue
+        if isinstance(cond, tuple):
+            lo, hi = cond
+            conditions.append(f"{_quote(col)} BETWEEN ? AND ?")
+            params += [_param(lo), _param(hi)]
+        elif isinstance(cond, (list, set, frozenset)):
+            if not cond:
+                conditions.append("FALSE")
+                continue
+            conditions.append(f"{_quote(col)} IN ({', '.join('?' * len(cond))})")
+            params += [_param(v) for v in cond]
+        else:
+            conditions.append(f"{_quote(col)} = ?")
+            params.append(_param(cond))
+    return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+
+class SqlSource:
+
+    def __init__(self, paths: list[Path | str], version: str | None = None):
+        if not HAS_DUCKDB:
+            raise RuntimeError("O motor SQL precisa do duckdb (pip install duckdb).")
+        import duckdb
+        self.paths = [str(p) for p in paths]
+        self.version = version   # versão do dataset de origem (chave dos caches)
+        self._con = duckdb.connect(":memory:")
+        if SQL_THREADS:
+            self._con.execute(f"SET threads = {int(SQL_THREADS)}")
+        files = ", ".join("'" + p.replace("'", "''") + "'" for p in self.paths)
+        self._con.execute(f"CREATE VIEW employees AS SELECT * FROM read_parquet([{files}])")
+        self.columns = [row[0] for row in self._con.execute("DESCRIBE employees").fetchall()]
+        self._rows = self._con.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+        self._local = threading.local()
+
+    @classmethod
+    def from_csv(cls, source: Path | str | None = None,
+                 reference_year: int | None = None) -> "SqlSource":
+        # Converte (uma vez) o CSV tratado para Parquet e consulta o arquivo
+        path, version = parquet_cache(source, reference_year)
+        return cls([path], version)
+
+    def _cursor(self):
+        # Um cursor por thread (sessões do Streamlit rodam em threads)
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self._con.cursor()
+        return cursor
+
+    def __len__(self) -> int:
+        return int(self._rows)
+
+    @property
+    def nbytes(self) -> int:
+        return 0   # nada fica em memória além das tabelas de resultado
+
+    def aggregate(self, filters: dict | None = None, by: list[str] | tuple = ()) -> pd.DataFrame:
+        where, params = where_clause(filters)
+        by = list(by)
+        group = ", ".join(_quote(c) for c in by)
+        sql = (
+            f"SELECT {group + ', ' if by else ''}"
+            f"COUNT(*)::BIGINT AS count, COALESCE(SUM({_quote(MEASURE)}), 0)::BIGINT AS leave_sum "
+            f"FROM employees{where}"
+            + (f" GROUP BY {group} ORDER BY {group}" if by else "")
+        )
+        return self._cursor().execute(sql, params).df()
+
+    def values(self, dim: str, filters: dict | None = None) -> list:
+        where, params = where_clause(filters)
+        sql = f"SELECT DISTINCT {_quote(dim)} FROM employees{where} ORDER BY 1"
+        return [row[0] for row in self._cursor().execute(sql, params).fetchall()]
@@ -0,0 +1,226 @@
+# partida.py
+# ----------------------------------------------------------
+# Partida rápida do dashboard (ex.: depois de reiniciar o container).
+#
+# Aquecimento (antes de o servidor aceitar tráfego):
+#   - base tratada no cache Arrow (+ amostras do modo aproximado);
+#   - curvas por coorte gravadas junto com o cache;
+#   - tabelas de todas as combinações de filtros (exportacao_estatica),
+#     que o dashboard fixa no cache dos insights quando são da versão atual;
+#   - variantes do logo; Parquet do motor SQL, quando for o caso.
+# Cada passo só refaz o que estiver desatualizado.
+#
+# Com --servir, o mesmo processo ainda importa os módulos pesados, monta
+# o dataset compartilhado (shared_dataset) e roda o dashboard uma vez sem
+# navegador (AppTest) antes de subir o Streamlit: os caches de recurso
+# (dataset, fonte, cache dos insights, gráficos da tela inicial, logo) e
+# o plotly já estão prontos quando a primeira sessão chega.
+#
+# Com --perfil, mede a partida num processo novo: tempo de import de cada
+# módulo do dashboard e do primeiro render (e de um segundo, já aquecido).
+# Os imports aparecem em dois grupos: os do cabeçalho (leves, antes do
+# primeiro desenho) e os de dados, que o dashboard só importa depois do
+# cabeçalho. pandas/numpy/pyarrow ficam nesse segundo grupo e não são
+# adiados além disso: a base tratada e os insights dependem deles antes
+# do primeiro gráfico. Quem tira esse custo da 1ª sessão é o --servir.
+#
+# Uso:
+#   python partida.py                              # só aquece os caches
+#   python partida.py --perfil                     # aquece e mede a partida
+#   python partida.py --servir -- --server.port 8501
+# ----------------------------------------------------------
+
+import argparse
+import ast
+import importlib
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# ======= AJUSTES =======
+DASHBOARD = Path(__file__).parent / "dashboard.py"
+# Módulos pesados: importados na partida (--servir) em vez de na 1ª sessão
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "plotly.express", "plotly.io"]
+# =======================
+
+# Só biblioteca padrão no topo: o perfil (--medir) mede os imports do
+# dashboard num processo em que nada pesado foi importado ainda
+
+
+def _cohorts(frame):
+    from dados_tratados import load_cohorts
+    return load_cohorts(employee_df=frame)
+
+
+def dashboard_dataset():
+    # Dataset do processo com os agregados do dashboard (fonte dos insights
+    # e curvas por coorte) e o atualizador em segundo plano ligado
+    from dataset_compartilhado import shared_dataset
+    from insights import insights_source, update_source
+
+    dataset = shared_dataset()
+    dataset.register("fonte", insights_source, update_source)
+    dataset.register("coortes", _cohorts)
+    dataset.start_refresher()
+    return dataset
+
+
+def _step(steps: list, name: str, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    steps.append({"passo": name, "ms": round((time.perf_counter() - start) * 1000, 1)})
+    return result
+
+
+def prewarm() -> list[dict]:
+    # Caches em disco que a primeira sessão usaria (só refaz o que mudou)
+    from dados_tratados import DEFAULT_SOURCE, cached_version, load_cohorts, load_data, parquet_cache
+    from exportacao_estatica import export_static, static_version
+    from imagens import build_variants
+    from motor_sql import use_sql_backend
+
+    steps = []
+    if not DEFAULT_SOURCE.exists():
+        return steps
+    employee_df = _step(steps, "dados tratados", load_data, read_only=True)
+    _step(steps, "coortes", load_cohorts, employee_df=employee_df)
+    if static_version() != cached_version():
+        _step(steps, "insights (todas as combinações)", export_static)
+    _step(steps, "logo", build_variants)
+    if use_sql_backend():
+        _step(steps, "parquet (motor SQL)", parquet_cache)
+    return steps
+
+
+def _render_once() -> None:
+    # Uma execução completa do dashboard, sem navegador
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(DASHBOARD), default_timeout=120)
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+
+
+def warm_process() -> list[dict]:
+    # Deixa o processo do servidor pronto: módulos importados, dataset montado
+    # e uma sessão inicial já executada (caches de recurso cheios)
+    steps = []
+    for name in HEAVY_MODULES:
+        _step(steps, f"import {name}", importlib.import_module, name)
+    _step(steps, "dataset compartilhado", lambda: dashboard_dataset().snapshot())
+    _step(steps, "sessão inicial (sem navegador)", _render_once)
+    return steps
+
+
+def _dashboard_imports() -> tuple[list[str], list[str]]:
+    # Módulos importados no nível de cima do dashboard, na ordem do script:
+    # (antes do primeiro comando, depois dele — já com o cabeçalho na tela)
+    tree = ast.parse(DASHBOARD.read_text(encoding="utf-8"))
+    header, data = [], []
+    names = header
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names.append(node.module)
+        elif header:
+            names = data   # primeiro comando do script: imports seguintes vêm após o cabeçalho
+    return list(dict.fromkeys(header)), list(dict.fromkeys(data))
+
+
+def _measure() -> dict:
+    # Roda num processo novo (--medir): partida de um servidor recém-iniciado
+    start = time.perf_counter()
+    # já importados pelo servidor antes das sessões; o AppTest fica carregado
+    # para não entrar na medida da primeira renderização
+    importlib.import_module("streamlit")
+    importlib.import_module("streamlit.testing.v1")
+    server_ms = (time.perf_counter() - start) * 1000
+
+    # pesados carregados por cada grupo (os do próprio servidor não contam)
+    loaded = lambda: [m for m in HEAVY_MODULES if m in sys.modules]
+    header, data = _dashboard_imports()
+    imports, server_heavy = {}, loaded()
+    for name in header + data:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        imports[name] = round((time.perf_counter() - start) * 1000, 1)
+        if name == header[-1]:
+            header_heavy = [m for m in loaded() if m not in server_heavy]
+    eager = [m for m in loaded() if m not in server_heavy + header_heavy]
+    deferred = [m for m in HEAVY_MODULES + ["duckdb", "PIL"] if m not in sys.modules]
+
+    renders = []
+    for _ in range(2):
+        # segunda sessão: mesmo processo, caches de recurso já montados
+        # (é o que a primeira sessão encontra com --servir)
+        start = time.perf_counter()
+        _render_once()
+        renders.append(round((time.perf_counter() - start) * 1000, 1))
+    return {"streamlit_ms": round(server_ms, 1), "imports_ms": imports,
+            "header_imports": header, "header_heavy": header_heavy, "eager": eager,
+            "deferred": deferred, "renders_ms": renders}
+
+
+def startup_profile() -> dict:
+    output = subprocess.run([sys.executable, str(Path(__file__).resolve()), "--medir"],
+                            capture_output=True, text=True, check=True).stdout
+    profile = json.loads(output.strip().splitlines()[-1])
+    imports_ms = sum(profile["imports_ms"].values())
+    header_ms = sum(profile["imports_ms"][name] for name in profile["header_imports"])
+    first, warm = profile["renders_ms"]
+    print(f"  streamlit (servidor)      {profile['streamlit_ms']:>8.1f} ms")
+    print(f"  imports do cabeçalho      {header_ms:>8.1f} ms  (pesados: "
+          f"{', '.join(profile['header_heavy']) or '-'})")
+    data_imports = {k: v for k, v in profile["imports_ms"].items() if k not in profile["header_imports"]}
+    for name, ms in sorted(data_imports.items(), key=lambda item: -item[1])[:8]:
+        print(f"    import {name:<20} {ms:>8.1f} ms")
+    print(f"  imports de dados          {imports_ms - header_ms:>8.1f} ms  (depois do cabeçalho)")
+    # pandas/numpy/pyarrow não têm como sair da 1ª sessão fria: a base tratada
+    # (cache Arrow) e os insights usam os três antes do primeiro gráfico
+    print(f"  pesados na 1ª sessão      {', '.join(profile['eager']) or '-'}  "
+          f"(base tratada e insights precisam deles; --servir importa na partida)")
+    print(f"  adiados (1º uso)          {', '.join(profile['deferred']) or '-'}")
+    print(f"  1ª sessão, processo frio  {imports_ms + first:>8.1f} ms  (imports + render {first:.1f} ms)")
+    print(f"  1ª sessão com --servir    {warm:>8.1f} ms  (processo aquecido)")
+    return profile
+
+
+def serve(streamlit_args: list[str]) -> None:
+    from streamlit.web import cli as stcli
+
+    for step in warm_process():
+        print(f"  {step['passo']:<28} {step['ms']:>8.1f} ms", flush=True)
+    sys.argv = ["streamlit", "run", str(DASHBOARD), *streamlit_args]
+    sys.exit(stcli.main())
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Aquecimento e perfil de partida do dashboard")
+    parser.add_argument("--perfil", action="store_true", help="mede a partida num processo novo")
+    parser.add_argument("--servir", action="store_true",
+                        help="aquece e sobe o dashboard neste processo (args do streamlit após --)")
+    parser.add_argument("--medir", action="store_true", help=argparse.SUPPRESS)
+    args, streamlit_args = parser.parse_known_args(argv)
+
+    if args.medir:
+        print(json.dumps(_measure()))
+        return
+
+    start = time.perf_counter()
+    steps = prewarm()
+    for step in steps:
+        print(f"  {step['passo']:<32} {step['ms']:>8.1f} ms")
+    print(f"Aquecimento em {time.perf_counter() - start:.2f} s")
+    if args.perfil:
+        print("Perfil de partida (processo novo):")
+        startup_profile()
+    if args.servir:
+        serve([a for a in streamlit_args if a != "--"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# rastreio.py
+# ----------------------------------------------------------
+# Rastreamento leve por etapas (spans): tempo de parede, linhas de
+# entrada/saída e variação de memória de cada trecho nomeado
+# (leitura do CSV, etapas da limpeza, consultas dos insights,
+# montagem e envio dos gráficos...).
+#
+# Só grava quando há um rastro ativo na thread atual (start_trace);
+# sem rastro, span() devolve um objeto nulo compartilhado e o custo é
+# uma leitura de atributo - pode ficar no código de produção.
+#
+# Os rastros recentes ficam em memória (recent_traces) e podem ser
+# exportados como JSON ou no formato Chrome trace (chrome://tracing,
+# Perfetto).
+#
+# Uso:
+#   trace = start_trace("rerun")
+#   with span("insight1", rows_in=n) as s:
+#       ...
+#       s.rows_out = len(resultado)
+#   finish_trace()
+# ----------------------------------------------------------
+
+import functools
+import json
+import mmap
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+# ======= AJUSTES =======
+TRACE_HISTORY = 20   # rastros recentes mantidos em memória (todas as sessões)
+# Liga o rastreamento em todas as execuções (padrão: só com ?debug=1 no dashboard)
+TRACE_ALWAYS = os.environ.get("DASHBOARD_TRACE", "") not in ("", "0")
+# =======================
+
+_local = threading.local()
+_recent = deque(maxlen=TRACE_HISTORY)
+_recent_lock = threading.Lock()
+
+
+def rss_bytes() -> int:
+    # Memória residente atual (Linux); 0 onde /proc não existe (ex.: Windows)
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * mmap.PAGESIZE
+    except OSError:
+        return 0
+
+
+class _NullSpan:
+    # Span desligado: aceita os mesmos atributos e não faz nada
+
+    @property
+    def attrs(self) -> dict:
+        return {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+
+    def __init__(self, trace: "Trace", name: str, rows_in: int | None, attrs: dict):
+        self.trace = trace
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.depth = len(self.trace.stack)
+        self.trace.stack.append(self)
+        self.rss_start = rss_bytes()
+        self.py_start = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        self.trace.stack.pop()
+        record = {
+            "name": self.name,
+            "depth": self.depth,
+            "start": round(self.start - self.trace.start, 6),
+            "seconds": round(end - self.start, 6),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "rss_delta": rss_bytes() - self.rss_start,
+        }
+        if self.py_start is not None:
+            record["py_delta"] = tracemalloc.get_traced_memory()[0] - self.py_start
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        if self.attrs:
+            record["attrs"] = self.attrs
+        self.trace.spans.append(record)
+        return False
+
+
+class Trace:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.thread = threading.get_ident()
+        self.pid = os.getpid()
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+        self.stack = []
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "pid": self.pid,
+            "thread": self.thread,
+            "started_at": self.wall_start,
+            "spans": sorted(self.spans, key=lambda s: s["start"]),
+        }
+
+
+def start_trace(name: str = "rerun") -> Trace:
+    # Novo rastro para a thread atual (substitui o anterior)
+    trace = Trace(name)
+    _local.trace = trace
+    with _recent_lock:
+        _recent.append(trace)
+    return trace
+
+
+def current_trace() -> Trace | None:
+    return getattr(_local, "trace", None)
+
+
+def finish_trace() -> Trace | None:
+    trace = current_trace()
+    _local.trace = None
+    return trace
+
+
+def span(name: str, rows_in: int | None = None, **attrs):
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return _NULL_SPAN
+    return Span(trace, name, rows_in, attrs)
+
+
+def traced(name: str | None = None):
+    # Decorador: a função inteira vira um span
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, "trace", None) is None:
+                return func(*args, **kwargs)
+            with span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def recent_traces() -> list[Trace]:
+    with _recent_lock:
+        return list(_recent)
+
+
+def to_json(traces: list[Trace]) -> str:
+    return json.dumps([t.to_dict() for t in traces], indent=2, default=str)
+
+
+def to_chrome_trace(traces: list[Trace]) -> str:
+    # Formato "Trace Event" (eventos completos "X", tempos em microssegundos)
+    events = []
+    for trace in traces:
+        base_us = trace.wall_start * 1e6
+        for s in trace.spans:
+            args = {k: v for k, v in s.items() if k not in ("name", "start", "seconds", "depth")}
+            events.append({
+                "name": s["name"],
+                "cat": trace.name,
+                "ph": "X",
+                "ts": round(base_us + s["start"] * 1e6, 3),
+                "dur": round(s["seconds"] * 1e6, 3),
+                "pid": trace.pid,
+                "tid": trace.thread,
+                "args": args,
+            })
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str)